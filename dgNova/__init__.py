@@ -4,15 +4,39 @@ dgNova - Statistical Analysis and Simulations for Plant Breeding Experiments
 
 __version__ = '0.1.0'
 
-from .mating_designs import DIALLEL
-from .field_designs import UNREP
+import importlib
 
-__all__ = [
-    'DIALLEL',
-    'UNREP'
-]
+# Public classes, imported from their subpackage on first access (PEP 562)
+_LAZY_ATTRIBUTES = {
+    'DIALLEL': 'mating_designs',
+    'MultiEnvDiallel': 'mating_designs',
+    'LineTester': 'mating_designs',
+    'NCII': 'mating_designs',
+    'DiallelSimulator': 'mating_designs',
+    'UNREP': 'field_designs',
+    'REP': 'field_designs',
+    'RCBD': 'field_designs',
+    'Lattice': 'field_designs',
+    'AlphaLattice': 'field_designs',
+    'CRD': 'field_designs.crd',
+    'LatinSquare': 'field_designs.latin_square',
+    'SplitPlot': 'field_designs.split_plot'
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(f'.{_LAZY_ATTRIBUTES[name]}', __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
 
 # Copyright (c) 2024 Nadim Khan
 # 
 # This software is released under the MIT License.
-# https://opensource.org/licenses/MIT 
\ No newline at end of file
+# https://opensource.org/licenses/MIT
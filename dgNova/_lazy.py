@@ -0,0 +1,63 @@
+"""
+Deferred imports of plotting and pretty-print dependencies
+
+Modules bind these proxies at import time, e.g.
+
+    plt = lazy_import('matplotlib.pyplot')
+
+and the real module is imported on first attribute access or call, so
+importing dgNova stays fast and works on hosts without a display or
+without the optional packages until a plotting method is used.
+"""
+import importlib
+
+class LazyImport:
+    """Proxy for a module (or an attribute of one) imported on first use"""
+
+    def __init__(self, module: str, attr: str = None):
+        self._module = module
+        self._attr = attr
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            target = importlib.import_module(self._module)
+            if self._attr is not None:
+                target = getattr(target, self._attr)
+            self._target = target
+        return self._target
+
+    def __getattr__(self, name: str):
+        # Only called for names not found on the proxy itself
+        if name.startswith('_') and name in ('_module', '_attr', '_target'):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __repr__(self) -> str:
+        name = self._module if self._attr is None else f"{self._module}.{self._attr}"
+        state = 'loaded' if self._target is not None else 'not loaded'
+        return f"<lazy import {name} ({state})>"
+
+def lazy_import(module: str, attr: str = None) -> LazyImport:
+    """
+    Proxy for `module` (or `module.attr`) that imports it on first use
+
+    Parameters
+    ----------
+    module : str
+        Dotted module name
+    attr : str, optional
+        Attribute of the module to proxy instead of the module itself
+
+    Returns
+    -------
+    LazyImport
+        Proxy forwarding attribute access, calls and indexing
+    """
+    return LazyImport(module, attr)
@@ -1,3 +1,10 @@
 from .statistics import Statistics
+from .critical_values import StudentizedRange, q_critical
+from .pairwise import PairwiseComparisons
+from .diagnostics import diagnostic_figure, render_diagnostics
+from .mixed_model import MixedModel
+from .result_cache import ResultCache, cached_analysis
 
-__all__ = ['Statistics'] 
\ No newline at end of file
+__all__ = ['Statistics', 'StudentizedRange', 'q_critical', 'PairwiseComparisons',
+           'diagnostic_figure', 'render_diagnostics', 'MixedModel', 'ResultCache',
+           'cached_analysis']
@@ -0,0 +1,191 @@
+"""
+Residual diagnostic figures that scale to large trials
+
+Figures are built on matplotlib.figure.Figure directly, without pyplot,
+so they render headless (no display, no global figure state) and can be
+drawn in worker processes. Above `max_points` residuals the Q-Q panel
+shows quantile-thinned points and the fitted-value panels are drawn as
+hexbin density plots.
+"""
+import os
+from typing import Optional, List, Sequence
+import numpy as np
+from scipy import stats
+from .._lazy import lazy_import
+from .parallel import map_tasks
+
+Figure = lazy_import('matplotlib.figure', 'Figure')
+
+# Residuals drawn point by point; larger samples are thinned or binned
+MAX_POINTS = 5000
+
+def qq_points(residuals: np.ndarray, max_points: int = MAX_POINTS) -> tuple:
+    """
+    Theoretical and sample quantiles for a normal Q-Q plot
+
+    Above max_points the sorted residuals are thinned to points evenly
+    spaced in probability, keeping the most extreme residuals in each
+    tail where departures from normality show.
+
+    Parameters
+    ----------
+    residuals : np.ndarray
+        Residuals (NaN dropped)
+    max_points : int
+        Maximum number of points returned
+
+    Returns
+    -------
+    tuple
+        Theoretical quantiles, sample quantiles
+    """
+    sample = np.sort(np.asarray(residuals, dtype=float).ravel())
+    sample = sample[np.isfinite(sample)]
+    n = sample.size
+    if n > max_points:
+        tail = max_points // 10
+        middle = np.linspace(tail, n - 1 - tail, max_points - 2 * tail)
+        index = np.unique(np.concatenate([
+            np.arange(tail), np.round(middle).astype(int), np.arange(n - tail, n)
+        ]))
+    else:
+        index = np.arange(n)
+    # Blom plotting positions
+    theoretical = stats.norm.ppf((index + 1 - 0.375) / (n + 0.25))
+    return theoretical, sample[index]
+
+def _density_or_scatter(ax, x: np.ndarray, y: np.ndarray, max_points: int, gridsize: int):
+    if x.size > max_points:
+        ax.hexbin(x, y, gridsize=gridsize, bins='log', mincnt=1, cmap='viridis')
+    else:
+        ax.scatter(x, y, s=12, alpha=0.7)
+
+def diagnostic_figure(residuals: np.ndarray,
+                      fitted: np.ndarray,
+                      title: Optional[str] = None,
+                      max_points: int = MAX_POINTS,
+                      gridsize: int = 60,
+                      figsize: tuple = (12, 10),
+                      figure=None):
+    """
+    Four-panel residual diagnostics: Q-Q, residuals vs fitted, histogram
+    and scale-location
+
+    Parameters
+    ----------
+    residuals, fitted : np.ndarray
+        Residuals and fitted values of one trait
+    title : str, optional
+        Figure title
+    max_points : int
+        Largest sample drawn point by point
+    gridsize : int
+        Hexagons across the x axis of the density panels
+    figsize : tuple
+        Figure size in inches
+    figure : matplotlib.figure.Figure, optional
+        Figure to draw on (default: a new headless figure)
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+        The diagnostic figure
+    """
+    residuals = np.asarray(residuals, dtype=float).ravel()
+    fitted = np.asarray(fitted, dtype=float).ravel()
+    keep = np.isfinite(residuals) & np.isfinite(fitted)
+    residuals, fitted = residuals[keep], fitted[keep]
+
+    fig = figure if figure is not None else Figure(figsize=figsize)
+    (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
+
+    # Q-Q plot with the line through the quartiles
+    theoretical, sample = qq_points(residuals, max_points)
+    ax1.scatter(theoretical, sample, s=10)
+    q25, q75 = np.percentile(residuals, [25, 75])
+    z25, z75 = stats.norm.ppf([0.25, 0.75])
+    slope = (q75 - q25) / (z75 - z25)
+    ax1.axline((z25, q25), slope=slope, color='r')
+    ax1.set_xlabel("Theoretical quantiles")
+    ax1.set_ylabel("Ordered residuals")
+    ax1.set_title("Normal Q-Q Plot")
+
+    # Residuals vs Fitted
+    _density_or_scatter(ax2, fitted, residuals, max_points, gridsize)
+    ax2.axhline(y=0, color='r', linestyle='--')
+    ax2.set_xlabel("Fitted values")
+    ax2.set_ylabel("Residuals")
+    ax2.set_title("Residuals vs Fitted")
+
+    # Histogram
+    ax3.hist(residuals, bins='auto' if residuals.size <= 100_000 else 100, density=True)
+    x = np.linspace(residuals.min(), residuals.max(), 100)
+    ax3.plot(x, stats.norm.pdf(x, np.mean(residuals), np.std(residuals)))
+    ax3.set_title("Histogram of Residuals")
+
+    # Scale-Location
+    _density_or_scatter(ax4, fitted, np.sqrt(np.abs(residuals)), max_points, gridsize)
+    ax4.set_xlabel("Fitted values")
+    ax4.set_ylabel("√|Residuals|")
+    ax4.set_title("Scale-Location")
+
+    if title:
+        fig.suptitle(title)
+    fig.tight_layout()
+    return fig
+
+def _render_task(task: tuple) -> str:
+    residuals, fitted, path, dpi, options = task
+    diagnostic_figure(residuals, fitted, **options).savefig(path, dpi=dpi)
+    return path
+
+def render_diagnostics(residuals: np.ndarray,
+                       fitted: np.ndarray,
+                       directory: str,
+                       names: Optional[Sequence[str]] = None,
+                       fmt: str = 'png',
+                       dpi: int = 100,
+                       n_jobs: int = 1,
+                       **options) -> List[str]:
+    """
+    Write one diagnostic figure per trait, optionally in worker processes
+
+    Parameters
+    ----------
+    residuals, fitted : np.ndarray
+        Arrays of shape (n, traits)
+    directory : str
+        Output directory (created if missing)
+    names : Sequence[str], optional
+        Trait names used for titles and file names
+    fmt : str
+        Image format understood by matplotlib ('png', 'pdf', 'svg', ...)
+    dpi : int
+        Resolution of raster formats
+    n_jobs : int
+        Worker processes (1 renders in this process, -1 uses all cores)
+    **options
+        Passed to `diagnostic_figure`
+
+    Returns
+    -------
+    List[str]
+        Paths of the written files
+    """
+    residuals = np.asarray(residuals, dtype=float)
+    fitted = np.asarray(fitted, dtype=float)
+    if residuals.ndim == 1:
+        residuals, fitted = residuals[:, None], fitted[:, None]
+    residuals = residuals.reshape(residuals.shape[0], -1)
+    fitted = np.broadcast_to(fitted.reshape(fitted.shape[0], -1), residuals.shape)
+    traits = residuals.shape[1]
+    if names is None:
+        names = [f"trait_{j + 1}" for j in range(traits)]
+    if len(names) != traits:
+        raise ValueError(f"{len(names)} names for {traits} traits")
+
+    os.makedirs(directory, exist_ok=True)
+    tasks = [(residuals[:, j], fitted[:, j], os.path.join(directory, f"{name}.{fmt}"),
+              dpi, {'title': str(name), **options})
+             for j, name in enumerate(names)]
+    return map_tasks(_render_task, tasks, n_jobs)
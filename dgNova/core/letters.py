@@ -0,0 +1,106 @@
+from typing import List, Optional
+import numpy as np
+
+ALPHABET = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+def letter_names(count: int) -> List[str]:
+    """
+    Names of the first `count` letters: a-z, A-Z, then a1, b1, ...
+
+    A name is one alphabet character followed by an optional number, so
+    concatenated names stay unambiguous beyond 52 groups.
+    """
+    base = len(ALPHABET)
+    return [ALPHABET[k % base] + (str(k // base) if k >= base else '')
+            for k in range(count)]
+
+def compact_letter_display(significant: np.ndarray,
+                           means: Optional[np.ndarray] = None) -> List[str]:
+    """
+    Compact letter display of a set of pairwise comparisons
+
+    Treatments sharing a letter are not significantly different. Letters
+    are the columns of the insert-absorb algorithm (Piepho, 2004): every
+    significant pair splits the letters holding both treatments, and
+    letters contained in another are absorbed. When the non-significant
+    pairs form runs over the means in sorted order, as for Tukey, LSD and
+    protected DMRT tests, the letters are the maximal runs and are found
+    directly without enumerating pairs.
+
+    Parameters
+    ----------
+    significant : np.ndarray
+        Symmetric boolean matrix (t, t); True marks a significant pair
+    means : np.ndarray, optional
+        Treatment means; letters are assigned from the highest mean
+
+    Returns
+    -------
+    List[str]
+        Letter group of every treatment, possibly several letters each
+    """
+    significant = np.asarray(significant, dtype=bool)
+    t = significant.shape[0]
+    if significant.shape != (t, t):
+        raise ValueError(f"Significance matrix must be square, got {significant.shape}")
+    if t == 0:
+        return []
+
+    order = np.argsort(-np.asarray(means, dtype=float), kind='stable') if means is not None \
+        else np.arange(t)
+    same = ~significant[np.ix_(order, order)]
+    np.fill_diagonal(same, True)
+    same &= same.T
+
+    letters = _interval_letters(same)
+    if letters is None:
+        letters = _insert_absorb(same)
+
+    # Letters in order of their best member; treatments back in input order
+    letters = letters[:, np.lexsort((-letters.sum(axis=0), np.argmax(letters, axis=0)))]
+    membership = np.empty_like(letters)
+    membership[order] = letters
+    names = np.array(letter_names(letters.shape[1]), dtype=object)
+    return [''.join(names[row]) for row in membership]
+
+def _interval_letters(same: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Letters as maximal runs when every treatment matches a contiguous
+    run of the following ones, with run ends never decreasing; None otherwise
+    """
+    t = same.shape[0]
+    index = np.arange(t)
+    # First significant partner after each treatment (t if none)
+    later_differs = ~same & (index[None, :] > index[:, None])
+    first = np.where(later_differs.any(axis=1), np.argmax(later_differs, axis=1), t)
+    run = first - index
+    if not np.array_equal(run, np.triu(same).sum(axis=1)):
+        return None
+    end = first - 1
+    if np.any(np.diff(end) < 0):
+        return None
+    starts = np.flatnonzero(np.concatenate([[True], end[1:] > end[:-1]]))
+    return (index[:, None] >= starts) & (index[:, None] <= end[starts])
+
+def _insert_absorb(same: np.ndarray) -> np.ndarray:
+    """General insert-absorb over the significant pairs"""
+    t = same.shape[0]
+    letters = np.ones((t, 1), dtype=bool)
+    for i in range(t - 1):
+        for j in np.flatnonzero(~same[i, i + 1:]) + i + 1:
+            both = letters[i] & letters[j]
+            if not both.any():
+                continue
+            # Insert: each letter holding i and j splits into one without
+            # i and one without j
+            without_i = letters[:, both].copy()
+            without_i[i] = False
+            letters[j, both] = False
+            letters = np.concatenate([letters, without_i], axis=1)
+            # Absorb: drop duplicated letters and letters inside another
+            letters = np.unique(letters, axis=1)
+            counts = letters.sum(axis=0)
+            overlap = letters.T.astype(np.int32) @ letters.astype(np.int32)
+            inside = (overlap == counts[:, None]) & (counts[:, None] < counts[None, :])
+            letters = letters[:, ~inside.any(axis=1)]
+    return letters
@@ -0,0 +1,381 @@
+"""
+REML variance components and BLUPs for linear mixed models
+
+    y = Xb + Σ_k Z_k u_k + e,   u_k ~ N(0, σ²_k I),   e ~ N(0, σ²_e I)
+
+X and the Z_k are sparse indicator matrices built from factor codes.
+Henderson's mixed model equations
+
+    [X'X   X'Z        ] [b]   [X'y]
+    [Z'X   Z'Z + Λ    ] [u] = [Z'y],   Λ = diag(σ²_e / σ²_k)
+
+keep the same sparsity pattern at every iteration, so the fill-reducing
+ordering (the symbolic factorization) is computed once and only the
+numeric factorization is repeated. CHOLMOD (scikit-sparse) is used when
+installed; otherwise SuperLU runs with the ordering fixed from the
+first factorization.
+"""
+from typing import Dict, Optional
+import numpy as np
+from scipy import sparse
+from scipy.sparse import linalg as splinalg
+
+# Columns of the inverse solved per batch when taking traces
+INVERSE_BATCH = 512
+
+def indicator_matrix(codes: np.ndarray, drop_first: bool = False) -> sparse.csc_matrix:
+    """
+    Sparse 0/1 incidence matrix of a factor
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        Level (code or label) of every observation
+    drop_first : bool
+        Drop the first level (treatment contrasts next to an intercept)
+
+    Returns
+    -------
+    sparse.csc_matrix
+        Matrix of shape (n, levels)
+    """
+    levels, codes = np.unique(np.asarray(codes).ravel(), return_inverse=True)
+    codes = codes.ravel()
+    n = codes.size
+    matrix = sparse.csc_matrix((np.ones(n), (np.arange(n), codes)), shape=(n, levels.size))
+    return matrix[:, 1:] if drop_first else matrix
+
+class SparseFactor:
+    """
+    Factorization of a symmetric positive definite sparse matrix whose
+    pattern is fixed; the ordering is computed once on construction.
+    """
+
+    def __init__(self, matrix: sparse.spmatrix):
+        matrix = sparse.csc_matrix(matrix)
+        try:
+            from sksparse.cholmod import analyze
+            self.backend = 'cholmod'
+            self._symbolic = analyze(matrix)
+        except ImportError:
+            self.backend = 'superlu'
+            self._perm = splinalg.splu(matrix, permc_spec='MMD_AT_PLUS_A').perm_c
+            self._inverse_perm = np.argsort(self._perm)
+        self._numeric = None
+        self.factorize(matrix)
+
+    def factorize(self, matrix: sparse.spmatrix) -> None:
+        """Numeric factorization reusing the stored ordering"""
+        matrix = sparse.csc_matrix(matrix)
+        if self.backend == 'cholmod':
+            self._symbolic.cholesky_inplace(matrix)
+            self._numeric = self._symbolic
+        else:
+            permuted = matrix[self._perm][:, self._perm]
+            self._numeric = splinalg.splu(
+                sparse.csc_matrix(permuted), permc_spec='NATURAL',
+                diag_pivot_thresh=0.0, options={'SymmetricMode': True}
+            )
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        if self.backend == 'cholmod':
+            return self._numeric(rhs)
+        solution = self._numeric.solve(np.ascontiguousarray(rhs[self._perm]))
+        return solution[self._inverse_perm]
+
+    def logdet(self) -> float:
+        if self.backend == 'cholmod':
+            return float(self._numeric.logdet())
+        return float(np.sum(np.log(np.abs(self._numeric.U.diagonal()))))
+
+class MixedModel:
+    """
+    Linear mixed model with independent random factors fitted by REML
+
+    Variance components are estimated by average-information REML
+    (Gilmour, Thompson and Cullis, 1995), falling back to an EM-REML step
+    whenever the AI step leaves the parameter space or lowers the
+    likelihood, or by EM-REML alone.
+    """
+
+    def __init__(self,
+                 y: np.ndarray,
+                 fixed: Optional[Dict[str, np.ndarray]] = None,
+                 random: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Parameters
+        ----------
+        y : np.ndarray
+            Observations (NaN observations are dropped)
+        fixed : Dict[str, np.ndarray], optional
+            Fixed factors (name -> level of every observation); an
+            intercept is always included
+        random : Dict[str, np.ndarray]
+            Random factors (name -> level of every observation)
+        """
+        y = np.asarray(y, dtype=float).ravel()
+        keep = np.isfinite(y)
+        fixed = fixed or {}
+        if not random:
+            raise ValueError("At least one random factor is required")
+        self.y = y[keep]
+        self.n = self.y.size
+
+        columns = [sparse.csc_matrix(np.ones((self.n, 1)))]
+        self.fixed_names = ['(Intercept)']
+        self.fixed_levels = {}
+        for name, codes in fixed.items():
+            codes = np.asarray(codes).ravel()[keep]
+            block = indicator_matrix(codes, drop_first=True)
+            columns.append(block)
+            levels = np.unique(codes)
+            self.fixed_levels[name] = levels
+            self.fixed_names += [f"{name}[{level}]" for level in levels[1:]]
+        self.p = sum(block.shape[1] for block in columns)
+
+        self.random_names = list(random)
+        self.random_levels = {}
+        self.slices = {}
+        start = self.p
+        for name, codes in random.items():
+            codes = np.asarray(codes).ravel()[keep]
+            block = indicator_matrix(codes)
+            columns.append(block)
+            self.random_levels[name] = np.unique(codes)
+            self.slices[name] = slice(start, start + block.shape[1])
+            start += block.shape[1]
+        self.q = start - self.p
+
+        self.W = sparse.hstack(columns, format='csc')
+        self.WtW = (self.W.T @ self.W).tocsc()
+        self.Wty = self.W.T @ self.y
+        self.yty = float(self.y @ self.y)
+        self._factor = None
+
+    def _mme(self, sigma: np.ndarray) -> sparse.csc_matrix:
+        """Coefficient matrix with Λ = σ²_e / σ²_k on the random diagonal"""
+        shrink = np.zeros(self.p + self.q)
+        for k, name in enumerate(self.random_names):
+            shrink[self.slices[name]] = sigma[-1] / sigma[k]
+        return (self.WtW + sparse.diags(shrink)).tocsc()
+
+    def _inverse_blocks(self, C: sparse.csc_matrix) -> Dict[str, tuple]:
+        """
+        Trace, element sum and diagonal of every random block of C⁻¹
+
+        The random factor with most levels has a diagonal block D in C
+        and is absorbed: with A the remaining rows and columns and B their
+        coupling to it, C⁻¹ restricted to A is S⁻¹ = (A - B D⁻¹ B')⁻¹,
+        taken column by column from the sparse factor, and the absorbed
+        block is D⁻¹ + D⁻¹ B' S⁻¹ B D⁻¹.
+        """
+        size = self.p + self.q
+        absorbed = max(self.random_names,
+                       key=lambda name: self.slices[name].stop - self.slices[name].start)
+        inside = np.zeros(size, dtype=bool)
+        inside[self.slices[absorbed]] = True
+        other = np.flatnonzero(~inside)
+
+        s_inv = np.empty((other.size, other.size))
+        for start in range(0, other.size, INVERSE_BATCH):
+            cols = other[start:start + INVERSE_BATCH]
+            unit = np.zeros((size, cols.size))
+            unit[cols, np.arange(cols.size)] = 1.0
+            s_inv[:, start:start + cols.size] = self._factor.solve(unit)[other]
+
+        blocks = {}
+        position = np.cumsum(~inside) - 1
+        for name in self.random_names:
+            if name == absorbed:
+                continue
+            index = position[self.slices[name]]
+            sub = s_inv[np.ix_(index, index)]
+            diagonal = np.diag(sub).copy()
+            blocks[name] = (float(diagonal.sum()), float(sub.sum()), diagonal)
+
+        d = C.diagonal()[inside]
+        coupling = C[other][:, np.flatnonzero(inside)]
+        projected = s_inv @ coupling.toarray()
+        diagonal = 1 / d + np.asarray(coupling.multiply(projected).sum(axis=0)).ravel() / d**2
+        v = coupling @ (1 / d)
+        blocks[absorbed] = (float(diagonal.sum()), float(np.sum(1 / d) + v @ s_inv @ v), diagonal)
+        return blocks
+
+    def _evaluate(self, sigma: np.ndarray) -> Dict:
+        """Solve the MME at sigma; REML log-likelihood, scores and AI matrix"""
+        C = self._mme(sigma)
+        if self._factor is None:
+            self._factor = SparseFactor(C)
+        else:
+            self._factor.factorize(C)
+        solution = self._factor.solve(self.Wty)
+        residuals = self.y - self.W @ solution
+        s2e = sigma[-1]
+        y_py = (self.yty - float(solution @ self.Wty)) / s2e
+        blocks = self._inverse_blocks(C)
+
+        K = len(self.random_names)
+        score = np.zeros(K + 1)
+        work = np.zeros((self.n, K + 1))
+        absorbed = 0.0
+        for k, name in enumerate(self.random_names):
+            u = solution[self.slices[name]]
+            q_k = u.size
+            trace = blocks[name][0]
+            score[k] = -0.5 * (q_k / sigma[k] - trace * s2e / sigma[k]**2 - (u @ u) / sigma[k]**2)
+            absorbed += q_k - trace * s2e / sigma[k]
+            work[:, k] = self.W[:, self.slices[name]] @ u / sigma[k]
+        score[-1] = -0.5 * ((self.n - self.p - absorbed) / s2e - (residuals @ residuals) / s2e**2)
+        work[:, -1] = residuals / s2e
+
+        # Average information: AI_ij = w_i' P w_j / 2
+        projected = (work - self.W @ self._factor.solve(self.W.T @ work)) / s2e
+        information = 0.5 * work.T @ projected
+
+        minus_2ll = ((self.n - self.p - self.q) * np.log(s2e) +
+                     sum((self.slices[name].stop - self.slices[name].start) * np.log(sigma[k])
+                         for k, name in enumerate(self.random_names)) +
+                     self._factor.logdet() + y_py)
+        return {
+            'solution': solution,
+            'residuals': residuals,
+            'blocks': blocks,
+            'score': score,
+            'information': information,
+            'loglik': -0.5 * minus_2ll
+        }
+
+    def _em_step(self, sigma: np.ndarray, state: Dict) -> np.ndarray:
+        new = np.empty_like(sigma)
+        for k, name in enumerate(self.random_names):
+            u = state['solution'][self.slices[name]]
+            new[k] = (u @ u + sigma[-1] * state['blocks'][name][0]) / u.size
+        new[-1] = float(state['residuals'] @ self.y) / (self.n - self.p)
+        return new
+
+    def fit(self,
+            method: str = 'ai',
+            max_iter: int = 100,
+            tol: float = 1e-6,
+            init: Optional[Dict[str, float]] = None,
+            genotype: Optional[str] = None) -> Dict:
+        """
+        Estimate variance components by REML and predict BLUPs
+
+        Parameters
+        ----------
+        method : str
+            'ai' (average information with EM fallback) or 'em'
+        max_iter : int
+            Maximum number of iterations
+        tol : float
+            Convergence tolerance on the relative change of the components
+            (or 1% of it on the change of the log-likelihood)
+        init : Dict[str, float], optional
+            Starting values by random factor name and 'Residual'
+        genotype : str, optional
+            Random factor whose BLUPs, reliabilities and heritability are
+            reported as the genotype term (default: the last random factor)
+
+        Returns
+        -------
+        Dict
+            'variance_components', 'fixed_effects', 'blups' by factor,
+            genotype 'predicted' values, 'pev', 'reliability',
+            'heritability' (Cullis and standard), 'loglik', 'iterations',
+            'converged' and the factorization 'backend'
+        """
+        if method not in ('ai', 'em'):
+            raise ValueError("method must be 'ai' or 'em'")
+        genotype = genotype or self.random_names[-1]
+        if genotype not in self.random_names:
+            raise ValueError(f"Unknown random factor '{genotype}'")
+
+        K = len(self.random_names)
+        variance = float(np.var(self.y))
+        floor = 1e-8 * max(variance, 1e-12)
+        sigma = np.full(K + 1, variance / (K + 1))
+        for k, name in enumerate(self.random_names + ['Residual']):
+            if init and name in init:
+                sigma[k] = init[name]
+
+        state = self._evaluate(sigma)
+        converged = False
+        iterations = 0
+        for iterations in range(1, max_iter + 1):
+            new = None
+            if method == 'ai':
+                # Components held at zero that still point outwards stay fixed
+                free = ~((sigma <= floor * 1.001) & (state['score'] < 0))
+                step = np.zeros_like(sigma)
+                try:
+                    step[free] = np.linalg.solve(state['information'][np.ix_(free, free)],
+                                                 state['score'][free])
+                except np.linalg.LinAlgError:
+                    step = None
+                # Components stepping out of the parameter space are held
+                # at the boundary; the step is halved until REML improves
+                for _ in range(4 if step is not None else 0):
+                    candidate = np.maximum(sigma + step, floor)
+                    trial = self._evaluate(candidate)
+                    if trial['loglik'] >= state['loglik'] - 1e-10 * abs(state['loglik']):
+                        new, new_state = candidate, trial
+                        break
+                    step = step / 2
+            if new is None:
+                new = np.maximum(self._em_step(sigma, state), floor)
+                new_state = self._evaluate(new)
+            # Changes are relative to each component, or to the total
+            # variance for components near zero
+            change = np.max(np.abs(new - sigma) / np.maximum(sigma, 1e-4 * np.sum(sigma)))
+            gain = new_state['loglik'] - state['loglik']
+            sigma, state = new, new_state
+            # Components at the boundary crawl under EM; a flat likelihood
+            # is then the stopping rule
+            if change < tol or abs(gain) < 1e-2 * tol:
+                converged = True
+                break
+
+        return self._results(sigma, state, genotype, iterations, converged)
+
+    def _results(self, sigma: np.ndarray, state: Dict, genotype: str,
+                 iterations: int, converged: bool) -> Dict:
+        solution = state['solution']
+        s2e = sigma[-1]
+        components = {name: float(sigma[k]) for k, name in enumerate(self.random_names)}
+        components['Residual'] = float(s2e)
+        blups = {name: solution[self.slices[name]] for name in self.random_names}
+
+        # Genotype predictions: intercept, averaged fixed levels, BLUP
+        fixed = solution[:self.p]
+        baseline = fixed[0]
+        start = 1
+        for levels in self.fixed_levels.values():
+            width = levels.size - 1
+            baseline += np.sum(fixed[start:start + width]) / levels.size
+            start += width
+        s2g = sigma[self.random_names.index(genotype)]
+        trace, total, diagonal = state['blocks'][genotype]
+        pev = diagonal * s2e
+        m = diagonal.size
+        # Mean variance of a difference of two genotype BLUPs
+        mean_vd = 2 * s2e * (m * trace - total) / (m * (m - 1)) if m > 1 else np.nan
+        replications = float(self.W[:, self.slices[genotype]].sum(axis=0).mean())
+
+        return {
+            'variance_components': components,
+            'fixed_effects': dict(zip(self.fixed_names, fixed.tolist())),
+            'blups': blups,
+            'levels': self.random_levels,
+            'predicted': baseline + blups[genotype],
+            'pev': pev,
+            'reliability': 1 - pev / s2g,
+            'heritability': {
+                'cullis': float(1 - mean_vd / (2 * s2g)),
+                'standard': float(s2g / (s2g + s2e / replications))
+            },
+            'loglik': float(state['loglik']),
+            'iterations': iterations,
+            'converged': converged,
+            'backend': self._factor.backend
+        }
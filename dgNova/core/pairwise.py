@@ -0,0 +1,117 @@
+from typing import Dict, Optional, Union, List
+import numpy as np
+import pandas as pd
+
+def pair_index(n: int) -> tuple:
+    """
+    Row and column indices (i < j) of the condensed upper triangle
+
+    Same order as np.triu_indices(n, k=1), stored as int32.
+    """
+    counts = np.arange(n - 1, -1, -1, dtype=np.int64)
+    first = np.repeat(np.arange(n, dtype=np.int32), counts)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    second = (np.arange(first.size, dtype=np.int64) - starts[first] + first + 1).astype(np.int32)
+    return first, second
+
+def condensed_position(i: np.ndarray, j: np.ndarray, n: int) -> np.ndarray:
+    """Position of pair (i, j), i < j, in the condensed upper triangle"""
+    i = np.asarray(i, dtype=np.int64)
+    j = np.asarray(j, dtype=np.int64)
+    return i * (2 * n - i - 1) // 2 + (j - i - 1)
+
+class PairwiseComparisons:
+    """
+    All pairwise comparisons of treatment means in condensed storage
+
+    Each quantity is a 1-D array over the n(n-1)/2 pairs (i < j) in
+    upper-triangle order, computed by broadcasting. Scalars (a common
+    standard error or critical value) are kept as scalars. The table
+    view is built only when asked for.
+    """
+
+    def __init__(self,
+                 means: np.ndarray,
+                 se: Union[float, np.ndarray],
+                 critical: Union[float, np.ndarray],
+                 significant: Optional[np.ndarray] = None,
+                 labels: Optional[List[str]] = None):
+        """
+        Parameters
+        ----------
+        means : np.ndarray
+            Treatment means
+        se : float or np.ndarray
+            Standard error of a difference (scalar or condensed)
+        critical : float or np.ndarray
+            Critical value of the statistic (scalar or condensed)
+        significant : np.ndarray, optional
+            Condensed significance flags; default statistic > critical
+        labels : List[str], optional
+            Treatment labels for the table view
+        """
+        self.means = np.asarray(means, dtype=float)
+        self.n = self.means.size
+        self.first, self.second = pair_index(self.n)
+        self.difference = self.means[self.first] - self.means[self.second]
+        self.se = se
+        self.statistic = np.abs(self.difference) / se
+        self.critical = critical
+        self.significant = (self.statistic > critical) if significant is None \
+            else np.asarray(significant, dtype=bool)
+        self.labels = labels
+        self._frame = None
+
+    def __len__(self) -> int:
+        return self.difference.size
+
+    def __getitem__(self, k: int) -> Dict:
+        """One comparison as a dict"""
+        return {
+            'treatment1': int(self.first[k]),
+            'treatment2': int(self.second[k]),
+            'difference': float(abs(self.difference[k])),
+            'significant': bool(self.significant[k])
+        }
+
+    def __iter__(self):
+        return (self[k] for k in range(len(self)))
+
+    def square(self, values: Optional[np.ndarray] = None, fill=False) -> np.ndarray:
+        """Symmetric (n, n) matrix of a condensed quantity (default: significance)"""
+        values = self.significant if values is None else np.asarray(values)
+        matrix = np.full((self.n, self.n), fill, dtype=values.dtype)
+        matrix[self.first, self.second] = values
+        matrix[self.second, self.first] = values
+        return matrix
+
+    def pair(self, i: int, j: int) -> Dict:
+        """Comparison of treatments i and j"""
+        if i == j:
+            raise ValueError("A treatment is not compared with itself")
+        sign = 1 if i < j else -1
+        i, j = min(i, j), max(i, j)
+        k = int(condensed_position(i, j, self.n))
+        result = self[k]
+        result['difference'] = sign * float(self.difference[k])
+        return result
+
+    def to_frame(self) -> pd.DataFrame:
+        """Comparisons as a DataFrame (built once, on first use)"""
+        if self._frame is None:
+            size = len(self)
+            labels = np.asarray(self.labels, dtype=object) if self.labels is not None else None
+            self._frame = pd.DataFrame({
+                'treatment1': labels[self.first] if labels is not None else self.first,
+                'treatment2': labels[self.second] if labels is not None else self.second,
+                'difference': self.difference,
+                'se': np.broadcast_to(self.se, (size,)),
+                'statistic': self.statistic,
+                'critical': np.broadcast_to(self.critical, (size,)),
+                'significant': self.significant
+            })
+        return self._frame
+
+    def __repr__(self) -> str:
+        return (f"PairwiseComparisons({self.n} treatments, {len(self)} pairs, "
+                f"{int(self.significant.sum())} significant)")
@@ -0,0 +1,111 @@
+"""
+Chunked and pooled evaluation shared by the resampling routines
+
+Replicates (bootstrap draws, permutations, simulations) are evaluated in
+vectorized chunks whose arrays stay within CHUNK_CELLS float64 cells.
+Every chunk gets its own child of one SeedSequence, so results for a
+given seed do not depend on how many workers run them. `map_tasks`
+holds the n_jobs convention used throughout: 1 runs in this process,
+-1 uses the executor's default number of workers.
+"""
+from typing import Callable, Dict, List, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+
+# Upper bound on the number of float64 cells held per chunk array (~128 MB)
+CHUNK_CELLS = 2 ** 24
+
+def chunk_sizes(replicates: int, cells: int, chunk_size: Optional[int] = None) -> List[int]:
+    """
+    Split replicates into chunks of at most CHUNK_CELLS // cells
+
+    Parameters
+    ----------
+    replicates : int
+        Number of replicates B
+    cells : int
+        Array cells needed per replicate
+    chunk_size : int, optional
+        Replicates per chunk, overriding the memory bound
+
+    Returns
+    -------
+    List[int]
+        Replicates in each chunk
+    """
+    if replicates < 1:
+        raise ValueError("Number of replicates must be at least 1")
+    if chunk_size is None:
+        chunk_size = max(1, CHUNK_CELLS // max(int(cells), 1))
+    full, rest = divmod(replicates, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+def map_tasks(worker: Callable, tasks: Sequence, n_jobs: int = 1, threads: bool = False) -> list:
+    """
+    Apply worker to every task, in a pool when n_jobs != 1
+
+    Parameters
+    ----------
+    worker : Callable
+        Function of one task (picklable for processes)
+    tasks : Sequence
+        Task arguments
+    n_jobs : int
+        Workers (1 runs in this process, -1 uses the executor default)
+    threads : bool
+        Use a thread pool (I/O-bound work) instead of processes
+
+    Returns
+    -------
+    list
+        Results in task order
+    """
+    if n_jobs is not None and n_jobs != 1 and len(tasks) > 1:
+        workers = None if n_jobs < 0 else n_jobs
+        executor = ThreadPoolExecutor if threads else ProcessPoolExecutor
+        with executor(max_workers=workers) as pool:
+            return list(pool.map(worker, tasks))
+    return [worker(task) for task in tasks]
+
+def run_chunks(worker: Callable,
+               sample: Dict,
+               replicates: int,
+               cells: int,
+               seed: Optional[int] = None,
+               chunk_size: Optional[int] = None,
+               n_jobs: int = 1,
+               args: tuple = ()) -> list:
+    """
+    Evaluate replicates chunk by chunk, optionally in a process pool
+
+    The worker receives (size, seed_sequence, *args, sample) and returns
+    the result of one chunk.
+
+    Parameters
+    ----------
+    worker : Callable
+        Chunk function
+    sample : Dict
+        Data shared by all chunks
+    replicates : int
+        Number of replicates
+    cells : int
+        Array cells needed per replicate (sets the chunk size)
+    seed : int, optional
+        Root seed
+    chunk_size : int, optional
+        Replicates per chunk
+    n_jobs : int
+        Worker processes (1 runs in this process, -1 uses all cores)
+    args : tuple
+        Extra task fields passed between the seed and the sample
+
+    Returns
+    -------
+    list
+        Chunk results in order
+    """
+    sizes = chunk_sizes(replicates, cells, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(size, s, *args, sample) for size, s in zip(sizes, seeds)]
+    return map_tasks(worker, tasks, n_jobs)
@@ -0,0 +1,134 @@
+"""
+Permutation (randomization) F-tests for one-way and blocked designs
+
+Treatment labels are re-randomized B times as the design allows: over
+all plots for a CRD, within each block for an RCBD. Under relabelling
+the total and block sums of squares do not change, so the F statistic
+is a monotone function of the treatment sum of squares and each
+permutation only needs its treatment totals. These come from one matrix
+product of the permuted responses with the treatment indicator matrix,
+for a whole chunk of permutations at a time.
+"""
+from typing import Optional, Dict, Tuple
+import numpy as np
+from scipy import stats
+from .parallel import run_chunks
+
+def _permutation_chunk(task: Tuple) -> int:
+    """Count permutations whose treatment statistic reaches the observed one"""
+    size, seed, sample = task
+    rng = np.random.default_rng(seed)
+    y, indicator, observed = sample['y'], sample['indicator'], sample['observed']
+
+    keys = rng.random((size,) + y.shape)
+    if y.ndim == 2:
+        # RCBD: (blocks, plots) with plots shuffled within every block
+        order = np.argsort(keys, axis=2)
+        permuted = np.take_along_axis(np.broadcast_to(y, keys.shape), order, axis=2)
+        totals = permuted.sum(axis=1)
+    else:
+        # CRD: all plots shuffled, totals by treatment indicator product
+        permuted = y[np.argsort(keys, axis=1)]
+        totals = permuted @ indicator
+    statistic = np.sum(totals**2 * sample['weights'], axis=1)
+    return int(np.sum(statistic >= observed))
+
+def permutation_anova(values: np.ndarray,
+                      treatment: Optional[np.ndarray] = None,
+                      blocked: bool = False,
+                      permutations: int = 9999,
+                      seed: Optional[int] = None,
+                      chunk_size: Optional[int] = None,
+                      n_jobs: int = 1) -> Dict:
+    """
+    Permutation F-test for treatments in a CRD or RCBD
+
+    Parameters
+    ----------
+    values : np.ndarray
+        RCBD: matrix (blocks, treatments). CRD: matrix (replications,
+        treatments) or a vector of observations with `treatment` codes
+    treatment : np.ndarray, optional
+        Treatment of every observation for an unbalanced CRD
+    blocked : bool
+        Permute within rows (blocks) instead of over all plots
+    permutations : int
+        Number of random relabellings B
+    seed : int, optional
+        Random seed; for a given chunk size results do not depend on n_jobs
+    chunk_size : int, optional
+        Permutations evaluated per vectorized batch
+    n_jobs : int
+        Worker processes (1 runs in this process, -1 uses all cores)
+
+    Returns
+    -------
+    Dict
+        Observed F, its permutation p-value (with the observed labelling
+        counted), the Monte Carlo standard error of that p-value, the
+        parametric p-value and the degrees of freedom
+    """
+    values = np.asarray(values, dtype=float)
+    if permutations < 1:
+        raise ValueError("Number of permutations must be at least 1")
+
+    if blocked:
+        if values.ndim != 2:
+            raise ValueError("Blocked permutation needs a (blocks, treatments) matrix")
+        y = values
+        n_blocks, t = y.shape
+        counts = np.full(t, n_blocks)
+        totals = y.sum(axis=0)
+        indicator = None
+        block_raw = np.sum(y.sum(axis=1)**2) / t
+        block_df = n_blocks - 1
+    else:
+        if treatment is None:
+            if values.ndim != 2:
+                raise ValueError("treatment codes are required for a vector of observations")
+            treatment = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+        y = values.ravel()
+        codes = np.unique(np.asarray(treatment).ravel(), return_inverse=True)[1].ravel()
+        if codes.size != y.size:
+            raise ValueError(f"{codes.size} treatment codes for {y.size} observations")
+        t = codes.max() + 1
+        counts = np.bincount(codes, minlength=t)
+        totals = np.bincount(codes, weights=y, minlength=t)
+        indicator = np.zeros((y.size, t))
+        indicator[np.arange(y.size), codes] = 1.0
+        block_raw = y.sum()**2 / y.size
+        block_df = 0
+
+    n = y.size
+    correction = y.sum()**2 / n
+    total_ss = np.sum(y**2) - correction
+    weights = 1.0 / counts
+    statistic = np.sum(totals**2 * weights)
+    treatment_ss = statistic - correction
+    treatment_df = t - 1
+    error_ss = total_ss - (block_raw - correction) - treatment_ss
+    error_df = n - 1 - block_df - treatment_df
+    if error_df < 1:
+        raise ValueError("No error degrees of freedom left for an F-test")
+    f_value = (treatment_ss / treatment_df) / (error_ss / error_df)
+
+    sample = {
+        'y': y,
+        'indicator': indicator,
+        'weights': weights,
+        # Tolerance so the observed labelling counts despite rounding
+        'observed': statistic - 1e-10 * max(abs(statistic), 1.0)
+    }
+    hits = sum(run_chunks(_permutation_chunk, sample, permutations, n, seed=seed,
+                          chunk_size=chunk_size, n_jobs=n_jobs))
+
+    p_value = (hits + 1) / (permutations + 1)
+    return {
+        'f_value': float(f_value),
+        'p_value': float(p_value),
+        'p_value_se': float(np.sqrt(p_value * (1 - p_value) / permutations)),
+        'p_parametric': float(stats.f.sf(f_value, treatment_df, error_df)),
+        'df': (int(treatment_df), int(error_df)),
+        'permutations': int(permutations),
+        'design': 'rcbd' if blocked else 'crd'
+    }
@@ -0,0 +1,332 @@
+"""
+Content-addressed on-disk cache of analysis results
+
+An entry is keyed by a SHA-256 digest of the input data bytes (the file
+contents for a path, so a hit needs no parsing), the analysis class, its
+parameters and the dgNova version. Each entry is a directory holding the
+arrays of the result as .npy files, large ones memory-mapped on load,
+and the remaining structure pickled with the arrays replaced by
+references. The cache is bounded in size; the least recently used
+entries are evicted first.
+
+The cache is opt-in: nothing is written unless `cached_analysis` (or a
+`ResultCache`) is used.
+"""
+import os
+import re
+import time
+import shutil
+import pickle
+import hashlib
+import tempfile
+import warnings
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+# Arrays at least this large are memory-mapped when an entry is loaded
+MMAP_BYTES = 1 << 20
+# Default upper bound of the cache size
+MAX_BYTES = 1 << 30
+# Read size when hashing files
+_BLOCK = 1 << 22
+# Returned by ResultCache.get on a miss when no default is given
+_MISSING = object()
+# Entry directories are named by their SHA-256 key
+_KEY = re.compile(r'[0-9a-f]{64}')
+
+class _ArrayRef:
+    """Placeholder for an array stored next to the pickled structure"""
+
+    def __init__(self, index: int):
+        self.index = index
+
+def _version() -> str:
+    from .. import __version__
+    return __version__
+
+def _update(hasher, value: Any) -> None:
+    """Feed a canonical byte representation of `value` to the hasher"""
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        hasher.update(f"ndarray{array.dtype.str}{array.shape}".encode())
+        hasher.update(array.view(np.uint8).reshape(-1) if array.dtype != object
+                      else pickle.dumps(array.tolist()))
+    elif isinstance(value, pd.DataFrame):
+        hasher.update(f"frame{list(value.columns)}{list(value.dtypes.astype(str))}".encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        hasher.update(f"series{value.name}{value.dtype}".encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, dict):
+        hasher.update(b"dict")
+        for key in sorted(value, key=repr):
+            _update(hasher, key)
+            _update(hasher, value[key])
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update(hasher, item)
+    else:
+        hasher.update(f"{type(value).__name__}:{value!r}".encode())
+
+def _update_file(hasher, path: str) -> None:
+    hasher.update(b"file")
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(_BLOCK), b''):
+            hasher.update(block)
+
+def cache_key(data: Any,
+              analysis: str,
+              params: Optional[Dict[str, Any]] = None,
+              version: Optional[str] = None) -> str:
+    """
+    Content digest identifying an analysis result
+
+    Parameters
+    ----------
+    data : Any
+        Input data: a file path (its bytes are hashed), array, DataFrame
+        or nested containers of these
+    analysis : str
+        Qualified name of the analysis (class and method)
+    params : Dict[str, Any], optional
+        Parameters of the analysis
+    version : str, optional
+        Package version (default: the installed dgNova version)
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 digest
+    """
+    hasher = hashlib.sha256()
+    _update(hasher, version or _version())
+    _update(hasher, analysis)
+    if isinstance(data, (str, os.PathLike)) and os.path.isfile(data):
+        _update_file(hasher, os.fspath(data))
+    else:
+        _update(hasher, data)
+    _update(hasher, params or {})
+    return hasher.hexdigest()
+
+def _split(value: Any, arrays: List[np.ndarray]) -> Any:
+    """Replace numeric arrays in nested dicts, lists and tuples by references"""
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        arrays.append(value)
+        return _ArrayRef(len(arrays) - 1)
+    if type(value) is dict:
+        return {k: _split(v, arrays) for k, v in value.items()}
+    if type(value) in (list, tuple):
+        return type(value)(_split(v, arrays) for v in value)
+    return value
+
+def _join(value: Any, arrays: List[np.ndarray]) -> Any:
+    if isinstance(value, _ArrayRef):
+        return arrays[value.index]
+    if type(value) is dict:
+        return {k: _join(v, arrays) for k, v in value.items()}
+    if type(value) in (list, tuple):
+        return type(value)(_join(v, arrays) for v in value)
+    return value
+
+def _entry_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of analysis results on disk
+
+    Arrays of a cached result that are at least `mmap_bytes` large are
+    returned as read-only memory maps. Only entry directories (a hex key
+    holding result.pkl) are ever listed, evicted or cleared, so other
+    files in the directory are left alone.
+    """
+
+    def __init__(self,
+                 directory: Optional[str] = None,
+                 max_bytes: int = MAX_BYTES,
+                 mmap_bytes: int = MMAP_BYTES):
+        """
+        Parameters
+        ----------
+        directory : str, optional
+            Cache directory (default: $DGNOVA_CACHE_DIR/results or
+            ~/.cache/dgNova/results)
+        max_bytes : int
+            Size limit; least recently used entries are evicted above it
+        mmap_bytes : int
+            Arrays at least this large are memory-mapped on load
+        """
+        if directory is None:
+            directory = os.path.join(os.environ.get(
+                'DGNOVA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'dgNova')
+            ), 'results')
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.mmap_bytes = mmap_bytes
+
+    def _path(self, key: str) -> str:
+        if not _KEY.fullmatch(key):
+            raise ValueError(f"Invalid cache key: {key!r}")
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key: str) -> bool:
+        return bool(_KEY.fullmatch(key)) and \
+            os.path.isfile(os.path.join(self._path(key), 'result.pkl'))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Cached result for `key` (marked as recently used), or `default`"""
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, 'result.pkl'), 'rb') as handle:
+                record = pickle.load(handle)
+            arrays = []
+            for index in range(record['arrays']):
+                file = os.path.join(path, f"{index}.npy")
+                mmap = 'r' if os.path.getsize(file) >= self.mmap_bytes else None
+                arrays.append(np.load(file, mmap_mode=mmap, allow_pickle=False))
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return default
+        os.utime(path)
+        return _join(record['result'], arrays)
+
+    def put(self, key: str, result: Any, analysis: str = '') -> None:
+        """Store a result under `key`, then evict entries above the size limit"""
+        arrays = []
+        structure = _split(result, arrays)
+        os.makedirs(self.directory, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.tmp-', dir=self.directory)
+        try:
+            for index, array in enumerate(arrays):
+                np.save(os.path.join(staging, f"{index}.npy"), array, allow_pickle=False)
+            record = {'result': structure, 'arrays': len(arrays), 'analysis': analysis,
+                      'version': _version(), 'created': time.time()}
+            with open(os.path.join(staging, 'result.pkl'), 'wb') as handle:
+                pickle.dump(record, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            # Publish atomically; a concurrent writer of the same key wins
+            try:
+                os.rename(staging, self._path(key))
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.evict()
+
+    def entries(self) -> pd.DataFrame:
+        """Cached entries with analysis, size and last use, most recent first"""
+        rows = []
+        for path, last_used in self._scan():
+            try:
+                with open(os.path.join(path, 'result.pkl'), 'rb') as handle:
+                    record = pickle.load(handle)
+                rows.append({
+                    'key': os.path.basename(path),
+                    'analysis': record.get('analysis', ''),
+                    'version': record.get('version'),
+                    'bytes': _entry_size(path),
+                    'created': pd.Timestamp(record.get('created', 0), unit='s'),
+                    'last_used': pd.Timestamp(last_used, unit='s')
+                })
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue
+        columns = ['key', 'analysis', 'version', 'bytes', 'created', 'last_used']
+        frame = pd.DataFrame(rows, columns=columns)
+        return frame.sort_values('last_used', ascending=False, ignore_index=True)
+
+    def info(self) -> Dict:
+        """Directory, number of entries, total size and size limit"""
+        sizes = [_entry_size(path) for path, _ in self._scan()]
+        return {
+            'directory': self.directory,
+            'entries': len(sizes),
+            'bytes': int(sum(sizes)),
+            'max_bytes': self.max_bytes
+        }
+
+    def _scan(self) -> List[tuple]:
+        """(path, last use) of every cache entry"""
+        if not os.path.isdir(self.directory):
+            return []
+        return [(entry.path, entry.stat().st_mtime) for entry in os.scandir(self.directory)
+                if _KEY.fullmatch(entry.name) and entry.is_dir()
+                and os.path.isfile(os.path.join(entry.path, 'result.pkl'))]
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Remove least recently used entries until the cache fits in
+        `max_bytes` (default: the cache limit); returns the number removed
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._scan(), key=lambda item: item[1])
+        sizes = [_entry_size(path) for path, _ in entries]
+        total = sum(sizes)
+        removed = 0
+        for (path, _), size in zip(entries, sizes):
+            if total <= limit:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self, key: Optional[str] = None) -> None:
+        """
+        Remove one entry, or every entry when `key` is None; the
+        directory itself and anything else in it are kept
+        """
+        if key is not None:
+            if key in self:
+                shutil.rmtree(self._path(key), ignore_errors=True)
+            return
+        for path, _ in self._scan():
+            shutil.rmtree(path, ignore_errors=True)
+
+def cached_analysis(design: type,
+                    data: Any,
+                    *args,
+                    method: str = 'analyze',
+                    method_args: Optional[Dict[str, Any]] = None,
+                    cache: Optional[ResultCache] = None,
+                    **kwargs) -> Any:
+    """
+    Run `design(data, *args, **kwargs).<method>(**method_args)` through
+    the result cache
+
+    On a hit the stored result is returned without reading the data file
+    or constructing the analysis object.
+
+    Parameters
+    ----------
+    design : type
+        Analysis class (UNREP, DIALLEL, Lattice, RCBD, ...)
+    data : Any
+        Data passed to the class (file path, array or DataFrame)
+    *args, **kwargs
+        Further constructor arguments
+    method : str
+        Method producing the result
+    method_args : Dict[str, Any], optional
+        Keyword arguments of the method
+    cache : ResultCache, optional
+        Cache to use (default: a ResultCache in the default directory)
+
+    Returns
+    -------
+    Any
+        The analysis result
+    """
+    cache = cache or ResultCache()
+    method_args = method_args or {}
+    analysis = f"{design.__module__}.{design.__qualname__}.{method}"
+    key = cache_key(data, analysis,
+                    {'args': list(args), 'kwargs': kwargs, 'method_args': method_args})
+    result = cache.get(key, _MISSING)
+    if result is _MISSING:
+        result = getattr(design(data, *args, **kwargs), method)(**method_args)
+        try:
+            cache.put(key, result, analysis)
+        except (pickle.PicklingError, TypeError, AttributeError) as error:
+            warnings.warn(f"Result of {analysis} was not cached: {error}")
+    return result
@@ -1,66 +1,415 @@
 import numpy as np
 from scipy import stats
 from typing import Dict, Optional, Union, List
-import matplotlib.pyplot as plt
-import seaborn as sns
+from .._lazy import lazy_import
+from .critical_values import q_critical
+from .letters import compact_letter_display
+from .pairwise import PairwiseComparisons, pair_index
+from .diagnostics import diagnostic_figure
+from .permutation import permutation_anova
+from .missing import estimate_missing
+
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
+
+def _mean_se(mse: float, n_reps: Union[int, np.ndarray], n: int) -> Union[float, np.ndarray]:
+    """
+    Standard error of a treatment mean for a common replication, or the
+    Tukey–Kramer standard errors of all pairs (condensed) for
+    per-treatment replications
+    """
+    n_reps = np.asarray(n_reps, dtype=float)
+    if n_reps.ndim == 0:
+        return np.sqrt(mse / n_reps)
+    first, second = pair_index(n)
+    return np.sqrt(mse / 2 * (1 / n_reps[first] + 1 / n_reps[second]))
 
 class Statistics:
     """Core statistical functions for experimental analysis"""
     
     @staticmethod
-    def calculate_anova_crd(data: np.ndarray, 
-                           treatments: int, 
-                           replications: int) -> Dict:
+    def anova(values: np.ndarray,
+              factors: Dict[str, np.ndarray],
+              terms: List[str],
+              tests: Optional[Dict[str, str]] = None,
+              labels: Optional[Dict[str, str]] = None,
+              error_label: str = 'Error') -> Dict:
         """
-        Calculate ANOVA for Completely Randomized Design.
+        ANOVA for crossed and nested factor structures.
+        
+        Every term is a factor ('Block') or a combination of factors
+        ('Block:Main'). Its sum of squares is the between-cell sum of
+        squares of its factor combination, computed from bincount group
+        sums, minus the sums of squares of all listed terms whose factors
+        it contains. A combination listed without one of its main effects
+        is therefore nested: 'Rep:Block' without 'Block' is blocks within
+        replications. The residual is the error term.
+        
+        Several traits are analyzed at once when values carries leading
+        trait axes in front of the factor shape; group sums of all traits
+        then come from a single bincount and p-values from a single
+        `stats.f.sf` call.
         
         Parameters
         ----------
-        data : np.ndarray
-            Data matrix (replications × treatments)
-        treatments : int
-            Number of treatments
-        replications : int
-            Number of replications
+        values : np.ndarray
+            Observations with the shape of the factors, or stacked traits
+            of shape (traits, *factor shape)
+        factors : Dict[str, np.ndarray]
+            Factor levels or integer codes of every observation
+        terms : List[str]
+            Model terms in table order
+        tests : Dict[str, str], optional
+            Denominator term for terms not tested against the error
+        labels : Dict[str, str], optional
+            Display names of terms in the table
+        error_label : str
+            Display name of the residual term
+            
+        Returns
+        -------
+        Dict
+            ANOVA table components. For stacked traits 'ss', 'ms',
+            'f_value' and 'p_value' are arrays of shape (sources, traits)
+            with NaN where a value does not apply; use `trait_anova` for
+            the table of a single trait.
+        """
+        values = np.asarray(values, dtype=float)
+        codes = {}
+        shape = None
+        for name, levels in factors.items():
+            levels = np.asarray(levels)
+            shape = levels.shape if shape is None else shape
+            if levels.shape != shape:
+                raise ValueError(f"Factor '{name}' has shape {levels.shape}, expected {shape}")
+            uniques, inverse = np.unique(levels.ravel(), return_inverse=True)
+            codes[name] = (inverse.ravel(), len(uniques))
+        
+        shape = values.shape if shape is None else shape
+        n = int(np.prod(shape))
+        batched = (values.ndim > len(shape) and
+                   values.shape[values.ndim - len(shape):] == shape)
+        if not batched and values.size != n:
+            raise ValueError(
+                f"Values of shape {values.shape} do not match factors of shape {shape}"
+            )
+        y = values.reshape(-1, n)  # (traits, observations)
+        n_traits = y.shape[0]
+        
+        cf = np.sum(y, axis=1) ** 2 / n
+        total_ss = np.sum(y ** 2, axis=1) - cf
+        total_df = n - 1
+        
+        # Terms with fewer factors first, so contained terms are available
+        factor_sets = {term: frozenset(term.split(':')) for term in terms}
+        unknown = set().union(*factor_sets.values()) - set(codes)
+        if unknown:
+            raise ValueError(f"Unknown factors in terms: {sorted(unknown)}")
+        
+        offsets = np.arange(n_traits)[:, None]
+        ss, df = {}, {}
+        for term in sorted(terms, key=lambda t: len(factor_sets[t])):
+            cell = np.zeros(n, dtype=np.int64)
+            size = 1
+            for name in sorted(factor_sets[term]):
+                inverse, n_levels = codes[name]
+                cell = cell * n_levels + inverse
+                size *= n_levels
+            if size > 4 * n:
+                cell = np.unique(cell, return_inverse=True)[1].ravel()
+                size = int(cell.max()) + 1
+            counts = np.bincount(cell, minlength=size)
+            observed = counts > 0
+            # One bincount over (trait, cell) pairs for all traits
+            sums = np.bincount((offsets * size + cell).ravel(), weights=y.ravel(),
+                               minlength=n_traits * size).reshape(n_traits, size)
+            
+            contained = [other for other in ss if factor_sets[other] < factor_sets[term]]
+            ss[term] = (np.sum(sums[:, observed] ** 2 / counts[observed], axis=1) - cf -
+                        sum(ss[other] for other in contained))
+            df[term] = int(np.sum(observed)) - 1 - sum(df[other] for other in contained)
+        
+        error_ss = total_ss - sum(ss.values())
+        error_df = total_df - sum(df.values())
+        labels = labels or {}
+        table = Statistics._anova_table(
+            [labels.get(t, t) for t in terms],
+            [ss[t] for t in terms], [df[t] for t in terms],
+            error_ss, error_df, total_ss, total_df,
+            tests={labels.get(t, t): labels.get(d, d) for t, d in (tests or {}).items()},
+            error_label=error_label,
+            batched=batched
+        )
+        if batched:
+            table['traits'] = values.shape[:values.ndim - len(shape)]
+        return table
+
+    @staticmethod
+    def anova_missing(values: np.ndarray,
+                      factors: Dict[str, np.ndarray],
+                      terms: List[str],
+                      adjust: str = 'Treatment',
+                      tol: float = 1e-10,
+                      max_iter: int = 1000) -> Dict:
+        """
+        Main-effects ANOVA of a complete design with missing plots.
+        
+        Missing cells (NaN) are replaced by their least-squares estimates
+        (see `dgNova.core.missing.estimate_missing`) and the table is
+        computed from the completed data, with one degree of freedom
+        removed from the error and total for every estimated plot. The
+        sum of squares of `adjust` is corrected for the upward bias of
+        the completed data: it is the rise in residual sum of squares when
+        the term is dropped and the plots are re-estimated without it.
+        
+        Parameters
+        ----------
+        values : np.ndarray
+            Observations, NaN where a plot is missing
+        factors : Dict[str, np.ndarray]
+            Factor levels or integer codes of every observation
+        terms : List[str]
+            Main-effect terms in table order
+        adjust : str
+            Term whose sum of squares is bias corrected
+        tol : float
+            Relative convergence tolerance of the estimates
+        max_iter : int
+            Maximum number of estimation sweeps
+            
+        Returns
+        -------
+        Dict
+            ANOVA table components
+        """
+        values = np.asarray(values, dtype=float)
+        full = estimate_missing(values, factors, tol=tol, max_iter=max_iter)
+        table = Statistics.anova(full['data'], factors, terms)
+        count = full['count']
+        
+        ss = table['ss'][:len(terms)]
+        df = table['df'][:len(terms)]
+        error_ss = full['residual_ss']
+        error_df = table['df'][-1] - sum(df) - count
+        if adjust in terms and count:
+            reduced = {name: levels for name, levels in factors.items() if name != adjust}
+            dropped = estimate_missing(values, reduced, tol=tol, max_iter=max_iter)
+            ss[terms.index(adjust)] = dropped['residual_ss'] - error_ss
+        
+        observed = values[~full['missing']]
+        total_ss = float(np.sum((observed - observed.mean()) ** 2))
+        return Statistics._anova_table(terms, ss, df, error_ss, error_df,
+                                       total_ss, observed.size - 1)
+
+    @staticmethod
+    def trait_anova(anova: Dict, trait: Union[int, tuple]) -> Dict:
+        """
+        ANOVA table of a single trait from a stacked-traits table.
+        
+        Parameters
+        ----------
+        anova : Dict
+            Table returned for stacked traits
+        trait : int or tuple
+            Index of the trait (tuple for several trait axes)
+            
+        Returns
+        -------
+        Dict
+            ANOVA table components as lists
+        """
+        index = np.ravel_multi_index(np.atleast_1d(trait), anova['traits'])
+        index = int(np.ravel(index)[0])
+        
+        def column(key):
+            return [None if np.isnan(v) else float(v) for v in anova[key][:, index]]
+        
+        return {
+            'source': list(anova['source']),
+            'df': list(anova['df']),
+            'ss': column('ss'),
+            'ms': column('ms'),
+            'f_value': column('f_value'),
+            'p_value': column('p_value')
+        }
+
+    @staticmethod
+    def anova_intrablock(values: np.ndarray,
+                         rep: np.ndarray,
+                         block: np.ndarray,
+                         treatment: np.ndarray,
+                         labels: Optional[Dict[str, str]] = None,
+                         error_label: str = 'Intrablock Error') -> Dict:
+        """
+        Intrablock ANOVA for incomplete block designs (lattices).
+        
+        Replications and unadjusted treatments come from group sums as in
+        `anova`. The intrablock error is the residual after absorbing
+        blocks and fitting treatments through the reduced normal equations
+        C τ = Q, with C = R - N K⁻¹ N' and Q = T - N K⁻¹ B built from
+        bincount incidence counts; blocks within replications are adjusted
+        for treatments.
+        
+        Parameters
+        ----------
+        values : np.ndarray
+            Observations
+        rep, block, treatment : np.ndarray
+            Replication, block (within replication) and treatment of every
+            observation
+        labels : Dict[str, str], optional
+            Display names for 'Rep', 'Treatment' and 'Rep:Block'
+        error_label : str
+            Display name of the intrablock error
             
         Returns
         -------
         Dict
             ANOVA table components
         """
-        total = np.sum(data)
-        cf = total ** 2 / (treatments * replications)
+        y = np.asarray(values, dtype=float).ravel()
+        rep = np.asarray(rep).ravel()
+        block = np.asarray(block).ravel()
+        treatment = np.asarray(treatment).ravel()
+        unadjusted = Statistics.anova(y, {'Rep': rep, 'Block': block, 'Treatment': treatment},
+                                      ['Rep', 'Treatment', 'Rep:Block'])
+        rep_ss, trt_ss = unadjusted['ss'][:2]
+        rep_df, trt_df = unadjusted['df'][:2]
+        total_ss, total_df = unadjusted['ss'][-1], unadjusted['df'][-1]
         
-        # Total SS
-        total_ss = np.sum(data ** 2) - cf
-        total_df = treatments * replications - 1
+        # Block ids (unique rep × block) and treatment codes
+        block_id = np.unique(np.stack([rep, block]), axis=1, return_inverse=True)[1].ravel()
+        trt = np.unique(treatment, return_inverse=True)[1].ravel()
+        nb, nt = block_id.max() + 1, trt.max() + 1
         
-        # Treatment SS
-        treatment_means = np.mean(data, axis=0)
-        treatment_ss = replications * np.sum(treatment_means ** 2) - cf
-        treatment_df = treatments - 1
+        k = np.bincount(block_id, minlength=nb)
+        r = np.bincount(trt, minlength=nt)
+        block_totals = np.bincount(block_id, weights=y, minlength=nb)
+        trt_totals = np.bincount(trt, weights=y, minlength=nt)
+        incidence = np.bincount(block_id * nt + trt, minlength=nb * nt).reshape(nb, nt)
         
-        # Error SS
-        error_ss = total_ss - treatment_ss
-        error_df = total_df - treatment_df
+        c_matrix = np.diag(r.astype(float)) - incidence.T @ (incidence / k[:, None])
+        q = trt_totals - incidence.T @ (block_totals / k)
+        tau = np.linalg.lstsq(c_matrix, q, rcond=None)[0]
+        trt_adj_ss = float(tau @ q)
+        rank = np.linalg.matrix_rank(c_matrix)
         
-        # Mean squares
-        treatment_ms = treatment_ss / treatment_df
-        error_ms = error_ss / error_df
+        error_ss = float(np.sum(y ** 2) - np.sum(block_totals ** 2 / k)) - trt_adj_ss
+        error_df = y.size - nb - rank
+        block_ss = total_ss - rep_ss - trt_ss - error_ss
+        block_df = total_df - rep_df - trt_df - error_df
         
-        # F value and p-value
-        f_value = treatment_ms / error_ms
-        p_value = 1 - stats.f.cdf(f_value, treatment_df, error_df)
+        labels = {'Rep': 'Replications', 'Treatment': 'Treatments (Unadj.)',
+                  'Rep:Block': 'Blocks within Reps (Adj.)', **(labels or {})}
+        return Statistics._anova_table(
+            [labels['Rep'], labels['Treatment'], labels['Rep:Block']],
+            [rep_ss, trt_ss, block_ss], [rep_df, trt_df, block_df],
+            error_ss, error_df, total_ss, total_df,
+            error_label=error_label
+        )
+
+    @staticmethod
+    def _anova_table(sources: List[str],
+                     ss: List[Union[float, np.ndarray]],
+                     df: List[int],
+                     error_ss: Union[float, np.ndarray],
+                     error_df: int,
+                     total_ss: Union[float, np.ndarray],
+                     total_df: int,
+                     tests: Optional[Dict[str, str]] = None,
+                     error_label: str = 'Error',
+                     batched: bool = False) -> Dict:
+        """
+        Assemble mean squares, F and p-values into an ANOVA table.
+        
+        Sums of squares may be scalars or per-trait arrays; all F tests
+        are evaluated in one `stats.f.sf` call. Batched tables keep
+        (sources, traits) arrays, single tables are returned as lists.
+        """
+        tests = tests or {}
+        rows = len(sources)
+        term_ss = np.array([np.ravel(v) for v in ss], dtype=float).reshape(rows, -1)
+        error_ss = np.ravel(np.asarray(error_ss, dtype=float))
+        total_ss = np.ravel(np.asarray(total_ss, dtype=float))
+        term_df = np.asarray(df, dtype=float)[:, None]
+        index = {source: i for i, source in enumerate(sources)}
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            term_ms = term_ss / term_df
+            error_ms = error_ss / error_df if error_df > 0 else np.full_like(error_ss, np.nan)
+            den_ms = np.array([term_ms[index[tests[s]]] if s in tests else error_ms
+                               for s in sources])
+            den_df = np.array([df[index[tests[s]]] if s in tests else error_df
+                               for s in sources], dtype=float)[:, None]
+            f_values = term_ms / den_ms
+        untested = ~np.isfinite(f_values) | (den_df <= 0)
+        f_values[untested] = np.nan
+        p_values = stats.f.sf(f_values, term_df, den_df)
+        
+        has_error = error_df > 0
+        nan = np.full_like(total_ss, np.nan)
+        sources = list(sources) + ([error_label] if has_error else []) + ['Total']
+        df = [int(d) for d in df] + ([int(error_df)] if has_error else []) + [int(total_df)]
+        extra = [error_ss] if has_error else []
+        ss_rows = np.vstack([term_ss, *extra, total_ss])
+        ms_rows = np.vstack([term_ms, *([error_ms] if has_error else []), nan])
+        blank = [nan] * (len(extra) + 1)
+        f_rows = np.vstack([f_values, *blank])
+        p_rows = np.vstack([p_values, *blank])
+        
+        if batched:
+            return {'source': sources, 'df': df, 'ss': ss_rows, 'ms': ms_rows,
+                    'f_value': f_rows, 'p_value': p_rows}
+        
+        def column(rows):
+            return [None if np.isnan(v) else float(v) for v in rows[:, 0]]
         
         return {
-            'source': ['Treatment', 'Error', 'Total'],
-            'df': [treatment_df, error_df, total_df],
-            'ss': [treatment_ss, error_ss, total_ss],
-            'ms': [treatment_ms, error_ms, None],
-            'f_value': [f_value, None, None],
-            'p_value': [p_value, None, None]
+            'source': sources,
+            'df': df,
+            'ss': [float(v) for v in ss_rows[:, 0]],
+            'ms': column(ms_rows),
+            'f_value': column(f_rows),
+            'p_value': column(p_rows)
         }
 
+    @staticmethod
+    def calculate_anova_crd(data: np.ndarray, 
+                           treatments: int, 
+                           replications: int) -> Dict:
+        """
+        Calculate ANOVA for Completely Randomized Design.
+        
+        Parameters
+        ----------
+        data : np.ndarray
+            Data matrix (replications × treatments) or stacked traits
+            (traits × replications × treatments); NaN plots of a single
+            matrix are left out, giving unequal replication
+        treatments : int
+            Number of treatments
+        replications : int
+            Number of replications
+            
+        Returns
+        -------
+        Dict
+            ANOVA table components (per-trait arrays for stacked traits,
+            see `anova`)
+        """
+        data = np.asarray(data, dtype=float)
+        _, treatment = np.indices((replications, treatments))
+        observed = ~np.isnan(data)
+        if observed.all():
+            return Statistics.anova(data, {'Treatment': treatment}, ['Treatment'])
+        if data.ndim != 2:
+            raise ValueError("Missing plots are only supported for a single data matrix")
+        empty = np.flatnonzero(~observed.any(axis=0))
+        if empty.size:
+            raise ValueError(f"No observations for treatments {list(empty + 1)}")
+        return Statistics.anova(data[observed], {'Treatment': treatment[observed]},
+                                ['Treatment'])
+
     @staticmethod
     def calculate_anova_rcbd(data: np.ndarray, 
                             treatments: int, 
@@ -71,7 +420,9 @@ class Statistics:
         Parameters
         ----------
         data : np.ndarray
-            Data matrix (blocks × treatments)
+            Data matrix (blocks × treatments) or stacked traits
+            (traits × blocks × treatments); NaN plots of a single matrix
+            are estimated (see `anova_missing`)
         treatments : int
             Number of treatments
         blocks : int
@@ -80,45 +431,217 @@ class Statistics:
         Returns
         -------
         Dict
-            ANOVA table components
+            ANOVA table components (per-trait arrays for stacked traits,
+            see `anova`)
         """
-        total = np.sum(data)
-        cf = total ** 2 / (treatments * blocks)
+        data = np.asarray(data, dtype=float)
+        block, treatment = np.indices((blocks, treatments))
+        factors = {'Block': block, 'Treatment': treatment}
+        if data.ndim == 2 and np.isnan(data).any():
+            return Statistics.anova_missing(data, factors, ['Block', 'Treatment'])
+        return Statistics.anova(data, factors, ['Block', 'Treatment'])
+
+    @staticmethod
+    def calculate_anova(data: np.ndarray,
+                        treatments: int,
+                        replications: int) -> Dict:
+        """
+        Calculate ANOVA for a replications × treatments matrix, with
+        replications as blocks (see calculate_anova_rcbd).
+        """
+        return Statistics.calculate_anova_rcbd(data, treatments, replications)
+
+    @staticmethod
+    def permutation_test_crd(data: np.ndarray,
+                             permutations: int = 9999,
+                             seed: Optional[int] = None,
+                             chunk_size: Optional[int] = None,
+                             n_jobs: int = 1) -> Dict:
+        """
+        Permutation F-test for treatments in a CRD, relabelling all plots.
         
-        # Total SS
-        total_ss = np.sum(data ** 2) - cf
-        total_df = treatments * blocks - 1
+        Parameters
+        ----------
+        data : np.ndarray
+            Data matrix (replications × treatments)
+        permutations : int
+            Number of random relabellings
+        seed : int, optional
+            Random seed
+        chunk_size : int, optional
+            Permutations evaluated per vectorized batch
+        n_jobs : int
+            Worker processes (-1 uses all cores)
+            
+        Returns
+        -------
+        Dict
+            F value with permutation and parametric p-values (see
+            `dgNova.core.permutation.permutation_anova`)
+        """
+        return permutation_anova(data, permutations=permutations, seed=seed,
+                                 chunk_size=chunk_size, n_jobs=n_jobs)
+
+    @staticmethod
+    def permutation_test_rcbd(data: np.ndarray,
+                              permutations: int = 9999,
+                              seed: Optional[int] = None,
+                              chunk_size: Optional[int] = None,
+                              n_jobs: int = 1) -> Dict:
+        """
+        Permutation F-test for treatments in an RCBD, relabelling
+        treatments within each block.
+        
+        Parameters
+        ----------
+        data : np.ndarray
+            Data matrix (blocks × treatments)
+        permutations : int
+            Number of random relabellings
+        seed : int, optional
+            Random seed
+        chunk_size : int, optional
+            Permutations evaluated per vectorized batch
+        n_jobs : int
+            Worker processes (-1 uses all cores)
+            
+        Returns
+        -------
+        Dict
+            F value with permutation and parametric p-values (see
+            `dgNova.core.permutation.permutation_anova`)
+        """
+        return permutation_anova(data, blocked=True, permutations=permutations, seed=seed,
+                                 chunk_size=chunk_size, n_jobs=n_jobs)
+
+    @staticmethod
+    def calculate_anova_latin_square(data: np.ndarray,
+                                     treatments: int,
+                                     layout: Optional[np.ndarray] = None) -> Dict:
+        """
+        Calculate ANOVA for Latin Square Design.
         
-        # Block SS
-        block_means = np.mean(data, axis=1)
-        block_ss = treatments * np.sum(block_means ** 2) - cf
-        block_df = blocks - 1
+        Parameters
+        ----------
+        data : np.ndarray
+            Data matrix (rows × columns); NaN plots are estimated (see
+            `anova_missing`)
+        treatments : int
+            Number of treatments
+        layout : np.ndarray, optional
+            Treatment index (0-based) of every plot; defaults to the
+            cyclic square (row + column) mod treatments
+            
+        Returns
+        -------
+        Dict
+            ANOVA table components
+        """
+        data = np.asarray(data, dtype=float).reshape(treatments, treatments)
+        row, column = np.indices(data.shape)
+        if layout is None:
+            layout = (row + column) % treatments
+        factors = {'Row': row, 'Column': column, 'Treatment': layout}
+        if np.isnan(data).any():
+            return Statistics.anova_missing(data, factors, ['Row', 'Column', 'Treatment'])
+        return Statistics.anova(data, factors, ['Row', 'Column', 'Treatment'])
+
+    @staticmethod
+    def calculate_anova_split_plot(data: np.ndarray,
+                                   main_treatments: int,
+                                   sub_treatments: int,
+                                   blocks: int) -> Dict:
+        """
+        Calculate ANOVA for Split-plot Design.
         
-        # Treatment SS
-        treatment_means = np.mean(data, axis=0)
-        treatment_ss = blocks * np.sum(treatment_means ** 2) - cf
-        treatment_df = treatments - 1
+        Blocks and main plots are tested against the main plot error
+        (blocks × main plots), subplots and the interaction against the
+        subplot error.
         
-        # Error SS
-        error_ss = total_ss - block_ss - treatment_ss
-        error_df = total_df - block_df - treatment_df
+        Parameters
+        ----------
+        data : np.ndarray
+            Data array (blocks × main plots × subplots)
+        main_treatments : int
+            Number of main plot treatments
+        sub_treatments : int
+            Number of subplot treatments
+        blocks : int
+            Number of blocks
+            
+        Returns
+        -------
+        Dict
+            ANOVA table components
+        """
+        data = np.asarray(data, dtype=float).reshape(blocks, main_treatments, sub_treatments)
+        block, main, sub = np.indices(data.shape)
+        return Statistics.anova(
+            data,
+            {'Block': block, 'Main': main, 'Sub': sub},
+            ['Block', 'Main', 'Block:Main', 'Sub', 'Main:Sub'],
+            tests={'Block': 'Block:Main', 'Main': 'Block:Main'},
+            labels={'Main': 'Main plot', 'Block:Main': 'Error(a)',
+                    'Sub': 'Subplot', 'Main:Sub': 'Main × Subplot'},
+            error_label='Error(b)'
+        )
+
+    @staticmethod
+    def calculate_cv(data: np.ndarray, error_ms: float) -> float:
+        """Coefficient of variation (%) from the error mean square (NaN plots ignored)."""
+        return float(np.sqrt(error_ms) / np.nanmean(data) * 100)
+
+    @staticmethod
+    def error_term(anova: Dict, label: str = 'Error') -> tuple:
+        """Mean square and degrees of freedom of the error row of an ANOVA table."""
+        index = anova['source'].index(label)
+        return anova['ms'][index], anova['df'][index]
+
+    @staticmethod
+    def tukey_test(means: np.ndarray,
+                   mse: float,
+                   df_error: int,
+                   n_reps: int,
+                   alpha: float = 0.05) -> Dict:
+        """
+        Perform Tukey's HSD test.
         
-        # Mean squares
-        block_ms = block_ss / block_df
-        treatment_ms = treatment_ss / treatment_df
-        error_ms = error_ss / error_df
+        Parameters
+        ----------
+        means : np.ndarray
+            Treatment means
+        mse : float
+            Mean square error from ANOVA
+        df_error : int
+            Error degrees of freedom
+        n_reps : int or np.ndarray
+            Number of replications, or replications of every treatment
+        alpha : float
+            Significance level
+            
+        Returns
+        -------
+        Dict
+            HSD, pairwise comparisons and letter groups
+        """
+        means = np.asarray(means, dtype=float)
+        n = len(means)
+        q = q_critical(n, df_error, alpha)
+        se = _mean_se(mse, n_reps, n)
+        if not np.all(np.isfinite(se)):
+            raise ValueError("Standard error of the means is not finite; "
+                             "Tukey groups cannot be formed")
+        hsd = q * se
         
-        # F value and p-value for treatments
-        f_value = treatment_ms / error_ms
-        p_value = 1 - stats.f.cdf(f_value, treatment_df, error_df)
+        comparisons = PairwiseComparisons(means, se, q)
+        groups = compact_letter_display(comparisons.square(), means)
         
         return {
-            'source': ['Block', 'Treatment', 'Error', 'Total'],
-            'df': [block_df, treatment_df, error_df, total_df],
-            'ss': [block_ss, treatment_ss, error_ss, total_ss],
-            'ms': [block_ms, treatment_ms, error_ms, None],
-            'f_value': [None, f_value, None, None],
-            'p_value': [None, p_value, None, None]
+            'means': means,
+            'groups': groups,
+            'comparisons': comparisons,
+            'hsd': hsd,
+            'q': q
         }
 
     @staticmethod
@@ -138,8 +661,8 @@ class Statistics:
             Mean square error from ANOVA
         df_error : int
             Error degrees of freedom
-        n_reps : int
-            Number of replications
+        n_reps : int or np.ndarray
+            Number of replications, or replications of every treatment
         alpha : float
             Significance level
             
@@ -148,87 +671,327 @@ class Statistics:
         Dict
             DMRT results including critical ranges
         """
+        means = np.asarray(means, dtype=float)
         n = len(means)
-        se = np.sqrt(mse / n_reps)
-        
-        # Get critical values from studentized range table
-        ranges = []
-        for p in range(2, n + 1):
-            q = stats.studentized_range.ppf(1 - alpha, p, df_error)
-            ranges.append(q * se)
-        
-        # Sort means and get original indices
-        sorted_indices = np.argsort(-means)  # Descending order
-        sorted_means = means[sorted_indices]
-        
-        # Assign groups
-        groups = [''] * n
-        current_group = 'a'
-        
-        for i in range(n):
-            if i == 0:
-                groups[sorted_indices[i]] = current_group
-                continue
-                
-            # Compare with previous means
-            different = False
-            for j in range(i):
-                diff = sorted_means[j] - sorted_means[i]
-                critical_range = ranges[i - j]
-                
-                if diff > critical_range:
-                    different = True
-                    break
-            
-            if different:
-                current_group = chr(ord(current_group) + 1)
-            groups[sorted_indices[i]] = current_group
+        se = _mean_se(mse, n_reps, n)
+        first, second = pair_index(n)
+        
+        # Critical ranges for p = 2..n means, from the cached q table
+        # (at the harmonic mean replication when replication is unequal)
+        q = q_critical(np.arange(2, n + 1), df_error, alpha)
+        ranges = list(q * (se if np.ndim(se) == 0 else np.sqrt(mse / stats.hmean(n_reps))))
+        
+        # Pairs of sorted means spanning p means are compared with R_p;
+        # a pair inside a non-significant range is not significant
+        order = np.argsort(-means)
+        rank = np.empty(n, dtype=int)
+        rank[order] = np.arange(n)
+        sorted_means = means[order]
+        span = np.arange(n)[None, :] - np.arange(n)[:, None]
+        if np.ndim(se) == 0:
+            threshold = np.asarray(ranges)[np.clip(span - 1, 0, None)]
+        else:
+            pair_se = np.zeros((n, n))
+            pair_se[first, second] = se
+            pair_se += pair_se.T
+            threshold = q[np.clip(span - 1, 0, None)] * pair_se[np.ix_(order, order)]
+        exceeds = np.triu(sorted_means[:, None] - sorted_means[None, :] > threshold, k=1)
+        exceeds = np.logical_and.accumulate(exceeds, axis=0)
+        exceeds = np.logical_and.accumulate(exceeds[:, ::-1], axis=1)[:, ::-1]
+        significant = np.zeros((n, n), dtype=bool)
+        significant[np.ix_(order, order)] = exceeds | exceeds.T
+        
+        comparisons = PairwiseComparisons(
+            means, se, q[np.abs(rank[first] - rank[second]) - 1],
+            significant=significant[first, second]
+        )
+        groups = compact_letter_display(significant, means)
         
         return {
             'means': means,
             'groups': groups,
+            'comparisons': comparisons,
             'ranges': ranges
         }
 
     @staticmethod
-    def check_normality(residuals: np.ndarray) -> Dict:
-        """Test normality of residuals using Shapiro-Wilk test."""
-        stat, p_value = stats.shapiro(residuals)
-        return {'statistic': stat, 'p_value': p_value}
+    def lsd_test(means: np.ndarray,
+                 mse: float,
+                 df_error: int,
+                 n_reps: int,
+                 alpha: float = 0.05) -> Dict:
+        """
+        Perform Fisher's Least Significant Difference test.
+        
+        Parameters
+        ----------
+        means : np.ndarray
+            Treatment means
+        mse : float
+            Mean square error from ANOVA
+        df_error : int
+            Error degrees of freedom
+        n_reps : int or np.ndarray
+            Number of replications, or replications of every treatment
+        alpha : float
+            Significance level
+            
+        Returns
+        -------
+        Dict
+            LSD, critical t, pairwise comparisons and letter groups
+        """
+        means = np.asarray(means, dtype=float)
+        t = stats.t.ppf(1 - alpha / 2, df_error)
+        se = np.sqrt(2) * _mean_se(mse, n_reps, len(means))
+        comparisons = PairwiseComparisons(means, se, t)
+        
+        return {
+            'means': means,
+            'groups': compact_letter_display(comparisons.square(), means),
+            'comparisons': comparisons,
+            'lsd': t * se,
+            't': t
+        }
+
+    # Largest sample for which Shapiro-Wilk p-values are reliable
+    SHAPIRO_MAX_N = 5000
+
+    @staticmethod
+    def check_normality(residuals: np.ndarray, method: str = 'auto') -> Dict:
+        """
+        Test normality of residuals, for one trait or a stack of traits.
+        
+        With method='auto' Shapiro-Wilk is used up to 5000 observations
+        and D'Agostino-Pearson K² (moment based, no sample size limit)
+        above. Anderson-Darling, with p-values from the Stephens (1986)
+        approximation for estimated mean and variance, is available
+        explicitly. NaN residuals are dropped per trait.
+        
+        Parameters
+        ----------
+        residuals : np.ndarray
+            Residuals of shape (n,) or (n, traits...)
+        method : str
+            'auto', 'shapiro', 'dagostino' or 'anderson'
+            
+        Returns
+        -------
+        Dict
+            Test name, statistic, p-value and n (arrays of the trait
+            shape for stacked residuals)
+        """
+        residuals = np.asarray(residuals, dtype=float)
+        traits = residuals.shape[1:]
+        stack = residuals.reshape(residuals.shape[0], -1)
+        n = np.sum(np.isfinite(stack), axis=0)
+        if np.any(n < 3):
+            raise ValueError("At least 3 residuals per trait are required")
+        if method == 'auto':
+            method = 'shapiro' if n.max() <= Statistics.SHAPIRO_MAX_N else 'dagostino'
+        
+        complete = np.all(n == stack.shape[0])
+        columns = range(stack.shape[1])
+        if method == 'shapiro':
+            results = [stats.shapiro(stack[np.isfinite(stack[:, j]), j]) for j in columns]
+            statistic, p_value = (np.array(v, dtype=float) for v in zip(*results))
+        elif method == 'dagostino':
+            if n.min() < 8:
+                raise ValueError("D'Agostino's test requires at least 8 residuals")
+            if complete:
+                statistic, p_value = stats.normaltest(stack, axis=0)
+            else:
+                results = [stats.normaltest(stack[np.isfinite(stack[:, j]), j]) for j in columns]
+                statistic, p_value = (np.array(v, dtype=float) for v in zip(*results))
+        elif method == 'anderson':
+            statistic, p_value = Statistics._anderson_darling(stack)
+        else:
+            raise ValueError(f"Unknown normality test '{method}'")
+        
+        names = {'shapiro': 'Shapiro-Wilk', 'dagostino': "D'Agostino-Pearson",
+                 'anderson': 'Anderson-Darling'}
+        if not traits:
+            return {'test': names[method], 'statistic': float(statistic[0]),
+                    'p_value': float(p_value[0]), 'n': int(n[0])}
+        return {'test': names[method],
+                'statistic': np.asarray(statistic).reshape(traits),
+                'p_value': np.asarray(p_value).reshape(traits),
+                'n': n.reshape(traits)}
 
     @staticmethod
-    def check_homogeneity(groups: List[np.ndarray]) -> Dict:
-        """Test homogeneity of variances using Levene's test."""
-        stat, p_value = stats.levene(*groups)
-        return {'statistic': stat, 'p_value': p_value}
+    def _anderson_darling(stack: np.ndarray) -> tuple:
+        """Anderson-Darling A² and p-value for each column (NaNs sort last)"""
+        n = np.sum(np.isfinite(stack), axis=0)
+        x = np.sort(stack, axis=0)
+        valid = np.arange(x.shape[0])[:, None] < n
+        mean = np.nanmean(stack, axis=0)
+        sd = np.nanstd(stack, axis=0, ddof=1)
+        z = (x - mean) / sd
+        # Pair the i-th smallest with the i-th largest of each column
+        reverse = np.clip(n - 1 - np.arange(x.shape[0])[:, None], 0, None)
+        upper = np.take_along_axis(z, reverse, axis=0)
+        i = np.arange(1, x.shape[0] + 1)[:, None]
+        terms = (2 * i - 1) * (stats.norm.logcdf(z) + stats.norm.logsf(upper))
+        a2 = -n - np.sum(np.where(valid, terms, 0.0), axis=0) / n
+        a2_star = a2 * (1 + 0.75 / n + 2.25 / n**2)
+        with np.errstate(over='ignore'):
+            p_value = np.select(
+                [a2_star < 0.2, a2_star < 0.34, a2_star < 0.6],
+                [1 - np.exp(-13.436 + 101.14 * a2_star - 223.73 * a2_star**2),
+                 1 - np.exp(-8.318 + 42.796 * a2_star - 59.938 * a2_star**2),
+                 np.exp(0.9177 - 4.279 * a2_star - 1.38 * a2_star**2)],
+                # The last branch turns upward far in the tail; p is ~0 there
+                np.where(a2_star < 10, np.exp(1.2937 - 5.709 * a2_star + 0.0186 * a2_star**2), 0.0)
+            )
+        return a2, np.clip(p_value, 0.0, 1.0)
 
     @staticmethod
-    def diagnostic_plots(residuals: np.ndarray, fitted: np.ndarray):
-        """Create diagnostic plots for ANOVA assumptions."""
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 10))
+    def check_homogeneity(values: Union[np.ndarray, List[np.ndarray]],
+                          groups: Optional[np.ndarray] = None,
+                          center: str = 'median') -> Dict:
+        """
+        Test homogeneity of variances with Levene's test.
+        
+        Absolute deviations from the group centers are analysed by a
+        one-way ANOVA built from bincount group sums, for one trait or a
+        stack of traits at once. center='median' gives the Brown-Forsythe
+        variant (robust to non-normality), center='mean' the original
+        Levene test.
         
-        # Q-Q plot
-        stats.probplot(residuals, dist="norm", plot=ax1)
-        ax1.set_title("Normal Q-Q Plot")
+        Parameters
+        ----------
+        values : np.ndarray or List[np.ndarray]
+            Observations of shape (n,) or (n, traits...), or a list of
+            group arrays (one trait)
+        groups : np.ndarray, optional
+            Group code or label of every observation (required unless
+            values is a list of groups)
+        center : str
+            'median' (Brown-Forsythe) or 'mean' (Levene)
+            
+        Returns
+        -------
+        Dict
+            Test name, statistic, p-value and degrees of freedom
+        """
+        if groups is None:
+            if not isinstance(values, (list, tuple)):
+                raise ValueError("groups is required unless values is a list of groups")
+            groups = np.repeat(np.arange(len(values)), [len(v) for v in values])
+            values = np.concatenate([np.asarray(v, dtype=float) for v in values])
+        values = np.asarray(values, dtype=float)
+        traits = values.shape[1:]
+        y = values.reshape(values.shape[0], -1)
+        codes = np.unique(np.asarray(groups).ravel(), return_inverse=True)[1].ravel()
+        if codes.size != y.shape[0]:
+            raise ValueError(f"{codes.size} group codes for {y.shape[0]} observations")
+        k, n, m = codes.max() + 1, y.shape[0], y.shape[1]
+        counts = np.bincount(codes, minlength=k)
+        if k < 2 or np.any(counts < 2):
+            raise ValueError("At least 2 groups of 2 observations are required")
+        
+        # Group sums of all traits at once: one bincount over (trait, group)
+        cell = (np.arange(m)[None, :] * k + codes[:, None]).ravel()
+        def group_sums(x):
+            return np.bincount(cell, weights=x.ravel(), minlength=m * k).reshape(m, k).T
         
-        # Residuals vs Fitted
-        ax2.scatter(fitted, residuals)
-        ax2.axhline(y=0, color='r', linestyle='--')
-        ax2.set_xlabel("Fitted values")
-        ax2.set_ylabel("Residuals")
-        ax2.set_title("Residuals vs Fitted")
+        if center == 'mean':
+            centers = group_sums(y) / counts[:, None]
+        elif center == 'median':
+            # Sort within groups for every trait at once: offset each group
+            # by more than the data range, then read the middle positions
+            span = np.ptp(y, axis=0) + 1.0
+            order = np.argsort(codes[:, None] * span + (y - y.min(axis=0)), axis=0, kind='stable')
+            ranked = np.take_along_axis(y, order, axis=0)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            lower = ranked[starts + (counts - 1) // 2]
+            upper = ranked[starts + counts // 2]
+            centers = (lower + upper) / 2
+        else:
+            raise ValueError("center must be 'median' or 'mean'")
         
-        # Histogram
-        ax3.hist(residuals, bins='auto', density=True)
-        x = np.linspace(min(residuals), max(residuals), 100)
-        ax3.plot(x, stats.norm.pdf(x, np.mean(residuals), np.std(residuals)))
-        ax3.set_title("Histogram of Residuals")
+        z = np.abs(y - centers[codes])
+        z_sums = group_sums(z)
+        z_means = z_sums / counts[:, None]
+        grand = z.mean(axis=0)
+        between = np.sum(counts[:, None] * (z_means - grand)**2, axis=0)
+        within = np.sum(group_sums(z**2), axis=0) - np.sum(z_sums**2 / counts[:, None], axis=0)
+        df_between, df_within = int(k - 1), int(n - k)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            statistic = (between / df_between) / (within / df_within)
+        p_value = stats.f.sf(statistic, df_between, df_within)
         
-        # Scale-Location
-        ax4.scatter(fitted, np.sqrt(np.abs(residuals)))
-        ax4.set_xlabel("Fitted values")
-        ax4.set_ylabel("√|Residuals|")
-        ax4.set_title("Scale-Location")
+        result = {'test': 'Brown-Forsythe' if center == 'median' else 'Levene',
+                  'df': (df_between, df_within)}
+        if not traits:
+            result.update(statistic=float(statistic[0]), p_value=float(p_value[0]))
+        else:
+            result.update(statistic=statistic.reshape(traits), p_value=p_value.reshape(traits))
+        return result
+
+    @staticmethod
+    def check_assumptions(residuals: np.ndarray,
+                          groups: Optional[np.ndarray] = None,
+                          normality: str = 'auto',
+                          center: str = 'median') -> Dict:
+        """
+        Normality and (with group codes) homogeneity of variance checks.
         
-        plt.tight_layout()
-        plt.show() 
\ No newline at end of file
+        Parameters
+        ----------
+        residuals : np.ndarray
+            Residuals of shape (n,) or (n, traits...)
+        groups : np.ndarray, optional
+            Treatment (or other group) code of every residual
+        normality : str
+            Normality test passed to `check_normality`
+        center : str
+            Group center passed to `check_homogeneity`
+            
+        Returns
+        -------
+        Dict
+            'normality' and 'homogeneity' (None without groups) results
+        """
+        return {
+            'normality': Statistics.check_normality(residuals, method=normality),
+            'homogeneity': (Statistics.check_homogeneity(residuals, groups, center=center)
+                            if groups is not None else None)
+        }
+
+    @staticmethod
+    def diagnostic_plots(residuals: np.ndarray,
+                         fitted: np.ndarray,
+                         path: Optional[str] = None,
+                         show: bool = False,
+                         **options):
+        """
+        Create diagnostic plots for ANOVA assumptions.
+        
+        The figure is built without pyplot, so it works on headless
+        hosts; large samples are drawn with thinned Q-Q points and hexbin
+        density panels (see `dgNova.core.diagnostics`).
+        
+        Parameters
+        ----------
+        residuals, fitted : np.ndarray
+            Residuals and fitted values
+        path : str, optional
+            File to write the figure to
+        show : bool
+            Display the figure through pyplot
+        **options
+            Passed to `diagnostic_figure` (title, max_points, gridsize, ...)
+            
+        Returns
+        -------
+        matplotlib.figure.Figure
+            The diagnostic figure
+        """
+        figure = plt.figure(figsize=options.pop('figsize', (12, 10))) if show else None
+        fig = diagnostic_figure(residuals, fitted, figure=figure, **options)
+        if path is not None:
+            fig.savefig(path)
+        if show:
+            plt.show()
+        return fig 
\ No newline at end of file
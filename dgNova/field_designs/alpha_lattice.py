@@ -1,10 +1,14 @@
 from typing import Dict, Union, Optional, List
 import numpy as np
 import pandas as pd
+from scipy import stats
 from .replicated_design import REP
 from ..core.statistics import Statistics
-import matplotlib.pyplot as plt
-import seaborn as sns
+from ..core.mixed_model import MixedModel
+from .._lazy import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
 
 class AlphaLattice(REP):
     """
@@ -141,30 +145,41 @@ class AlphaLattice(REP):
         except Exception as e:
             raise ValueError(f"Error reshaping data: {str(e)}")
 
-    def analyze(self) -> Dict:
-        """Analyze Alpha Lattice design."""
+    def analyze(self, model: str = 'fixed') -> Dict:
+        """
+        Analyze Alpha Lattice design.
+        
+        Parameters
+        ----------
+        model : str
+            'fixed' for the intrablock ANOVA analysis, 'mixed' for REML
+            variance components and treatment BLUPs (fixed replications,
+            random blocks within replications)
+        """
+        if model == 'mixed':
+            return self.mixed_model().fit()
+        if model != 'fixed':
+            raise ValueError("model must be 'fixed' or 'mixed'")
+        
         results = {}
         
-        # Get block information from raw data
-        block_data = self.raw_data[[self.rep_col, self.block_col, self.treatment_col, self.response]]
+        # Replication, block (within replication) and treatment of every plot
+        df = self.raw_data
+        rep = df[self.rep_col].to_numpy(dtype=int) - 1
+        trt = df[self.treatment_col].to_numpy(dtype=int) - 1
+        block = pd.factorize(pd.MultiIndex.from_arrays([df[self.rep_col], df[self.block_col]]))[0]
+        y = df[self.response].to_numpy(dtype=float)
         
-        # Calculate block effects
-        block_means = block_data.groupby([self.rep_col, self.block_col])[self.response].mean()
-        grand_mean = block_data[self.response].mean()
-        block_effects = block_means - grand_mean
+        # Block effects as deviations of block means from the grand mean
+        grand_mean = y.mean()
+        block_effects = np.bincount(block, weights=y) / np.bincount(block) - grand_mean
         
-        # Adjust for block effects
+        # Adjust every plot for the effect of its block
         adjusted_data = self.data.copy()
-        for rep in range(self.replications):
-            for trt in range(self.treatments):
-                block = block_data[
-                    (block_data[self.rep_col] == rep + 1) & 
-                    (block_data[self.treatment_col] == trt + 1)
-                ][self.block_col].iloc[0]
-                adjusted_data[rep, trt] -= block_effects[rep + 1, block]
+        adjusted_data[rep, trt] -= block_effects[block]
         
         # Calculate ANOVA components
-        results['anova'] = self._calculate_alpha_anova(block_effects)
+        results['anova'] = self._calculate_alpha_anova()
         
         # Calculate adjusted means
         results['adjusted_means'] = np.mean(adjusted_data, axis=0)
@@ -179,80 +194,42 @@ class AlphaLattice(REP):
         
         return results
 
-    def _calculate_alpha_anova(self, block_effects) -> Dict:
+    def mixed_model(self) -> MixedModel:
+        """Mixed model with fixed replications and random blocks and treatments."""
+        df = self.raw_data
+        rep = pd.factorize(df[self.rep_col])[0]
+        block = pd.factorize(df[self.block_col])[0]
+        return MixedModel(
+            df[self.response].to_numpy(dtype=float),
+            fixed={'Rep': rep},
+            random={'Block': rep * (block.max() + 1) + block,
+                    'Treatment': df[self.treatment_col].to_numpy()}
+        )
+
+    def _calculate_alpha_anova(self) -> Dict:
         """Calculate ANOVA table for Alpha Lattice design."""
-        # Initialize results dictionary
-        anova = {
-            'source': [],
-            'df': [],
-            'ss': [],
-            'ms': [],
-            'f_value': [],
-            'p_value': []
-        }
-        
-        # Total SS and df
-        total_ss = np.sum((self.data - np.mean(self.data))**2)
-        total_df = self.treatments * self.replications - 1
-        
-        # Replication SS and df
-        rep_means = np.mean(self.data, axis=1)
-        rep_ss = self.treatments * np.sum((rep_means - np.mean(self.data))**2)
-        rep_df = self.replications - 1
-        rep_ms = rep_ss / rep_df
-        
-        # Treatment SS and df
-        trt_means = np.mean(self.data, axis=0)
-        trt_ss = self.replications * np.sum((trt_means - np.mean(self.data))**2)
-        trt_df = self.treatments - 1
-        trt_ms = trt_ss / trt_df
-        
-        # Block within Rep SS and df
-        block_ss = np.sum(block_effects**2) * self.block_size
-        block_df = self.replications * (self.blocks_per_rep - 1)
-        block_ms = block_ss / block_df
-        
-        # Error SS and df (by subtraction)
-        error_ss = total_ss - rep_ss - trt_ss - block_ss
-        error_df = total_df - rep_df - trt_df - block_df
-        error_ms = error_ss / error_df
+        df = self.raw_data
+        anova = Statistics.anova_intrablock(
+            df[self.response].to_numpy(dtype=float),
+            df[self.rep_col].to_numpy(),
+            df[self.block_col].to_numpy(),
+            df[self.treatment_col].to_numpy(),
+            labels={'Treatment': 'Treatments'},
+            error_label='Error'
+        )
         
         # Calculate effective error
+        error_ms, error_df = Statistics.error_term(anova)
+        block_ms = anova['ms'][2]
         lambda_b = error_ms / block_ms
         k = self.block_size
-        r = self.replications
         effective_error = error_ms * (k-1)/(k-1+lambda_b)
         
-        # F values and p-values
-        from scipy import stats
-        
-        rep_f = rep_ms / error_ms
-        rep_p = 1 - stats.f.cdf(rep_f, rep_df, error_df)
-        
-        trt_f = trt_ms / effective_error
-        trt_p = 1 - stats.f.cdf(trt_f, trt_df, error_df)
-        
-        block_f = block_ms / error_ms
-        block_p = 1 - stats.f.cdf(block_f, block_df, error_df)
-        
-        # Compile ANOVA table
-        sources = ['Replications', 'Treatments', 'Blocks within Reps', 'Error', 'Total']
-        dfs = [rep_df, trt_df, block_df, error_df, total_df]
-        sss = [rep_ss, trt_ss, block_ss, error_ss, total_ss]
-        mss = [rep_ms, trt_ms, block_ms, error_ms, None]
-        f_values = [rep_f, trt_f, block_f, None, None]
-        p_values = [rep_p, trt_p, block_p, None, None]
-        
-        # Store in dictionary format
-        anova = {
-            'source': sources,
-            'df': dfs,
-            'ss': sss,
-            'ms': mss,
-            'f_value': f_values,
-            'p_value': p_values,
-            'effective_error': effective_error
-        }
+        # Treatments are tested against the effective error
+        trt_f = anova['ms'][1] / effective_error
+        anova['f_value'][1] = trt_f
+        anova['p_value'][1] = float(stats.f.sf(trt_f, anova['df'][1], error_df))
+        anova['effective_error'] = effective_error
         
         return anova 
 
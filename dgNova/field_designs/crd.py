@@ -3,8 +3,11 @@ import numpy as np
 import pandas as pd
 from .replicated_design import REP
 from ..core.statistics import Statistics
-import matplotlib.pyplot as plt
-import seaborn as sns
+from ..core.permutation import permutation_anova
+from .._lazy import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
 
 class CRD(REP):
     """
@@ -19,6 +22,9 @@ class CRD(REP):
         µ: overall mean
         α_l: effect of lth treatment
         e_fl: error term
+    
+    Missing plots (NaN) are left out: the analysis uses the observed plots
+    with unequal replication, so no values are estimated.
     """
     
     def __init__(self,
@@ -69,16 +75,14 @@ class CRD(REP):
             - CV%
             - Error variance
             - LSD (if requested)
+            - Missing plots and replications per treatment (if any)
         """
         results = {}
         
         # 1. Basic ANOVA
-        anova = Statistics.calculate_anova_crd(
-            data=self.data,
-            treatments=self.treatments,
-            replications=self.replications
-        )
+        anova = self._calculate_anova()
         results['anova'] = anova
+        error_ms, error_df = Statistics.error_term(anova)
         
         # 2. Treatment means and standard errors
         means_data = self._calculate_means()
@@ -86,20 +90,65 @@ class CRD(REP):
         results['standard_errors'] = means_data['se']
         
         # 3. CV%
-        results['cv'] = Statistics.calculate_cv(
-            self.data, 
-            anova['ms'][1]  # Error MS
-        )
+        results['cv'] = Statistics.calculate_cv(self.data, error_ms)
         
         # 4. Multiple comparisons
         results.update(self._multiple_comparisons(
             means=means_data['means'],
-            mse=anova['ms'][1],
-            df_error=anova['df'][1]
+            mse=error_ms,
+            df_error=error_df
         ))
         
+        if self.missing.any():
+            rows, cols = np.nonzero(self.missing)
+            results['missing_plots'] = {
+                'count': int(self.missing.sum()),
+                'cells': np.column_stack([rows, cols]),
+                'replications': self._n_reps()
+            }
+        
         return results
 
+    def _calculate_anova(self) -> Dict:
+        """ANOVA without blocking."""
+        return Statistics.calculate_anova_crd(
+            data=self.data,
+            treatments=self.treatments,
+            replications=self.replications
+        )
+
+    def permutation_test(self,
+                         permutations: int = 9999,
+                         seed: Optional[int] = None,
+                         n_jobs: int = 1) -> Dict:
+        """
+        Permutation F-test for treatments (labels permuted over all plots).
+        
+        Parameters
+        ----------
+        permutations : int
+            Number of random relabellings
+        seed : int, optional
+            Random seed
+        n_jobs : int
+            Worker processes (-1 uses all cores)
+            
+        Returns
+        -------
+        Dict
+            F value with permutation and parametric p-values
+        """
+        if self.missing.any():
+            # Relabel the observed plots only
+            treatment = np.broadcast_to(np.arange(self.treatments), self.data.shape)
+            return permutation_anova(
+                self.data[~self.missing], treatment=treatment[~self.missing],
+                permutations=permutations, seed=seed, n_jobs=n_jobs
+            )
+        return Statistics.permutation_test_crd(
+            self.data, permutations=permutations, seed=seed, n_jobs=n_jobs
+        )
+
     def randomize(self) -> np.ndarray:
         """
         Generate randomized plot layout for CRD.
@@ -3,8 +3,11 @@ import numpy as np
 import pandas as pd
 from .replicated_design import REP
 from ..core.statistics import Statistics
-import matplotlib.pyplot as plt
-import seaborn as sns
+from ..io.input import pivot_matrix
+from .._lazy import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
 
 class LatinSquare(REP):
     """
@@ -29,14 +32,15 @@ class LatinSquare(REP):
                  response: str = 'Yield',
                  treatment_col: str = 'Treatment',
                  row_col: str = 'Row',
-                 col_col: str = 'Column'):
+                 col_col: str = 'Column',
+                 layout: Optional[np.ndarray] = None):
         """
         Initialize Latin Square analysis.
         
         Parameters
         ----------
         data : Union[np.ndarray, str, pd.DataFrame]
-            Input data
+            Input data (rows × columns array or long DataFrame)
         treatments : int
             Number of treatments (must equal number of rows and columns)
         response : str
@@ -47,8 +51,13 @@ class LatinSquare(REP):
             Row column name
         col_col : str
             Column column name
+        layout : np.ndarray, optional
+            Treatment index (0-based) of every plot for array input;
+            defaults to the cyclic square (row + column) mod treatments.
+            For a DataFrame it supplies the treatments of plots without a
+            record when these cannot be inferred from their row and column
         """
-        if isinstance(data, (np.ndarray, pd.DataFrame)):
+        if isinstance(data, np.ndarray):
             rows, cols = data.shape
             if rows != cols or rows != treatments:
                 raise ValueError(
@@ -56,18 +65,100 @@ class LatinSquare(REP):
                     f"equal to number of treatments ({treatments})"
                 )
         
+        self.row_col = row_col
+        self.col_col = col_col
+        self.layout = None if layout is None else np.asarray(layout)
+        
+        # Every treatment occurs once per row, i.e. `treatments` times
         super().__init__(
             data=data,
             treatments=treatments,
-            replications=1,  # Latin Square is self-replicated
+            replications=treatments,
             response=response,
             treatment_col=treatment_col,
             rep_col=row_col,
             design='latin_square'
         )
         
-        self.row_col = row_col
-        self.col_col = col_col
+        if self.layout is None:
+            row, column = np.indices(self.data.shape)
+            self.layout = (row + column) % treatments
+        row, column = np.indices(self.data.shape)
+        self._estimate_missing({'Row': row, 'Column': column, 'Treatment': self.layout})
+        
+    def _convert_to_matrix(self) -> np.ndarray:
+        """Convert DataFrame to a rows × columns matrix and treatment layout."""
+        required_cols = [self.row_col, self.col_col, self.treatment_col, self.response]
+        missing = [col for col in required_cols if col not in self.raw_data.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+        
+        rows = pd.factorize(self.raw_data[self.row_col], sort=True)[0]
+        cols = pd.factorize(self.raw_data[self.col_col], sort=True)[0]
+        trts = pd.factorize(self.raw_data[self.treatment_col], sort=True)[0]
+        n = self.treatments
+        if rows.max() >= n or cols.max() >= n or trts.max() >= n:
+            raise ValueError(f"Data must contain {n} rows × {n} columns and {n} treatments")
+        
+        # Plots without a record stay NaN; a plot recorded twice is an error
+        matrix = pivot_matrix(rows, cols, self.raw_data[self.response].to_numpy(dtype=float),
+                              (n, n), allow_missing=True)
+        layout = pivot_matrix(rows, cols, trts.astype(float), (n, n), allow_missing=True)
+        if np.isnan(layout).any():
+            layout = self._complete_layout(layout)
+        self.layout = layout.astype(int)
+        return matrix
+    
+    def _complete_layout(self, layout: np.ndarray) -> np.ndarray:
+        """
+        Treatments of plots without a record: from the supplied layout,
+        else the one treatment absent from both their row and column
+        """
+        absent = np.isnan(layout)
+        if self.layout is not None:
+            supplied = np.asarray(self.layout, dtype=float)
+            if supplied.shape != layout.shape:
+                raise ValueError(f"Layout of shape {supplied.shape}, expected {layout.shape}")
+            layout[absent] = supplied[absent]
+            return layout
+        treatments = set(range(self.treatments))
+        progress = True
+        while progress and np.isnan(layout).any():
+            progress = False
+            for i, j in np.argwhere(np.isnan(layout)):
+                seen = set(layout[i][~np.isnan(layout[i])]) | \
+                    set(layout[:, j][~np.isnan(layout[:, j])])
+                candidates = treatments - seen
+                if len(candidates) == 1:
+                    layout[i, j] = candidates.pop()
+                    progress = True
+        unknown = np.argwhere(np.isnan(layout))
+        if unknown.size:
+            shown = ', '.join(f"({i}, {j})" for i, j in unknown[:5])
+            raise ValueError(
+                f"Treatment of {len(unknown)} plots without a record is unknown, "
+                f"e.g. {shown}; pass `layout`"
+            )
+        return layout
+        
+    def _calculate_anova(self) -> Dict:
+        """ANOVA with rows, columns and treatments (missing plots estimated)."""
+        return Statistics.calculate_anova_latin_square(
+            data=self.observed,
+            treatments=self.treatments,
+            layout=self.layout
+        )
+        
+    def _calculate_means(self) -> Dict:
+        """Calculate treatment means (from the layout) and standard errors."""
+        counts = np.bincount(self.layout.ravel(), minlength=self.treatments)
+        sums = np.bincount(self.layout.ravel(), weights=self.data.ravel(),
+                           minlength=self.treatments)
+        error_ms, _ = Statistics.error_term(self._calculate_anova())
+        return {
+            'means': sums / counts,
+            'se': np.sqrt(error_ms / self.treatments)
+        }
         
     def analyze(self) -> Dict:
         """
@@ -83,15 +174,14 @@ class LatinSquare(REP):
             - Column effects
             - CV%
             - Multiple comparisons
+            - Missing plot estimates (when plots are missing)
         """
         results = {}
         
         # 1. ANOVA
-        anova = Statistics.calculate_anova_latin_square(
-            data=self.data,
-            treatments=self.treatments
-        )
+        anova = self._calculate_anova()
         results['anova'] = anova
+        error_ms, error_df = Statistics.error_term(anova)
         
         # 2. Treatment means and SEs
         means_data = self._calculate_means()
@@ -103,18 +193,19 @@ class LatinSquare(REP):
         results['column_effects'] = self._calculate_column_effects()
         
         # 4. CV%
-        results['cv'] = Statistics.calculate_cv(
-            self.data,
-            anova['ms'][3]  # Error MS
-        )
+        results['cv'] = Statistics.calculate_cv(self.data, error_ms)
         
         # 5. Multiple comparisons
         results.update(self._multiple_comparisons(
             means=means_data['means'],
-            mse=anova['ms'][3],
-            df_error=anova['df'][3]
+            mse=error_ms,
+            df_error=error_df
         ))
         
+        # 6. Estimated missing plots
+        if self.missing_plots is not None:
+            results['missing_plots'] = self._missing_summary()
+        
         return results
         
     def _calculate_row_effects(self) -> np.ndarray:
@@ -1,11 +1,16 @@
 import numpy as np
 from typing import Optional, Dict, Tuple, List
 from scipy import stats
-import matplotlib.pyplot as plt
-import seaborn as sns
 from .layouts import LatticeLayouts
-from scipy.stats import studentized_range
-from itertools import combinations
+from ..core.statistics import Statistics
+from ..core.mixed_model import MixedModel
+from ..core.critical_values import q_critical
+from ..core.letters import compact_letter_display
+from ..core.pairwise import PairwiseComparisons
+from .._lazy import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
 
 class Lattice:
     """
@@ -73,10 +78,17 @@ class Lattice:
         if replications not in [2, 3]:
             raise ValueError("Number of replications must be 2 (simple) or 3 (triple)")
             
-    def analyze(self) -> Dict:
+    def analyze(self, model: str = 'fixed') -> Dict:
         """
         Perform complete analysis of lattice experiment
         
+        Parameters
+        ----------
+        model : str
+            'fixed' for the intrablock analysis, 'mixed' for REML variance
+            components and treatment BLUPs (fixed replications, random
+            blocks and treatments)
+        
         Returns
         -------
         Dict
@@ -86,9 +98,14 @@ class Lattice:
             - Relative efficiency
             - Standard errors
             - CV%
+            or, for model='mixed', the `MixedModel.fit` results
         """
         if self.data is None:
             raise ValueError("No data available for analysis")
+        if model == 'mixed':
+            return self.mixed_model().fit()
+        if model != 'fixed':
+            raise ValueError("model must be 'fixed' or 'mixed'")
             
         results = {}
         
@@ -114,61 +131,30 @@ class Lattice:
         if self.data is None:
             raise ValueError("No data available for analysis")
             
-        # Calculate correction factor
-        cf = np.sum(self.data) ** 2 / (self.treatments * self.replications)
-        
-        # Calculate total SS
-        total_ss = np.sum(self.data ** 2) - cf
-        total_df = self.treatments * self.replications - 1
-        
-        # Calculate replication SS
-        rep_means = np.array([
-            np.mean(self.data[i*self.blocks_per_rep:(i+1)*self.blocks_per_rep])
-            for i in range(self.replications)
-        ])
-        rep_ss = self.treatments * np.sum(rep_means ** 2) - cf
-        rep_df = self.replications - 1
-        
-        # Calculate treatment SS (ignoring blocks)
-        treatment_means = self._get_treatment_means()
-        treatment_ss = self.replications * np.sum(treatment_means ** 2) - cf
-        treatment_df = self.treatments - 1
-        
-        # Calculate block within replication SS
-        block_means = np.array([
-            np.mean(self.data[i:i+self.k])
-            for i in range(0, len(self.data), self.k)
-        ])
-        block_ss = self.k * np.sum(block_means ** 2) - cf - rep_ss
-        block_df = self.replications * (self.blocks_per_rep - 1)
-        
-        # Calculate intrablock error SS
-        error_ss = total_ss - rep_ss - treatment_ss - block_ss
-        error_df = total_df - rep_df - treatment_df - block_df
-        
-        # Calculate mean squares
-        rep_ms = rep_ss / rep_df
-        treatment_ms = treatment_ss / treatment_df
-        block_ms = block_ss / block_df
-        error_ms = error_ss / error_df
-        
-        # Calculate F values and p-values
-        rep_f = rep_ms / error_ms
-        treatment_f = treatment_ms / error_ms
-        block_f = block_ms / error_ms
-        
-        rep_p = 1 - stats.f.cdf(rep_f, rep_df, error_df)
-        treatment_p = 1 - stats.f.cdf(treatment_f, treatment_df, error_df)
-        block_p = 1 - stats.f.cdf(block_f, block_df, error_df)
-        
+        factors = self._plot_factors()
+        return Statistics.anova_intrablock(
+            self.data, factors['Rep'], factors['Block'], factors['Treatment']
+        )
+        
+    def mixed_model(self) -> MixedModel:
+        """Mixed model with fixed replications and random blocks and treatments"""
+        factors = self._plot_factors()
+        return MixedModel(self.data, fixed={'Rep': factors['Rep']},
+                          random={'Block': factors['Block'], 'Treatment': factors['Treatment']})
+        
+    def _plot_factors(self) -> Dict[str, np.ndarray]:
+        """Replication, block and treatment of every plot (shape of data)"""
+        blocks = self.replications * self.blocks_per_rep
+        block = np.repeat(np.arange(blocks)[:, None], self.k, axis=1)
+        treatment = np.array([
+            block_treatments
+            for rep in self._get_treatment_layouts()
+            for block_treatments in rep
+        ], dtype=int).reshape(blocks, self.k)
         return {
-            'source': ['Replications', 'Treatments (Unadj.)', 'Blocks within Reps',
-                      'Intrablock Error', 'Total'],
-            'df': [rep_df, treatment_df, block_df, error_df, total_df],
-            'ss': [rep_ss, treatment_ss, block_ss, error_ss, total_ss],
-            'ms': [rep_ms, treatment_ms, block_ms, error_ms, None],
-            'f_value': [rep_f, treatment_f, block_f, None, None],
-            'p_value': [rep_p, treatment_p, block_p, None, None]
+            'Rep': block // self.blocks_per_rep,
+            'Block': block,
+            'Treatment': treatment
         }
         
     def _get_treatment_means(self) -> np.ndarray:
@@ -183,27 +169,10 @@ class Lattice:
         if self.data is None:
             raise ValueError("No data available for analysis")
         
-        # Initialize array to store treatment totals
-        treatment_totals = np.zeros(self.treatments)
-        treatment_counts = np.zeros(self.treatments)
-        
-        # Get treatment layout for each replication
-        layouts = self._get_treatment_layouts()
-        
-        # Sum values for each treatment
-        for rep in range(self.replications):
-            rep_start = rep * self.blocks_per_rep
-            for block in range(self.blocks_per_rep):
-                block_data = self.data[rep_start + block]
-                block_treatments = layouts[rep][block]
-                
-                for i, treatment in enumerate(block_treatments):
-                    treatment_totals[treatment] += block_data[i]
-                    treatment_counts[treatment] += 1
-                
-        # Calculate means
-        treatment_means = treatment_totals / treatment_counts
-        return treatment_means
+        treatment = self._plot_factors()['Treatment'].ravel()
+        totals = np.bincount(treatment, weights=self.data.ravel(), minlength=self.treatments)
+        counts = np.bincount(treatment, minlength=self.treatments)
+        return totals / counts
         
     def _calculate_adjusted_means(self) -> Dict:
         """
@@ -268,24 +237,10 @@ class Lattice:
         if self.data is None:
             raise ValueError("No data available for analysis")
         
-        # Calculate block means
-        block_means = np.array([
-            np.mean(self.data[i:i+self.k])
-            for i in range(0, len(self.data), self.k)
-        ])
-        
-        # Calculate replication means
-        rep_means = np.array([
-            np.mean(self.data[i*self.blocks_per_rep:(i+1)*self.blocks_per_rep])
-            for i in range(self.replications)
-        ])
-        
-        # Calculate block effects as deviations from rep means
-        block_effects = np.zeros_like(block_means)
-        for rep in range(self.replications):
-            start = rep * self.blocks_per_rep
-            end = start + self.blocks_per_rep
-            block_effects[start:end] = block_means[start:end] - rep_means[rep]
+        # Block effects as deviations from rep means (one data row per block)
+        block_means = np.mean(self.data, axis=1)
+        rep_means = block_means.reshape(self.replications, self.blocks_per_rep).mean(axis=1)
+        block_effects = block_means - np.repeat(rep_means, self.blocks_per_rep)
         
         return block_effects
         
@@ -429,48 +384,23 @@ class Lattice:
         adj_results = self._calculate_adjusted_means()
         means = adj_results['means']
         se = adj_results['se']
+        if not np.isfinite(se):
+            raise ValueError(
+                f"Standard error of the adjusted means is not finite (adjustment "
+                f"weight {adj_results['weight']:.3g}); Tukey groups cannot be formed"
+            )
         
         # Get error df
         anova = self._calculate_anova()
         error_df = anova['df'][3]
         
         # Calculate critical value
-        q = studentized_range.ppf(1 - alpha, self.treatments, error_df)
+        q = q_critical(self.treatments, error_df, alpha)
         hsd = q * se
         
-        # Perform pairwise comparisons
-        comparisons = []
-        for i, j in combinations(range(self.treatments), 2):
-            diff = abs(means[i] - means[j])
-            significant = diff > hsd
-            comparisons.append({
-                'treatment1': i,
-                'treatment2': j,
-                'difference': diff,
-                'significant': significant
-            })
-            
-        # Create letter groupings
-        groups = [''] * self.treatments
-        sorted_idx = np.argsort(-means)  # Sort in descending order
-        current_group = 'a'
-        
-        for i, idx in enumerate(sorted_idx):
-            if i == 0:
-                groups[idx] = current_group
-                continue
-                
-            # Check if current mean is different from all previous means
-            different_from_all = True
-            for prev_idx in sorted_idx[:i]:
-                if abs(means[idx] - means[prev_idx]) <= hsd:
-                    different_from_all = False
-                    groups[idx] = groups[prev_idx]
-                    break
-                    
-            if different_from_all:
-                current_group = chr(ord(current_group) + 1)
-                groups[idx] = current_group
+        # Pairwise comparisons in condensed storage and letter groupings
+        comparisons = PairwiseComparisons(means, se, q)
+        groups = compact_letter_display(comparisons.square(), means)
                 
         return {
             'groups': groups,
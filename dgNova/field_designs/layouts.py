@@ -1,7 +1,9 @@
 import numpy as np
 from typing import List, Tuple, Optional
-import matplotlib.pyplot as plt
-import seaborn as sns
+from .._lazy import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
 
 class LatticeLayouts:
     """
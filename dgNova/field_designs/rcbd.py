@@ -3,8 +3,11 @@ import numpy as np
 import pandas as pd
 from .replicated_design import REP
 from ..core.statistics import Statistics
-import matplotlib.pyplot as plt
-import seaborn as sns
+from ..core.mixed_model import MixedModel
+from .._lazy import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
 
 class RCBD(REP):
     """
@@ -56,11 +59,19 @@ class RCBD(REP):
             rep_col=block_col,
             design='rcbd'
         )
+        block, treatment = np.indices(self.data.shape)
+        self._estimate_missing({'Block': block, 'Treatment': treatment})
 
-    def analyze(self) -> Dict:
+    def analyze(self, model: str = 'fixed') -> Dict:
         """
         Analyze RCBD experiment.
         
+        Parameters
+        ----------
+        model : str
+            'fixed' for the ANOVA analysis, 'mixed' for REML variance
+            components and treatment BLUPs with fixed blocks
+        
         Returns
         -------
         Dict
@@ -70,16 +81,20 @@ class RCBD(REP):
             - Block effects
             - CV%
             - Multiple comparisons
+            - Missing plot estimates (when plots are missing)
+            or, for model='mixed', the `MixedModel.fit` results
         """
+        if model == 'mixed':
+            return self.mixed_model().fit()
+        if model != 'fixed':
+            raise ValueError("model must be 'fixed' or 'mixed'")
+        
         results = {}
         
         # 1. ANOVA
-        anova = Statistics.calculate_anova_rcbd(
-            data=self.data,
-            treatments=self.treatments,
-            blocks=self.replications
-        )
+        anova = self._calculate_anova()
         results['anova'] = anova
+        error_ms, error_df = Statistics.error_term(anova)
         
         # 2. Treatment means and SEs
         means_data = self._calculate_means()
@@ -90,26 +105,68 @@ class RCBD(REP):
         results['block_effects'] = self._calculate_block_effects()
         
         # 4. CV%
-        results['cv'] = Statistics.calculate_cv(
-            self.data, 
-            anova['ms'][2]  # Error MS
-        )
+        results['cv'] = Statistics.calculate_cv(self.data, error_ms)
         
         # 5. Multiple comparisons
         results.update(self._multiple_comparisons(
             means=means_data['means'],
-            mse=anova['ms'][2],
-            df_error=anova['df'][2]
+            mse=error_ms,
+            df_error=error_df
         ))
         
+        # 6. Estimated missing plots
+        if self.missing_plots is not None:
+            results['missing_plots'] = self._missing_summary()
+        
         return results
 
+    def _calculate_anova(self) -> Dict:
+        """ANOVA with blocks and treatments (missing plots estimated)."""
+        return Statistics.calculate_anova_rcbd(
+            data=self.observed,
+            treatments=self.treatments,
+            blocks=self.replications
+        )
+
+    def mixed_model(self) -> MixedModel:
+        """Mixed model with fixed blocks and random treatments."""
+        block, treatment = np.indices(self.data.shape)
+        return MixedModel(self.observed, fixed={'Block': block},
+                          random={'Treatment': treatment})
+
     def _calculate_block_effects(self) -> np.ndarray:
         """Calculate block effects."""
         block_means = np.mean(self.data, axis=1)
         grand_mean = np.mean(self.data)
         return block_means - grand_mean
 
+    def permutation_test(self,
+                         permutations: int = 9999,
+                         seed: Optional[int] = None,
+                         n_jobs: int = 1) -> Dict:
+        """
+        Permutation F-test for treatments (labels permuted within blocks).
+        
+        Parameters
+        ----------
+        permutations : int
+            Number of random relabellings
+        seed : int, optional
+            Random seed
+        n_jobs : int
+            Worker processes (-1 uses all cores)
+            
+        Returns
+        -------
+        Dict
+            F value with permutation and parametric p-values
+        """
+        if self.missing.any():
+            raise ValueError("Permutation test needs complete blocks; plots are missing")
+        return Statistics.permutation_test_rcbd(
+            self.data, permutations=permutations, seed=seed, n_jobs=n_jobs
+        )
+
     def randomize(self) -> List[np.ndarray]:
         """
         Generate randomized layout for each block.
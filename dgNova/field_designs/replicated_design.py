@@ -1,10 +1,14 @@
 import numpy as np
 from typing import Dict, Union, Optional
-import matplotlib.pyplot as plt
 import pandas as pd
-import seaborn as sns
 import scipy.stats as stats
 from ..core.statistics import Statistics
+from ..core.missing import estimate_missing
+from ..io.input import pivot_matrix
+from .._lazy import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
 
 class REP:
     """
@@ -63,7 +67,8 @@ class REP:
         if self.raw_data is not None:
             self.treatments = treatments or self._get_treatments()
             self.replications = replications or self._get_replications()
-            self.block_size = self._get_block_size() if hasattr(self, 'block_col') else None
+            self.block_size = (self._get_block_size()
+                               if self.block_col in self.raw_data.columns else None)
             self.data = self._convert_to_matrix()
         else:
             self.treatments = treatments
@@ -75,6 +80,13 @@ class REP:
                 f"Data shape {self.data.shape} does not match "
                 f"design dimensions ({self.replications} × {self.treatments})"
             )
+        
+        # Plots without an observation are NaN; designs that estimate them
+        # keep the incomplete matrix in `observed` (see _estimate_missing)
+        self.data = np.asarray(self.data, dtype=float)
+        self.missing = np.isnan(self.data)
+        self.observed = self.data
+        self.missing_plots = None
 
     def _get_treatments(self) -> int:
         """Get number of treatments from raw data."""
@@ -101,46 +113,97 @@ class REP:
         if missing:
             raise ValueError(f"Missing required columns: {missing}")
             
-        matrix = np.zeros((self.replications, self.treatments))
-        for _, row in self.raw_data.iterrows():
-            rep = int(row[self.rep_col]) - 1
-            trt = int(row[self.treatment_col]) - 1
-            matrix[rep, trt] = row[self.response]
-            
-        return matrix
+        rep = self.raw_data[self.rep_col].to_numpy(dtype=int) - 1
+        trt = self.raw_data[self.treatment_col].to_numpy(dtype=int) - 1
+        # Plots absent from the data stay NaN rather than becoming 0;
+        # a plot recorded twice is an error
+        return pivot_matrix(rep, trt, self.raw_data[self.response].to_numpy(dtype=float),
+                            (self.replications, self.treatments), allow_missing=True)
+
+    def _estimate_missing(self, factors: Dict[str, np.ndarray]) -> None:
+        """
+        Replace missing plots of `data` by their least-squares estimates
+        under the additive model of `factors`; the incomplete matrix stays
+        in `observed` and the estimation details in `missing_plots`.
+        """
+        if not self.missing.any():
+            return
+        self.missing_plots = estimate_missing(self.observed, factors)
+        if not self.missing_plots['converged']:
+            raise ValueError(
+                f"Missing plot estimates did not converge in "
+                f"{self.missing_plots['iterations']} iterations"
+            )
+        self.data = self.missing_plots['data']
+
+    def _missing_summary(self) -> Dict:
+        """Positions and estimates of the missing plots."""
+        rows, cols = np.nonzero(self.missing)
+        return {
+            'count': self.missing_plots['count'],
+            'cells': np.column_stack([rows, cols]),
+            'estimates': self.missing_plots['estimates']
+        }
 
     def analyze(self) -> Dict:
         """Perform basic analysis common to all replicated designs."""
         results = {}
         
         # Calculate basic ANOVA
-        results['anova'] = Statistics.calculate_anova(
-            self.data, self.treatments, self.replications
-        )
+        results['anova'] = self._calculate_anova()
         
         # Calculate means
         results['means'] = self._calculate_means()
         
         # Calculate CV%
-        results['cv'] = Statistics.calculate_cv(
-            self.data, results['anova']['ms'][2]  # Error MS
-        )
+        error_ms, _ = Statistics.error_term(results['anova'])
+        results['cv'] = Statistics.calculate_cv(self.data, error_ms)
         
         return results
 
-    def _calculate_means(self) -> Dict:
-        """Calculate treatment means and standard errors."""
-        means = np.mean(self.data, axis=0)
-        error_ms = Statistics.calculate_anova(
+    def _calculate_anova(self) -> Dict:
+        """ANOVA of the design (replications as blocks by default)."""
+        return Statistics.calculate_anova(
             self.data, self.treatments, self.replications
-        )['ms'][2]
-        se = np.sqrt(error_ms / self.replications)
+        )
+
+    def _n_reps(self) -> Union[int, np.ndarray]:
+        """Replications of the treatment means (per treatment when plots are missing)."""
+        observed = ~np.isnan(self.data)
+        return self.replications if observed.all() else observed.sum(axis=0)
+
+    def _calculate_means(self) -> Dict:
+        """Calculate treatment means and standard errors of the observed plots."""
+        means = np.nanmean(self.data, axis=0)
+        error_ms, _ = Statistics.error_term(self._calculate_anova())
+        se = np.sqrt(error_ms / self._n_reps())
         
         return {
             'means': means,
             'se': se
         }
 
+    def _multiple_comparisons(self,
+                              means: np.ndarray,
+                              mse: float,
+                              df_error: int,
+                              alpha: float = 0.05) -> Dict:
+        """Tukey's HSD, Duncan's multiple range and LSD tests on treatment means."""
+        return {
+            'tukey': Statistics.tukey_test(
+                means=means, mse=mse, df_error=df_error,
+                n_reps=self._n_reps(), alpha=alpha
+            ),
+            'dmrt': Statistics.dmrt_test(
+                means=means, mse=mse, df_error=df_error,
+                n_reps=self._n_reps(), alpha=alpha
+            ),
+            'lsd': Statistics.lsd_test(
+                means=means, mse=mse, df_error=df_error,
+                n_reps=self._n_reps(), alpha=alpha
+            )
+        }
+
     def plot_means(self, title: str = None, error_bars: bool = True):
         """Plot treatment means with optional error bars."""
         means_data = self._calculate_means()
@@ -161,16 +224,14 @@ class REP:
 
     def tukey_hsd(self, alpha: float = 0.05) -> Dict:
         """Perform Tukey's HSD test."""
-        anova = Statistics.calculate_anova(
-            self.data, self.treatments, self.replications
-        )
+        error_ms, error_df = Statistics.error_term(self._calculate_anova())
         means = self._calculate_means()['means']
         
         return Statistics.tukey_test(
             means=means,
-            mse=anova['ms'][2],
-            df_error=anova['df'][2],
-            n_reps=self.replications,
+            mse=error_ms,
+            df_error=error_df,
+            n_reps=self._n_reps(),
             alpha=alpha
         ) 
 
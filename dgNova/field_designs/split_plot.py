@@ -3,8 +3,11 @@ import numpy as np
 import pandas as pd
 from .replicated_design import REP
 from ..core.statistics import Statistics
-import matplotlib.pyplot as plt
-import seaborn as sns
+from ..io.input import pivot_matrix
+from .._lazy import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
 
 class SplitPlot(REP):
     """
@@ -56,26 +59,41 @@ class SplitPlot(REP):
         block_col : str
             Block column name
         """
+        self.main_treatments = main_treatments
+        self.sub_treatments = sub_treatments
+        self.main_col = main_col
+        self.sub_col = sub_col
+        
         super().__init__(
             data=data,
             treatments=main_treatments * sub_treatments,
             replications=blocks,
             response=response,
-            treatment_col=main_col,  # Will be overridden
+            treatment_col=main_col,
             rep_col=block_col,
             design='split_plot'
         )
         
-        self.main_treatments = main_treatments
-        self.sub_treatments = sub_treatments
-        self.main_col = main_col
-        self.sub_col = sub_col
-        
         # Reshape data if necessary
         if isinstance(self.data, np.ndarray):
             if self.data.shape != (blocks, main_treatments, sub_treatments):
                 self.data = self.data.reshape(blocks, main_treatments, sub_treatments)
                 
+    def _convert_to_matrix(self) -> np.ndarray:
+        """Convert DataFrame to a blocks × (main plots · subplots) matrix."""
+        required_cols = [self.rep_col, self.main_col, self.sub_col, self.response]
+        missing = [col for col in required_cols if col not in self.raw_data.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+        
+        block = pd.factorize(self.raw_data[self.rep_col], sort=True)[0]
+        main = pd.factorize(self.raw_data[self.main_col], sort=True)[0]
+        sub = pd.factorize(self.raw_data[self.sub_col], sort=True)[0]
+        # Every block × main plot × subplot cell must be observed exactly once
+        return pivot_matrix(block, main * self.sub_treatments + sub,
+                            self.raw_data[self.response].to_numpy(dtype=float),
+                            (self.replications, self.treatments))
+        
     def analyze(self) -> Dict:
         """
         Analyze Split-plot experiment.
@@ -1,11 +1,13 @@
 import numpy as np
 from typing import Dict, Union
-import matplotlib.pyplot as plt
 import pandas as pd
-import seaborn as sns
 import scipy.stats as stats
 import warnings
-import matplotlib.animation as animation
+from .._lazy import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
+animation = lazy_import('matplotlib.animation')
 
 class UNREP:
     """
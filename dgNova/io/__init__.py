@@ -1,4 +1,8 @@
 from .input import *
 from .output import *
+from .columnar import read_columnar, write_columnar
+from .loader import load_dataset
 
-__all__ = ['read_data', 'save_results', 'format_anova']
\ No newline at end of file
+__all__ = ['read_data', 'save_results', 'format_anova', 'ResultWriter', 'results_tables',
+           'read_columnar', 'write_columnar',
+           'load_dataset']
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""
+Parquet, Feather and Arrow IPC input and output
+
+Reading goes through pyarrow.dataset, so a single file and a directory of
+(partitioned) files are read the same way, only the requested columns are
+decoded, and row filters are pushed down to skip Parquet row groups and
+partitions that cannot match. pyarrow is an optional dependency
+(``pip install dgNova[arrow]``) imported on first use.
+"""
+import os
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+FORMATS = {
+    'parquet': 'parquet',
+    'pq': 'parquet',
+    'feather': 'feather',
+    'arrow': 'arrow',
+    'ipc': 'arrow'
+}
+
+Filters = Union[Dict[str, object], List[tuple], object]
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+        import pyarrow.feather
+        import pyarrow.ipc
+    except ImportError as error:
+        raise ImportError(
+            "Parquet, Feather and Arrow files need pyarrow: pip install dgNova[arrow]"
+        ) from error
+    return pyarrow
+
+def columnar_format(filepath: str, format: Optional[str] = None) -> str:
+    """
+    Columnar format of a file, from `format` or the file extension
+
+    Returns 'parquet', 'feather' or 'arrow'; raises ValueError otherwise.
+    """
+    key = (format or os.path.splitext(str(filepath))[1].lstrip('.')).lower()
+    if key not in FORMATS:
+        raise ValueError(f"Unsupported columnar format: {format or filepath}")
+    return FORMATS[key]
+
+def _filter_expression(filters: Optional[Filters]):
+    """
+    Arrow expression for row filters
+
+    A dict maps columns to a value (equality) or a list of values
+    (membership); a list of (column, op, value) tuples is a conjunction,
+    and a list of such lists a disjunction of conjunctions, as in
+    pyarrow.parquet. Expressions are passed through.
+    """
+    if filters is None:
+        return None
+    pa = _pyarrow()
+    ds = pa.dataset
+    if isinstance(filters, ds.Expression):
+        return filters
+    if isinstance(filters, dict):
+        expression = None
+        for column, value in filters.items():
+            if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)):
+                term = ds.field(column).isin(list(value))
+            else:
+                term = ds.field(column) == value
+            expression = term if expression is None else expression & term
+        return expression
+    return pa.parquet.filters_to_expression(filters)
+
+def read_table(filepath: str,
+               format: Optional[str] = None,
+               columns: Optional[Sequence[str]] = None,
+               filters: Optional[Filters] = None):
+    """
+    Read a Parquet, Feather or Arrow IPC file (or directory) as an Arrow table
+
+    Parameters
+    ----------
+    filepath : str
+        File or directory of files
+    format : str, optional
+        'parquet', 'feather' or 'arrow' (default: from the extension)
+    columns : Sequence[str], optional
+        Columns to read (default: all)
+    filters : dict, list or pyarrow.dataset.Expression, optional
+        Row filters pushed down to the scan, e.g. {'trial': 'T07',
+        'trait': ['yield', 'height']}; filter columns need not be read
+
+    Returns
+    -------
+    pyarrow.Table
+        The selected rows and columns
+    """
+    pa = _pyarrow()
+    fmt = columnar_format(filepath, format)
+    # Hive-style directories (trial=T07/...) expose their keys as columns
+    dataset = pa.dataset.dataset(filepath, format='parquet' if fmt == 'parquet' else 'ipc',
+                                 partitioning='hive')
+    if columns is not None:
+        missing_cols = [col for col in columns if col not in dataset.schema.names]
+        if missing_cols:
+            raise ValueError(f"Missing required columns: {missing_cols}")
+        columns = list(columns)
+    return dataset.to_table(columns=columns, filter=_filter_expression(filters))
+
+def column_array(table, name: str) -> np.ndarray:
+    """
+    NumPy view of a numeric table column
+
+    Single-chunk columns without nulls are returned without copying;
+    otherwise chunks are concatenated and nulls become NaN.
+    """
+    pa = _pyarrow()
+    column = table.column(name)
+    if column.num_chunks == 1 and column.null_count == 0:
+        try:
+            return column.chunk(0).to_numpy(zero_copy_only=True)
+        except pa.ArrowInvalid:
+            pass
+    return column.to_numpy().astype(float) if column.null_count else column.to_numpy()
+
+def column_categorical(table, name: str) -> pd.Categorical:
+    """
+    Table column as a pandas Categorical
+
+    Codes come from Arrow dictionary encoding (used as stored when the
+    column is already dictionary encoded); nulls get code -1.
+    """
+    pa = _pyarrow()
+    column = table.column(name)
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+    column = column.unify_dictionaries() if column.num_chunks > 1 else column
+    chunks = column.chunks
+    if not chunks:
+        return pd.Categorical([])
+    dictionary = chunks[0].dictionary.to_pandas()
+    codes = np.concatenate([
+        chunk.indices.fill_null(-1).to_numpy(zero_copy_only=False) for chunk in chunks
+    ]).astype(np.int64)
+    return pd.Categorical.from_codes(codes, categories=pd.Index(dictionary))
+
+def read_columnar(filepath: str,
+                  format: Optional[str] = None,
+                  columns: Optional[Sequence[str]] = None,
+                  filters: Optional[Filters] = None,
+                  categorical: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Read a Parquet, Feather or Arrow IPC file as a DataFrame
+
+    Parameters
+    ----------
+    filepath : str
+        File or directory of files
+    format : str, optional
+        'parquet', 'feather' or 'arrow' (default: from the extension)
+    columns : Sequence[str], optional
+        Columns to read (default: all)
+    filters : dict, list or pyarrow.dataset.Expression, optional
+        Row filters pushed down to the scan (see `read_table`)
+    categorical : Sequence[str], optional
+        Columns returned as pandas categoricals
+
+    Returns
+    -------
+    pd.DataFrame
+        The selected rows and columns with their stored dtypes
+    """
+    table = read_table(filepath, format, columns, filters)
+    return table.to_pandas(categories=list(categorical or []))
+
+def write_columnar(frame: pd.DataFrame,
+                   filepath: str,
+                   format: Optional[str] = None,
+                   compression: Optional[str] = 'zstd',
+                   partition_cols: Optional[Sequence[str]] = None) -> None:
+    """
+    Write a DataFrame as Parquet, Feather or Arrow IPC, keeping dtypes
+
+    Parameters
+    ----------
+    frame : pd.DataFrame
+        Table to write (the index is not stored)
+    filepath : str
+        Output file, or directory for a partitioned Parquet dataset
+    format : str, optional
+        'parquet', 'feather' or 'arrow' (default: from the extension)
+    compression : str, optional
+        Codec ('zstd', 'lz4', 'snappy' for Parquet, or None)
+    partition_cols : Sequence[str], optional
+        Parquet only: write a directory partitioned by these columns, so
+        filtered reads skip whole files
+    """
+    pa = _pyarrow()
+    fmt = columnar_format(filepath, format)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    if fmt == 'parquet':
+        if partition_cols:
+            pa.parquet.write_to_dataset(table, filepath, partition_cols=list(partition_cols),
+                                        compression=compression)
+        else:
+            pa.parquet.write_table(table, filepath, compression=compression)
+        return
+    if partition_cols:
+        raise ValueError("Partitioned output is only supported for Parquet")
+    if fmt == 'feather':
+        pa.feather.write_feather(table, filepath,
+                                 compression=compression or 'uncompressed')
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.OSFile(str(filepath), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
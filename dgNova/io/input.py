@@ -1,70 +1,185 @@
 import pandas as pd
 import numpy as np
+from pandas.api.types import union_categoricals
 from typing import Union, Tuple, Optional
+from .columnar import FORMATS, Filters, read_table, column_array, column_categorical
 
-def read_data(filepath: str, 
+def _read_columns(filepath: str,
+                  format: str,
+                  factor_cols: list,
+                  response_col: str,
+                  chunksize: Optional[int]) -> pd.DataFrame:
+    """
+    Read only the factor and response columns, factors as categoricals
+
+    Text files read in chunks of `chunksize` rows keep one chunk of raw
+    text in memory at a time; factor categories of the chunks are merged.
+    """
+    columns = factor_cols + [response_col]
+    fmt = format.lower()
+    if fmt == 'excel':
+        df = pd.read_excel(filepath)
+        missing_cols = [col for col in columns if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Missing required columns: {missing_cols}")
+        df = df[columns]
+        return df.astype({col: 'category' for col in factor_cols})
+    if fmt not in ('csv', 'txt'):
+        raise ValueError(f"Unsupported file format: {format}")
+
+    reader = pd.read_csv if fmt == 'csv' else pd.read_table
+    header = reader(filepath, nrows=0).columns
+    missing_cols = [col for col in columns if col not in header]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+
+    dtypes = {col: 'category' for col in factor_cols}
+    dtypes[response_col] = 'float64'
+    if chunksize is None:
+        return reader(filepath, usecols=columns, dtype=dtypes)
+
+    chunks = list(reader(filepath, usecols=columns, dtype=dtypes, chunksize=chunksize))
+    if not chunks:
+        return reader(filepath, usecols=columns, dtype=dtypes)
+    frame = {col: union_categoricals([chunk[col] for chunk in chunks])
+             for col in factor_cols}
+    frame[response_col] = np.concatenate([chunk[response_col].to_numpy() for chunk in chunks])
+    return pd.DataFrame(frame)
+
+def _factor_codes(column: pd.Series) -> Tuple[np.ndarray, list]:
+    """Integer codes of a factor column and its levels in sorted order"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        categories = column.cat.categories
+        # Categories read from text are strings; order numeric labels by value
+        numeric = pd.to_numeric(categories, errors='coerce')
+        levels = numeric if not np.isnan(np.asarray(numeric, dtype=float)).any() else categories
+        order = np.argsort(np.asarray(levels), kind='stable')
+        rank = np.empty(order.size, dtype=np.int64)
+        rank[order] = np.arange(order.size)
+        codes = column.cat.codes.to_numpy()
+        if np.any(codes < 0):
+            raise ValueError(f"Column '{column.name}' has missing factor levels")
+        return rank[codes], list(np.asarray(levels)[order])
+    codes, uniques = pd.factorize(column, sort=True)
+    if np.any(codes < 0):
+        raise ValueError(f"Column '{column.name}' has missing factor levels")
+    return codes, list(uniques)
+
+def pivot_matrix(rows: np.ndarray,
+                 cols: np.ndarray,
+                 values: np.ndarray,
+                 shape: Tuple[int, int],
+                 allow_missing: bool = False) -> np.ndarray:
+    """
+    Scatter long-format observations into a (rows, columns) matrix
+
+    Parameters
+    ----------
+    rows, cols : np.ndarray
+        0-based row and column codes of every observation
+    values : np.ndarray
+        Observations
+    shape : Tuple[int, int]
+        Matrix shape
+    allow_missing : bool
+        Leave cells without an observation as NaN instead of raising
+
+    Returns
+    -------
+    np.ndarray
+        Matrix with one observation per cell
+    """
+    flat = np.asarray(rows, dtype=np.int64) * shape[1] + np.asarray(cols, dtype=np.int64)
+    counts = np.bincount(flat, minlength=shape[0] * shape[1])
+    for label, bad in (('Multiple', counts > 1),
+                       ('Missing', None if allow_missing else counts == 0)):
+        if bad is not None and bad.any():
+            cells = np.argwhere(bad.reshape(shape))
+            shown = ', '.join(f"({i}, {j})" for i, j in cells[:5])
+            raise ValueError(
+                f"Invalid data: {label} values for {len(cells)} block × treatment "
+                f"cells, e.g. {shown}"
+            )
+    matrix = np.full(shape, np.nan)
+    matrix.ravel()[flat] = values
+    return matrix
+
+def read_data(filepath: Union[str, pd.DataFrame],
               format: str = 'csv',
               treatment_col: str = 'treatment',
               block_col: str = 'block',
-              response_col: str = 'response') -> Tuple[np.ndarray, dict]:
+              response_col: str = 'response',
+              chunksize: Optional[int] = None,
+              allow_missing: bool = False,
+              filters: Optional[Filters] = None) -> Tuple[np.ndarray, dict]:
     """
     Read experimental data from file
-    
+
+    The blocks × treatments matrix is built in one scatter from factor
+    codes; duplicated and missing cells are found from bincount counts.
+    Columnar files read only the three columns, with `filters` pushed
+    down to the scan (e.g. one trial and trait of a season archive).
+
     Parameters
     ----------
-    filepath : str
-        Path to data file
+    filepath : Union[str, pd.DataFrame]
+        Path to data file, or a long-format DataFrame
     format : str
-        File format ('csv', 'excel', or 'txt')
+        File format ('csv', 'excel', 'txt', 'parquet', 'feather' or 'arrow')
     treatment_col : str
         Name of treatment column
     block_col : str
         Name of block column
     response_col : str
         Name of response variable column
-        
+    chunksize : int, optional
+        Read text files this many rows at a time to bound memory
+    allow_missing : bool
+        Keep absent block × treatment cells as NaN (missing plots)
+        instead of raising
+    filters : dict, list or pyarrow.dataset.Expression, optional
+        Row filters for columnar formats, e.g. {'trial': 'T07'} (see
+        `dgNova.io.columnar.read_table`)
+
     Returns
     -------
     Tuple[np.ndarray, dict]
         Data array and metadata dictionary
     """
-    if format.lower() == 'csv':
-        df = pd.read_csv(filepath)
-    elif format.lower() == 'excel':
-        df = pd.read_excel(filepath)
-    elif format.lower() == 'txt':
-        df = pd.read_table(filepath)
+    factor_cols = [block_col, treatment_col]
+    if isinstance(filepath, pd.DataFrame):
+        required_cols = [treatment_col, block_col, response_col]
+        missing_cols = [col for col in required_cols if col not in filepath.columns]
+        if missing_cols:
+            raise ValueError(f"Missing required columns: {missing_cols}")
+        columns = {col: filepath[col] for col in factor_cols}
+        values = filepath[response_col].to_numpy(dtype=float)
+    elif format.lower() in FORMATS:
+        table = read_table(filepath, format, factor_cols + [response_col], filters)
+        columns = {col: pd.Series(column_categorical(table, col), name=col)
+                   for col in factor_cols}
+        values = column_array(table, response_col)
     else:
-        raise ValueError(f"Unsupported file format: {format}")
-        
-    # Verify required columns exist
-    required_cols = [treatment_col, block_col, response_col]
-    missing_cols = [col for col in required_cols if col not in df.columns]
-    if missing_cols:
-        raise ValueError(f"Missing required columns: {missing_cols}")
-        
-    # Get dimensions
-    treatments = df[treatment_col].nunique()
-    blocks = df[block_col].nunique()
-    
-    # Create data array
-    data = np.zeros((blocks, treatments))
-    for i, block in enumerate(sorted(df[block_col].unique())):
-        for j, treatment in enumerate(sorted(df[treatment_col].unique())):
-            mask = (df[block_col] == block) & (df[treatment_col] == treatment)
-            if mask.sum() != 1:
-                raise ValueError(
-                    f"Invalid data: Multiple or missing values for block {block}, treatment {treatment}"
-                )
-            data[i, j] = df.loc[mask, response_col].iloc[0]
-            
+        if filters is not None:
+            raise ValueError("Row filters need a columnar format (parquet, feather, arrow)")
+        df = _read_columns(filepath, format, factor_cols, response_col, chunksize)
+        columns = {col: df[col] for col in factor_cols}
+        values = df[response_col].to_numpy(dtype=float)
+
+    block_codes, block_levels = _factor_codes(columns[block_col])
+    treatment_codes, treatment_levels = _factor_codes(columns[treatment_col])
+    blocks, treatments = len(block_levels), len(treatment_levels)
+
+    data = pivot_matrix(block_codes, treatment_codes, values,
+                        (blocks, treatments), allow_missing=allow_missing)
+
     # Create metadata
     metadata = {
         'treatments': treatments,
         'blocks': blocks,
-        'treatment_levels': sorted(df[treatment_col].unique()),
-        'block_levels': sorted(df[block_col].unique()),
+        'treatment_levels': treatment_levels,
+        'block_levels': block_levels,
         'response_variable': response_col
     }
-    
-    return data, metadata 
\ No newline at end of file
+
+    return data, metadata
@@ -0,0 +1,179 @@
+"""
+Concurrent loading of many trial files into one long DataFrame
+
+Files are read on a thread pool, one task per file (all sheets of a
+workbook in one pass). Column names are normalized and mapped onto the
+treatment / block / response schema, and the pieces are concatenated
+with factor columns encoded as categoricals.
+"""
+import os
+import re
+import glob
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from .columnar import FORMATS, read_columnar
+from ..core.parallel import map_tasks
+
+# Normalized column names recognized for each schema column
+ALIASES = {
+    'treatment': ['treatment', 'trt', 'genotype', 'geno', 'entry', 'variety', 'line'],
+    'block': ['block', 'blk', 'rep', 'replication', 'replicate'],
+    'response': ['response', 'value', 'yield', 'y']
+}
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm', '.xls')
+TEXT_EXTENSIONS = ('.csv', '.txt', '.tsv')
+
+def normalize_column(name) -> str:
+    """Lower-case column name with runs of non-alphanumerics replaced by '_'"""
+    return re.sub(r'[^0-9a-z]+', '_', str(name).strip().lower()).strip('_')
+
+def _expand(sources: Union[str, Sequence[str]]) -> List[str]:
+    """Files matching the given paths or glob patterns, in order, without repeats"""
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    files = []
+    for source in sources:
+        source = os.fspath(source)
+        matches = sorted(glob.glob(source)) if glob.has_magic(source) else [source]
+        files.extend(matches)
+    return list(dict.fromkeys(files))
+
+def _excel_engine() -> Optional[str]:
+    """The Rust-based calamine reader when installed, else pandas' default"""
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return None
+    return 'calamine'
+
+def _read_file(path: str, sheets: Optional[Sequence[str]]) -> Dict[str, pd.DataFrame]:
+    """Frames of one file keyed by sheet name ('' for single-table files)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in EXCEL_EXTENSIONS:
+        frames = pd.read_excel(path, sheet_name=list(sheets) if sheets else None,
+                               engine=_excel_engine())
+        return {str(name): frame for name, frame in frames.items()}
+    if extension in TEXT_EXTENSIONS:
+        return {'': pd.read_csv(path, sep=',' if extension == '.csv' else '\t')}
+    if extension.lstrip('.') in FORMATS:
+        return {'': read_columnar(path)}
+    raise ValueError(f"Unsupported file format: {extension or path}")
+
+def _schema_columns(frame: pd.DataFrame, aliases: Dict[str, List[str]]) -> Dict[str, str]:
+    """Schema column -> original column name of a frame"""
+    normalized = {}
+    for column in frame.columns:
+        normalized.setdefault(normalize_column(column), column)
+    mapping = {}
+    for target, names in aliases.items():
+        found = [normalized[name] for name in names if name in normalized]
+        if not found:
+            raise ValueError(f"No column for '{target}' (looked for {names})")
+        mapping[target] = found[0]
+    return mapping
+
+def _load_task(task: tuple) -> dict:
+    path, sheets, aliases, keep_extra = task
+    start = time.perf_counter()
+    report = {'source': path, 'sheets': 0, 'rows': 0, 'seconds': 0.0, 'error': None}
+    pieces = []
+    try:
+        for sheet, frame in _read_file(path, sheets).items():
+            mapping = _schema_columns(frame, aliases)
+            piece = pd.DataFrame({target: frame[column] for target, column in mapping.items()})
+            if keep_extra:
+                used = set(mapping.values())
+                for column in frame.columns:
+                    name = normalize_column(column)
+                    if column not in used and name not in piece:
+                        piece[name] = frame[column]
+            piece['source'] = os.path.basename(path)
+            piece['sheet'] = sheet
+            pieces.append(piece)
+            report['rows'] += len(piece)
+        report['sheets'] = len(pieces)
+    except Exception as error:
+        report['error'] = f"{type(error).__name__}: {error}"
+        pieces = []
+    report['seconds'] = time.perf_counter() - start
+    return {'pieces': pieces, 'report': report}
+
+def _concat(pieces: List[pd.DataFrame], categorical: Sequence[str]) -> pd.DataFrame:
+    """Concatenate pieces, merging factor columns as categoricals"""
+    columns = list(dict.fromkeys(column for piece in pieces for column in piece.columns))
+    frame = {}
+    for column in columns:
+        parts = [piece[column] if column in piece else pd.Series(np.nan, index=piece.index)
+                 for piece in pieces]
+        if column in categorical:
+            try:
+                frame[column] = union_categoricals([pd.Categorical(part) for part in parts])
+            except TypeError:
+                # Levels typed differently across files (e.g. 1 and '1')
+                frame[column] = union_categoricals([
+                    pd.Categorical(part.astype(str).where(part.notna())) for part in parts
+                ])
+        else:
+            frame[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(frame)
+
+def load_dataset(sources: Union[str, Sequence[str]],
+                 sheets: Optional[Sequence[str]] = None,
+                 aliases: Optional[Dict[str, List[str]]] = None,
+                 keep_extra: bool = False,
+                 n_jobs: int = -1,
+                 errors: str = 'report') -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Load many trial files (CSV, Excel workbooks, columnar) concurrently
+
+    Parameters
+    ----------
+    sources : str or Sequence[str]
+        File paths and/or glob patterns, e.g. 'trials/*.xlsx'
+    sheets : Sequence[str], optional
+        Workbook sheets to read (default: all sheets)
+    aliases : Dict[str, List[str]], optional
+        Extra normalized column names for 'treatment', 'block' and
+        'response', searched before the built-in `ALIASES`
+    keep_extra : bool
+        Keep columns outside the schema (with normalized names)
+    n_jobs : int
+        Reader threads (1 reads serially, -1 uses the executor default)
+    errors : str
+        'report' records failing files in the report and skips them,
+        'raise' raises the first failure
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, pd.DataFrame]
+        Long DataFrame (treatment, block, response, source, sheet; factor
+        columns categorical, response float) and a per-file report with
+        sheets, rows, read seconds and error
+    """
+    if errors not in ('report', 'raise'):
+        raise ValueError("errors must be 'report' or 'raise'")
+    files = _expand(sources)
+    if not files:
+        raise ValueError(f"No files match {sources}")
+    names = {target: list(dict.fromkeys((aliases or {}).get(target, []) + default))
+             for target, default in ALIASES.items()}
+    tasks = [(path, sheets, names, keep_extra) for path in files]
+    results = map_tasks(_load_task, tasks, n_jobs, threads=True)
+
+    report = pd.DataFrame([result['report'] for result in results],
+                          columns=['source', 'sheets', 'rows', 'seconds', 'error'])
+    failed = report[report['error'].notna()]
+    if errors == 'raise' and len(failed):
+        raise ValueError(f"Could not load {failed['source'].iloc[0]}: {failed['error'].iloc[0]}")
+
+    pieces = [piece for result in results for piece in result['pieces']]
+    if not pieces:
+        raise ValueError("No data loaded; see the errors in the report:\n" +
+                         report.to_string(index=False))
+    data = _concat(pieces, ['treatment', 'block', 'source', 'sheet'])
+    data['response'] = pd.to_numeric(data['response'], errors='coerce').astype(float)
+    return data, report
@@ -1,67 +1,330 @@
+"""
+Writing analysis results
+
+Tables keep their numeric types; rounding and number formats are applied
+only where results are presented (Excel cell formats, `digits`).
+`ResultWriter` streams the tables of many trials into one workbook or
+dataset: Excel through xlsxwriter in constant-memory mode (openpyxl
+write-only mode when xlsxwriter is not installed), CSV and JSON Lines by
+appending, Parquet and Arrow by adding row groups / record batches.
+"""
+import os
+import numpy as np
 import pandas as pd
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
+from .columnar import FORMATS, columnar_format, write_columnar, _pyarrow
+
+ANOVA_COLUMNS = {
+    'source': 'Source',
+    'df': 'DF',
+    'ss': 'SS',
+    'ms': 'MS',
+    'f_value': 'F value',
+    'p_value': 'Pr(>F)'
+}
+
+# Output formats whose tables go to one file per table in a directory
+_EXTENSIONS = {'csv': 'csv', 'json': 'jsonl', 'parquet': 'parquet',
+               'feather': 'feather', 'arrow': 'arrow'}
 
-def format_anova(anova_results: Dict) -> pd.DataFrame:
+def format_anova(anova_results: Dict, digits: Optional[int] = None) -> pd.DataFrame:
     """
     Format ANOVA results as a pandas DataFrame
-    
+
     Parameters
     ----------
     anova_results : Dict
         ANOVA results from RCBD analysis
-        
+    digits : int, optional
+        Round the floating-point columns for display; by default values
+        are kept at full precision
+
     Returns
     -------
     pd.DataFrame
-        Formatted ANOVA table
+        ANOVA table with numeric columns (NaN where a value does not apply)
     """
     df = pd.DataFrame({
-        'Source': anova_results['source'],
-        'DF': anova_results['df'],
-        'SS': anova_results['ss'],
-        'MS': anova_results['ms'],
-        'F value': anova_results['f_value'],
-        'Pr(>F)': anova_results['p_value']
+        title: (np.array(anova_results[key], dtype=float) if key not in ('source', 'df')
+                else anova_results[key])
+        for key, title in ANOVA_COLUMNS.items()
     })
-    
-    # Format numeric columns
-    df['SS'] = df['SS'].map(lambda x: f"{x:.4f}" if pd.notnull(x) else '')
-    df['MS'] = df['MS'].map(lambda x: f"{x:.4f}" if pd.notnull(x) else '')
-    df['F value'] = df['F value'].map(lambda x: f"{x:.4f}" if pd.notnull(x) else '')
-    df['Pr(>F)'] = df['Pr(>F)'].map(lambda x: f"{x:.4f}" if pd.notnull(x) else '')
-    
+    if digits is not None:
+        df = df.round({title: digits for key, title in ANOVA_COLUMNS.items()
+                       if key not in ('source', 'df')})
     return df
 
+def results_tables(results: Dict,
+                   labels: Optional[list] = None,
+                   comparisons: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Tables of an `analyze()` result: ANOVA, treatment means and,
+    optionally, the pairwise comparisons of one test
+
+    Parameters
+    ----------
+    results : Dict
+        Results of a design's `analyze()`
+    labels : list, optional
+        Treatment labels (default 1..t)
+    comparisons : str, optional
+        Test whose comparisons are added ('tukey', 'dmrt' or 'lsd')
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        Tables keyed by name ('ANOVA', 'Means', 'Comparisons')
+    """
+    tables = {}
+    if 'anova' in results:
+        tables['ANOVA'] = format_anova(results['anova'])
+    if 'means' in results:
+        means = np.asarray(results['means'], dtype=float)
+        frame = {'Treatment': labels if labels is not None else np.arange(1, means.size + 1),
+                 'Mean': means}
+        if 'standard_errors' in results:
+            frame['SE'] = np.broadcast_to(np.asarray(results['standard_errors'], dtype=float),
+                                          means.shape)
+        for test in ('tukey', 'dmrt', 'lsd'):
+            if isinstance(results.get(test), dict) and 'groups' in results[test]:
+                frame[test.upper() if test != 'tukey' else 'Tukey'] = results[test]['groups']
+        tables['Means'] = pd.DataFrame(frame)
+    if comparisons is not None:
+        pairs = results[comparisons]['comparisons']
+        frame = pairs.to_frame()
+        if labels is not None:
+            names = np.asarray(labels, dtype=object)
+            frame = frame.assign(treatment1=names[pairs.first], treatment2=names[pairs.second])
+        tables['Comparisons'] = frame
+    return tables
+
+class _ExcelSink:
+    """Row-streaming workbook: xlsxwriter constant memory or openpyxl write-only"""
+
+    def __init__(self, path: str, float_format: Optional[str]):
+        self.float_format = float_format
+        self.sheets = {}
+        try:
+            import xlsxwriter
+        except ImportError:
+            from openpyxl import Workbook
+            self.engine = 'openpyxl'
+            self.book = Workbook(write_only=True)
+            self.path = path
+        else:
+            self.engine = 'xlsxwriter'
+            self.book = xlsxwriter.Workbook(path, {'constant_memory': True})
+            self.number = self.book.add_format({'num_format': float_format}) \
+                if float_format else None
+
+    def append(self, name: str, frame: pd.DataFrame) -> None:
+        if name not in self.sheets:
+            if self.engine == 'xlsxwriter':
+                sheet = self.book.add_worksheet(name)
+                if self.number is not None:
+                    # Column formats apply to every cell written without one
+                    for j, dtype in enumerate(frame.dtypes):
+                        if pd.api.types.is_float_dtype(dtype):
+                            sheet.set_column(j, j, None, self.number)
+            else:
+                sheet = self.book.create_sheet(name)
+            self.sheets[name] = [sheet, 0]
+            self._row(name, list(frame.columns))
+        rows = frame.astype(object).where(frame.notna(), None)
+        for row in rows.itertuples(index=False, name=None):
+            self._row(name, row)
+
+    def _row(self, name: str, values) -> None:
+        sheet, row = self.sheets[name]
+        if self.engine == 'xlsxwriter':
+            sheet.write_row(row, 0, values)
+        else:
+            sheet.append(list(values))
+        self.sheets[name][1] = row + 1
+
+    def close(self) -> None:
+        if self.engine == 'xlsxwriter':
+            self.book.close()
+        else:
+            self.book.save(self.path)
+
+class ResultWriter:
+    """
+    Incremental writer of result tables for one or many trials
+
+    Every call to `write` appends the rows of each named table (with an
+    optional leading 'Trial' column), so the results of many trials are
+    streamed into one workbook (a sheet per table) or one dataset
+    directory (a file per table) without being held in memory together.
+    The columns of a table are fixed by its first write.
+
+    Examples
+    --------
+    >>> with ResultWriter('season.xlsx') as writer:
+    ...     for name, trial in trials.items():
+    ...         writer.write_results(trial.analyze(), trial=name)
+    """
+
+    def __init__(self,
+                 path: str,
+                 format: Optional[str] = None,
+                 float_format: Optional[str] = '0.0000',
+                 compression: Optional[str] = 'zstd'):
+        """
+        Parameters
+        ----------
+        path : str
+            Workbook file for Excel, otherwise a directory receiving
+            `<table>.<ext>` files
+        format : str, optional
+            'excel', 'csv', 'json' (JSON Lines), 'parquet', 'feather' or
+            'arrow'; by default 'excel' for .xlsx paths
+        float_format : str, optional
+            Excel number format of floating-point columns (presentation
+            only; stored values keep full precision)
+        compression : str, optional
+            Codec of Parquet and Arrow outputs
+        """
+        if format is None:
+            if os.path.splitext(path)[1].lower() not in ('.xlsx', '.xlsm'):
+                raise ValueError("Output format is required unless the path is an .xlsx file")
+            format = 'excel'
+        format = format.lower()
+        if format in FORMATS:
+            format = columnar_format(path, format)
+        if format != 'excel' and format not in _EXTENSIONS:
+            raise ValueError(f"Unsupported output format: {format}")
+        self.path = path
+        self.format = format
+        self.compression = compression
+        self.columns = {}
+        self._writers = {}
+        self._schemas = {}
+        if format == 'excel':
+            self._excel = _ExcelSink(path, float_format)
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def write(self,
+              tables: Union[Dict[str, pd.DataFrame], pd.DataFrame],
+              trial: Optional[str] = None,
+              name: str = 'Results') -> None:
+        """
+        Append tables (name -> DataFrame, or one DataFrame called `name`)
+
+        Parameters
+        ----------
+        tables : Dict[str, pd.DataFrame] or pd.DataFrame
+            Tables to append
+        trial : str, optional
+            Value of a leading 'Trial' column identifying the source trial
+        name : str
+            Table name of a single DataFrame
+        """
+        if isinstance(tables, pd.DataFrame):
+            tables = {name: tables}
+        for table, frame in tables.items():
+            frame = frame.reset_index(drop=True)
+            if trial is not None:
+                frame.insert(0, 'Trial', trial)
+            if table in self.columns:
+                extra = [c for c in frame.columns if c not in self.columns[table]]
+                if extra:
+                    raise ValueError(f"Columns {extra} not in the first '{table}' table")
+                frame = frame.reindex(columns=self.columns[table])
+            else:
+                self.columns[table] = list(frame.columns)
+            self._append(table, frame)
+
+    def write_results(self, results: Dict, trial: Optional[str] = None, **options) -> None:
+        """Append the tables of an `analyze()` result (see `results_tables`)"""
+        self.write(results_tables(results, **options), trial=trial)
+
+    def _append(self, table: str, frame: pd.DataFrame) -> None:
+        if self.format == 'excel':
+            self._excel.append(table, frame)
+            return
+        file = os.path.join(self.path, f"{table}.{_EXTENSIONS[self.format]}")
+        if self.format == 'csv':
+            first = table not in self._writers
+            if first:
+                self._writers[table] = open(file, 'w', newline='', encoding='utf-8')
+            frame.to_csv(self._writers[table], header=first, index=False)
+        elif self.format == 'json':
+            if table not in self._writers:
+                self._writers[table] = open(file, 'w', encoding='utf-8')
+            if len(frame):
+                # Older pandas versions omit the final newline of JSON Lines
+                text = frame.to_json(orient='records', lines=True)
+                self._writers[table].write(text if text.endswith('\n') else text + '\n')
+        else:
+            pa = _pyarrow()
+            writer = self._writers.get(table)
+            data = pa.Table.from_pandas(frame, schema=self._schemas.get(table),
+                                        preserve_index=False)
+            if writer is None:
+                self._schemas[table] = data.schema
+                if self.format == 'parquet':
+                    writer = pa.parquet.ParquetWriter(file, data.schema,
+                                                      compression=self.compression)
+                else:
+                    options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                    writer = pa.ipc.new_file(file, data.schema, options=options)
+                self._writers[table] = writer
+            writer.write_table(data)
+
+    def close(self) -> None:
+        """Finish all files"""
+        if self.format == 'excel':
+            self._excel.close()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def __enter__(self) -> 'ResultWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
 def save_results(filepath: str,
-                 anova_table: pd.DataFrame,
+                 anova_table: Union[pd.DataFrame, Dict],
                  means_table: pd.DataFrame,
                  format: str = 'excel') -> None:
     """
     Save analysis results to file
-    
+
     Parameters
     ----------
     filepath : str
         Output file path
-    anova_table : pd.DataFrame
-        ANOVA results table
+    anova_table : pd.DataFrame or Dict
+        ANOVA results table (or the ANOVA dict of an analysis)
     means_table : pd.DataFrame
         Treatment means and groups table
     format : str
-        Output format ('excel' or 'csv')
+        Output format ('excel', 'csv', 'json', 'parquet', 'feather' or
+        'arrow'). Excel writes an 'ANOVA' and a 'Means' sheet; the other
+        formats write `<name>_anova<ext>` and `<name>_means<ext>` (JSON
+        as JSON Lines), so every table keeps its own columns and types.
+        Use `ResultWriter` to stream many trials.
     """
-    if format.lower() == 'excel':
-        with pd.ExcelWriter(filepath) as writer:
-            anova_table.to_excel(writer, sheet_name='ANOVA', index=False)
-            means_table.to_excel(writer, sheet_name='Means', index=False)
-    elif format.lower() == 'csv':
-        # For CSV, combine tables with a separator
-        pd.concat([
-            pd.DataFrame({'': ['ANOVA Results']}),
-            anova_table,
-            pd.DataFrame({'': ['']}),
-            pd.DataFrame({'': ['Treatment Means']}),
-            means_table
-        ]).to_csv(filepath, index=False)
+    if isinstance(anova_table, dict):
+        anova_table = format_anova(anova_table)
+    tables = {'ANOVA': anova_table, 'Means': means_table}
+    fmt = format.lower()
+    if fmt == 'excel':
+        with ResultWriter(filepath, format='excel') as writer:
+            writer.write(tables)
+    elif fmt in ('csv', 'json') or fmt in FORMATS:
+        root, ext = os.path.splitext(filepath)
+        for name, table in tables.items():
+            path = f"{root}_{name.lower()}{ext}"
+            if fmt == 'csv':
+                table.to_csv(path, index=False)
+            elif fmt == 'json':
+                table.to_json(path, orient='records', lines=True)
+            else:
+                write_columnar(table, path, format=format)
     else:
-        raise ValueError(f"Unsupported output format: {format}") 
\ No newline at end of file
+        raise ValueError(f"Unsupported output format: {format}")
@@ -1,3 +1,8 @@
 from .diallel import DIALLEL
+from .multi_env import MultiEnvDiallel
+from .line_tester import LineTester, NCII
+from .simulation import DiallelSimulator
+from .crossing import plan_crosses, cross_values
 
-__all__ = ['DIALLEL']
+__all__ = ['DIALLEL', 'MultiEnvDiallel', 'LineTester', 'NCII', 'DiallelSimulator',
+           'plan_crosses', 'cross_values']
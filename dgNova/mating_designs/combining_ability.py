@@ -0,0 +1,66 @@
+from typing import Dict, Tuple
+import numpy as np
+
+def cell_moments(codes: np.ndarray, values: np.ndarray, size: int) -> Dict:
+    """
+    Grouped sums of observations by integer cell code
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        Cell code (0 <= code < size) of every observation
+    values : np.ndarray
+        Observed values
+    size : int
+        Number of cells
+
+    Returns
+    -------
+    Dict
+        Per-cell 'sums', 'counts' and 'means' (zero for empty cells),
+        the 'observed' mask, and the pooled within-cell 'error_ss' and
+        'error_df'
+    """
+    values = np.asarray(values, dtype=float)
+    sums = np.bincount(codes, weights=values, minlength=size)
+    counts = np.bincount(codes, minlength=size)
+    squares = np.bincount(codes, weights=values**2, minlength=size)
+
+    observed = counts > 0
+    means = np.zeros(size)
+    means[observed] = sums[observed] / counts[observed]
+    return {
+        'sums': sums,
+        'counts': counts,
+        'means': means,
+        'observed': observed,
+        'error_ss': float(np.sum(squares[observed]) -
+                          np.sum(sums[observed]**2 / counts[observed])),
+        'error_df': int(np.sum(counts[observed] - 1))
+    }
+
+def rectangular_effects(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Combining ability effects of a stack of rows × columns cross tables
+
+    Row and column GCA are deviations of the marginal means from the
+    grand mean; SCA is the interaction residual.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Cross means of shape (..., rows, cols)
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Row GCA (..., rows), column GCA (..., cols) and SCA (..., rows, cols)
+    """
+    grand_mean = np.mean(data, axis=(-2, -1))
+    row_means = np.mean(data, axis=-1)
+    col_means = np.mean(data, axis=-2)
+    row_gca = row_means - grand_mean[..., None]
+    col_gca = col_means - grand_mean[..., None]
+    sca = (data - row_means[..., :, None] - col_means[..., None, :] +
+           grand_mean[..., None, None])
+    return row_gca, col_gca, sca
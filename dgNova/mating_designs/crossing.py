@@ -0,0 +1,227 @@
+from typing import Optional, Dict, Union
+import numpy as np
+
+def cross_values(gca: np.ndarray, sca: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Predicted cross values GCA_i + GCA_j + SCA_ij
+
+    Parameters
+    ----------
+    gca : np.ndarray
+        GCA effects of shape (n,)
+    sca : np.ndarray, optional
+        SCA effects of shape (n, n); reciprocal crosses are averaged
+
+    Returns
+    -------
+    np.ndarray
+        Symmetric matrix of predicted values of shape (n, n)
+    """
+    gca = np.asarray(gca, dtype=float)
+    values = gca[:, None] + gca[None, :]
+    if sca is not None:
+        sca = np.asarray(sca, dtype=float)
+        values = values + (sca + sca.T) / 2
+    return values
+
+def plan_crosses(values: np.ndarray,
+                 n_crosses: int,
+                 max_uses: Optional[Union[int, np.ndarray]] = None,
+                 candidates: Optional[np.ndarray] = None,
+                 relationship: Optional[np.ndarray] = None,
+                 max_relationship: Optional[float] = None,
+                 labels: Optional[list] = None,
+                 improve: bool = True,
+                 max_iter: int = 1000) -> Dict:
+    """
+    Select a mating plan that maximizes the total predicted cross value.
+
+    Crosses are first taken greedily in descending value order while both
+    parents have uses left. The plan is then improved by local search:
+    replacing a selected cross with a better unselected one that fits the
+    usage limits, and rewiring two selected crosses (a×b, c×d) into
+    (a×c, b×d) or (a×d, b×c), which keeps every parent's usage unchanged.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Predicted values of shape (n, n); cross i×j (i < j) uses
+        values[i, j]. Non-finite values mark unavailable crosses.
+    n_crosses : int
+        Number of crosses to select
+    max_uses : int or np.ndarray, optional
+        Maximum number of crosses per parent (scalar or one per parent)
+    candidates : np.ndarray, optional
+        Boolean (n, n) matrix of allowed crosses
+    relationship : np.ndarray, optional
+        Relationship (e.g. kinship) matrix of shape (n, n)
+    max_relationship : float, optional
+        Crosses between parents related above this value are excluded
+    labels : list, optional
+        Parent labels used for the cross names
+    improve : bool
+        Whether to run the local search after the greedy pass
+    max_iter : int
+        Maximum number of local search moves
+
+    Returns
+    -------
+    Dict
+        'pairs' (row and column index arrays), cross names, their 'value',
+        the 'total' value, 'uses' per parent, whether the plan is
+        'complete' and the number of local search 'improvements'
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim != 2 or values.shape[0] != values.shape[1]:
+        raise ValueError(f"values must be a square matrix, got shape {values.shape}")
+    n = values.shape[0]
+    if n_crosses < 1:
+        raise ValueError("n_crosses must be at least 1")
+    if labels is None:
+        labels = [f"P{i+1}" for i in range(n)]
+
+    feasible = np.triu(np.isfinite(values), k=1)
+    if candidates is not None:
+        candidates = np.asarray(candidates, dtype=bool)
+        feasible &= candidates | candidates.T
+    if relationship is not None:
+        if max_relationship is None:
+            raise ValueError("max_relationship is required with a relationship matrix")
+        feasible &= np.asarray(relationship) <= max_relationship
+
+    if max_uses is None:
+        capacity = np.full(n, n_crosses, dtype=int)
+    else:
+        capacity = np.broadcast_to(np.asarray(max_uses, dtype=int), (n,)).copy()
+        if np.any(capacity < 0):
+            raise ValueError("max_uses must be non-negative")
+
+    pi, pj = np.nonzero(feasible)
+    v = values[pi, pj]
+    chosen = _greedy(pi, pj, v, capacity, n_crosses)
+
+    improvements = 0
+    if improve and len(chosen):
+        chosen, improvements = _local_search(pi, pj, v, n, capacity, chosen, max_iter)
+
+    chosen = chosen[np.argsort(-v[chosen], kind='stable')]
+    p1, p2 = pi[chosen], pj[chosen]
+    uses = np.bincount(np.concatenate([p1, p2]), minlength=n)
+    return {
+        'pairs': (p1, p2),
+        'crosses': [f"{labels[i]} × {labels[j]}" for i, j in zip(p1, p2)],
+        'value': v[chosen],
+        'total': float(np.sum(v[chosen])),
+        'uses': uses,
+        'complete': len(chosen) == n_crosses,
+        'improvements': improvements
+    }
+
+def _greedy(pi: np.ndarray, pj: np.ndarray, v: np.ndarray,
+            capacity: np.ndarray, n_crosses: int) -> np.ndarray:
+    """Take crosses in descending value order while both parents have uses left"""
+    order = np.argsort(-v, kind='stable')
+    remaining = capacity.copy()
+    chosen = []
+    block = max(4 * n_crosses, 1024)
+
+    for start in range(0, order.size, block):
+        # Drop crosses of exhausted parents a block at a time
+        idx = order[start:start + block]
+        idx = idx[(remaining[pi[idx]] > 0) & (remaining[pj[idx]] > 0)]
+        left = remaining.tolist()
+        for k, a, b in zip(idx.tolist(), pi[idx].tolist(), pj[idx].tolist()):
+            if left[a] > 0 and left[b] > 0:
+                chosen.append(k)
+                left[a] -= 1
+                left[b] -= 1
+                if len(chosen) == n_crosses:
+                    break
+        remaining = np.array(left)
+        if len(chosen) == n_crosses:
+            break
+    return np.array(chosen, dtype=np.intp)
+
+def _local_search(pi: np.ndarray, pj: np.ndarray, v: np.ndarray, n: int,
+                  capacity: np.ndarray, chosen: np.ndarray, max_iter: int):
+    """Improve a plan with replacement and two-cross rewiring moves"""
+    # Value of every available cross by parent pair, -inf if unavailable
+    available = np.full((n, n), -np.inf)
+    available[pi, pj] = v
+    available[pj, pi] = v
+    index = np.full((n, n), -1, dtype=np.intp)
+    index[pi, pj] = np.arange(v.size)
+    index[pj, pi] = np.arange(v.size)
+
+    chosen = chosen.copy()
+    selected = np.zeros(v.size, dtype=bool)
+    selected[chosen] = True
+    available[pi[chosen], pj[chosen]] = -np.inf
+    available[pj[chosen], pi[chosen]] = -np.inf
+    upper = np.triu(np.ones((len(chosen), len(chosen)), dtype=bool), k=1)
+
+    def swap(remove: list, add: list) -> None:
+        for k in remove:
+            available[pi[k], pj[k]] = available[pj[k], pi[k]] = v[k]
+        for k in add:
+            available[pi[k], pj[k]] = available[pj[k], pi[k]] = -np.inf
+        selected[remove] = False
+        selected[add] = True
+
+    improvements = 0
+    for _ in range(max_iter):
+        a, b, cur = pi[chosen], pj[chosen], v[chosen]
+        tol = 1e-12 * max(1.0, np.max(np.abs(cur)))
+
+        # Replacement: an unselected cross takes the place of the weakest
+        # selected cross that frees the parent uses it needs
+        uses = np.bincount(np.concatenate([a, b]), minlength=n)
+        free = uses < capacity
+        weakest = np.full(n, np.inf)
+        np.minimum.at(weakest, a, cur)
+        np.minimum.at(weakest, b, cur)
+        global_min = np.min(cur)
+        # Only crosses better than the weakest selected one can gain
+        pool = np.flatnonzero((v > global_min) & ~selected)
+        replace_gain = -np.inf
+        if pool.size:
+            free_i, free_j = free[pi[pool]], free[pj[pool]]
+            removal = np.where(free_i & free_j, global_min,
+                      np.where(free_j, weakest[pi[pool]],
+                      np.where(free_i, weakest[pj[pool]], np.inf)))
+            gain = v[pool] - removal
+            best = int(np.argmax(gain))
+            best_add, replace_gain = pool[best], gain[best]
+
+        # Rewiring of two selected crosses (x, y)
+        alt1 = available[a[:, None], a[None, :]] + available[b[:, None], b[None, :]]
+        alt2 = available[a[:, None], b[None, :]] + available[b[:, None], a[None, :]]
+        current = cur[:, None] + cur[None, :]
+        rewire = np.where(upper, np.maximum(alt1, alt2) - current, -np.inf)
+        x, y = np.unravel_index(np.argmax(rewire), rewire.shape)
+        rewire_gain = rewire[x, y]
+
+        if max(replace_gain, rewire_gain) <= tol:
+            break
+
+        if replace_gain >= rewire_gain:
+            i, j = pi[best_add], pj[best_add]
+            if free[i] and free[j]:
+                mask = cur == global_min
+            elif free[j]:
+                mask = ((a == i) | (b == i)) & (cur == weakest[i])
+            else:
+                mask = ((a == j) | (b == j)) & (cur == weakest[j])
+            slot = int(np.flatnonzero(mask)[0])
+            swap([chosen[slot]], [best_add])
+            chosen[slot] = best_add
+        else:
+            if alt1[x, y] >= alt2[x, y]:
+                new = [index[a[x], a[y]], index[b[x], b[y]]]
+            else:
+                new = [index[a[x], b[y]], index[b[x], a[y]]]
+            swap([chosen[x], chosen[y]], new)
+            chosen[x], chosen[y] = new
+        improvements += 1
+
+    return chosen, improvements
@@ -1,15 +1,100 @@
-from typing import Union, Optional, Dict
+from typing import Union, Optional, Dict, Tuple
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.patches import Patch
-import seaborn as sns
 from scipy import stats
-import matplotlib.animation as animation
 import warnings
-from tabulate import tabulate
-import colorama
-from colorama import Fore, Back, Style
+from .combining_ability import cell_moments
+from .crossing import cross_values, plan_crosses
+from .resampling import batch_gca, batch_sca, batch_reciprocal, run_chunks, _bootstrap_chunk, _permutation_chunk
+from .._lazy import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')
+Patch = lazy_import('matplotlib.patches', 'Patch')
+sns = lazy_import('seaborn')
+animation = lazy_import('matplotlib.animation')
+tabulate = lazy_import('tabulate', 'tabulate')
+Fore = lazy_import('colorama', 'Fore')
+Style = lazy_import('colorama', 'Style')
+
+# Default weights of the overall cross score
+RANKING_WEIGHTS = {'response': 0.3, 'gca': 0.3, 'sca': 0.2, 'heterosis': 0.2}
+
+def parent_ids(df: pd.DataFrame,
+               parent1_col: str,
+               parent2_col: str,
+               parents: Optional[int] = None) -> list:
+    """
+    Build the parent label mapping from the union of both parent columns
+    
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Crosses in long format
+    parent1_col, parent2_col : str
+        Columns holding the two parents of each cross
+    parents : int, optional
+        Expected number of parents. With integer IDs in 1..parents,
+        parents that never appear in the data keep their row/column.
+    
+    Returns
+    -------
+    list
+        Parent IDs in matrix order (index i holds the ID of row/column i)
+    """
+    ids = pd.unique(pd.concat([df[parent1_col], df[parent2_col]],
+                              ignore_index=True))
+    try:
+        ids = sorted(ids)
+    except TypeError:  # Mixed types keep order of appearance
+        ids = list(ids)
+    ids = [pid.item() if isinstance(pid, np.generic) else pid for pid in ids]
+    
+    if parents is not None and parents != len(ids):
+        is_int = all(isinstance(pid, int) and not isinstance(pid, bool)
+                     for pid in ids)
+        if is_int and min(ids) >= 1 and max(ids) <= parents:
+            ids = list(range(1, parents + 1))
+        else:
+            raise ValueError(
+                f"Found {len(ids)} distinct parents but parents={parents}"
+            )
+    return ids
+
+def parent_labels(ids: list) -> list:
+    """Display labels: integer IDs keep the P<id> convention, names are shown as-is"""
+    return [f"P{pid}" if isinstance(pid, (int, np.integer)) else str(pid)
+            for pid in ids]
+
+def observed_mask(parents: int, method: int) -> np.ndarray:
+    """Cells of the n × n diallel matrix that Griffing's method includes"""
+    observed = np.ones((parents, parents), dtype=bool)
+    if method == 2:  # Parents and F1's
+        observed[np.tril_indices(parents, k=-1)] = False
+    elif method == 3:  # F1's and reciprocals
+        np.fill_diagonal(observed, False)
+    elif method == 4:  # F1's only
+        observed[np.tril_indices(parents)] = False
+    return observed
+
+def _top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest values in descending order (NaN last)"""
+    values = np.asarray(values, dtype=float)
+    values = np.where(np.isnan(values), -np.inf, values)
+    k = min(k, values.size)
+    if k <= 0:
+        return np.array([], dtype=int)
+    if k < values.size:
+        idx = np.argpartition(-values, k - 1)[:k]
+    else:
+        idx = np.arange(values.size)
+    return idx[np.argsort(-values[idx], kind='stable')]
+
+def _min_max(values: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    """Scale values to [0, 1] using the given range"""
+    span = hi - lo
+    if span == 0:
+        return np.zeros_like(values, dtype=float)
+    return (values - lo) / span
 
 class DIALLEL:
     """Diallel Analysis using Griffing's Methods"""
@@ -21,7 +106,8 @@ class DIALLEL:
                  response: str = 'Value',
                  parent1_col: str = 'Parent1',
                  parent2_col: str = 'Parent2',
-                 rep_col: str = 'Rep'):
+                 rep_col: str = 'Rep',
+                 seed: Optional[Union[int, np.random.Generator]] = None):
         """
         Initialize Diallel Analysis
         
@@ -45,6 +131,8 @@ class DIALLEL:
             Column name for second parent
         rep_col : str
             Column name for replications
+        seed : int or np.random.Generator, optional
+            Random source for simulation (global NumPy RNG if None)
         """
         # Validate method
         if method not in [1, 2, 3, 4]:
@@ -60,76 +148,149 @@ class DIALLEL:
         # Handle data input
         if isinstance(data, pd.DataFrame):
             self.raw_data = data
-            self.parents = parents or self._get_parents()
+            self.parent_ids = self._encode_parents(parents)
+            self.parents = len(self.parent_ids)
             self.data = self._reshape_data(data)
         elif isinstance(data, np.ndarray):
             self.data = data
             self.parents = data.shape[0]
             self.raw_data = None
+            self.parent_ids = list(range(1, self.parents + 1))
         elif data is None:
             if parents is None:
                 raise ValueError("Number of parents required for simulation")
             self.parents = parents
-            self.data = self._simulate_diallel()
+            self.data = self._simulate_diallel(seed)
             self.raw_data = None
+            self.parent_ids = list(range(1, self.parents + 1))
         else:
             raise ValueError("Data must be DataFrame, array, or None")
+        
+        # Display labels (real line names, P<id> for integer IDs)
+        self.parent_labels = parent_labels(self.parent_ids)
             
         # Validate data dimensions based on method
         self._validate_dimensions()
         
+    # Derived quantities that are computed lazily and cached until data changes
+    _DERIVED = ('gca', 'sca', 'reciprocal', 'anova', 'heterosis')
+    
+    @property
+    def data(self) -> np.ndarray:
+        """Diallel matrix (parents × parents); read-only, assign to replace"""
+        return self._data
+    
+    @data.setter
+    def data(self, value) -> None:
+        value = np.array(value, dtype=float)
+        if hasattr(self, 'parents') and value.shape != (self.parents, self.parents):
+            raise ValueError(
+                f"Data shape {value.shape} does not match "
+                f"expected dimensions {(self.parents, self.parents)}"
+            )
+        value.setflags(write=False)  # In-place edits would bypass invalidation
+        self._data = value
+        self._cache = {}
+        self.__dict__.pop('_results', None)
+    
+    def _cached(self, key: str, compute):
+        """Return a cached derived quantity, computing it on first access"""
+        if key not in self._cache:
+            value = compute()
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+            self._cache[key] = value
+        return self._cache[key]
+    
+    @property
+    def gca(self) -> np.ndarray:
+        """General Combining Ability effects"""
+        return self._cached('gca', self._calculate_gca)
+    
+    @property
+    def sca(self) -> np.ndarray:
+        """Specific Combining Ability effects"""
+        return self._cached('sca', self._calculate_sca)
+    
+    @property
+    def reciprocal(self) -> Optional[np.ndarray]:
+        """Reciprocal effects (methods 1 and 3, otherwise None)"""
+        return self._cached('reciprocal', self._calculate_reciprocal)
+    
+    @property
+    def anova(self) -> Dict:
+        """ANOVA table of the diallel analysis"""
+        return self._cached('anova', self._calculate_anova)
+    
+    @property
+    def heterosis(self) -> Dict:
+        """Better-parent heterosis (methods 1 and 2)"""
+        return self._cached('heterosis', self.calculate_heterosis)
+        
     def _get_parents(self) -> int:
         """Extract number of parents from raw data"""
-        return max(
-            self.raw_data[self.parent1_col].nunique(),
-            self.raw_data[self.parent2_col].nunique()
-        )
+        return len(self._encode_parents())
+        
+    def _encode_parents(self, parents: Optional[int] = None) -> list:
+        """Parent IDs in matrix order from the union of both parent columns"""
+        for col in [self.parent1_col, self.parent2_col, self.response]:
+            if col not in self.raw_data.columns:
+                raise ValueError(f"Column '{col}' not found in data")
+        return parent_ids(self.raw_data, self.parent1_col, self.parent2_col, parents)
+        
+    def _cell_codes(self, df: pd.DataFrame) -> np.ndarray:
+        """Flat matrix index (p1 * n + p2) of every record in df"""
+        ids = pd.Index(self.parent_ids)
+        p1 = ids.get_indexer(df[self.parent1_col])
+        p2 = ids.get_indexer(df[self.parent2_col])
+        if (p1 < 0).any() or (p2 < 0).any():
+            raise ValueError("Data contains parents outside the parent set")
+        return p1 * self.parents + p2
         
     def _reshape_data(self, df: pd.DataFrame) -> np.ndarray:
-        """Reshape DataFrame to matrix format"""
-        matrix = np.zeros((self.parents, self.parents))
-        
-        # Calculate means if replicates exist
-        if self.rep_col in df.columns:
-            means = df.groupby([self.parent1_col, self.parent2_col])[self.response].mean()
-            for (p1, p2), value in means.items():
-                matrix[p1-1, p2-1] = value
-        else:
-            for _, row in df.iterrows():
-                p1 = int(row[self.parent1_col]) - 1
-                p2 = int(row[self.parent2_col]) - 1
-                matrix[p1, p2] = row[self.response]
-                
-        return matrix
+        """Reshape DataFrame to matrix format (replicates are averaged)"""
+        n = self.parents
+        codes = self._cell_codes(df)
+        values = df[self.response].to_numpy(dtype=float)
+        return cell_moments(codes, values, n * n)['means'].reshape(n, n)
         
-    def _simulate_diallel(self) -> np.ndarray:
+    def _simulate_diallel(self, seed: Optional[Union[int, np.random.Generator]] = None) -> np.ndarray:
         """
         Simulate realistic diallel data
         
+        Parameters
+        ----------
+        seed : int or np.random.Generator, optional
+            Random source (global NumPy RNG if None)
+        
         Returns
         -------
         np.ndarray
             Simulated diallel cross data
+        
+        See Also
+        --------
+        DiallelSimulator : simulation from genetic variance components
         """
         n = self.parents
+        rng = np.random if seed is None else np.random.default_rng(seed)
         matrix = np.zeros((n, n))
         
         # Generate random GCA effects
-        gca = np.random.normal(0, 1, n)
+        gca = rng.normal(0, 1, n)
         
-        # Generate data based on method
-        for i in range(n):
-            for j in range(n):
-                if i == j:  # Parents
-                    if self.method in [1, 2]:
-                        matrix[i,j] = 2 * gca[i] + np.random.normal(0, 0.5)
-                elif j > i:  # F1's
-                    sca = np.random.normal(0, 0.5)
-                    matrix[i,j] = gca[i] + gca[j] + sca
-                    # Reciprocals for methods 1 and 3
-                    if self.method in [1, 3]:
-                        rec = np.random.normal(0, 0.3)
-                        matrix[j,i] = matrix[i,j] - rec
+        # Parents
+        if self.method in [1, 2]:
+            np.fill_diagonal(matrix, 2 * gca + rng.normal(0, 0.5, n))
+        
+        # F1's
+        rows, cols = np.triu_indices(n, k=1)
+        f1 = gca[rows] + gca[cols] + rng.normal(0, 0.5, rows.size)
+        matrix[rows, cols] = f1
+        
+        # Reciprocals for methods 1 and 3
+        if self.method in [1, 3]:
+            matrix[cols, rows] = f1 - rng.normal(0, 0.3, rows.size)
                         
         # Mask values based on method
         if self.method == 2:  # Parents and F1's
@@ -151,7 +312,7 @@ class DIALLEL:
                 f"expected dimensions {expected_shape}"
             )
             
-    def analyze(self, silent: bool = True) -> Dict:
+    def analyze(self, silent: bool = True, plot: bool = True) -> Dict:
         """
         Analyze diallel cross data and display visualizations:
         1. Diallel overview (design and cross values)
@@ -161,37 +322,98 @@ class DIALLEL:
         ----------
         silent : bool, optional
             If True, suppresses printing of raw results dictionary
+        plot : bool, optional
+            If False, only computes results (no figures, no output);
+            use render() to write the figures to files instead
         
         Returns
         -------
         Dict
             Dictionary containing analysis results
         """
-        # Calculate effects
-        self._results = {}  # Store results as instance attribute
+        # Calculate effects and ANOVA (cached on the object)
+        self._results = self.get_results()
         
-        self._results['gca'] = self._calculate_gca()
-        self._results['sca'] = self._calculate_sca()
-        if self.method in [1, 3]:
-            self._results['reciprocal'] = self._calculate_reciprocal()
+        if plot:
+            # 1. Show diallel overview
+            self.plot_diallel_overview()
             
-        # Calculate ANOVA
-        self._results['anova'] = self._calculate_anova()
+            # 2. Show analysis summary plots
+            self._plot_analysis_summary(self._results)
+        
+        if not silent:
+            print(self._results)
         
-        # 1. Show diallel overview
-        self.plot_diallel_overview()
+        return self._results
         
-        # 2. Show analysis summary plots
-        self._plot_analysis_summary(self._results)
+    def render(self,
+               path: str = '.',
+               prefix: str = 'diallel',
+               format: str = 'png',
+               dpi: int = 100) -> Dict[str, str]:
+        """
+        Write the analysis figures to files without displaying them.
         
-        # Return results without printing
-        return self._results if not silent else None
+        Parameters
+        ----------
+        path : str
+            Output directory (created if missing)
+        prefix : str
+            File name prefix
+        format : str
+            Image format understood by matplotlib ('png', 'pdf', 'svg', ...)
+        dpi : int
+            Resolution of raster formats
+            
+        Returns
+        -------
+        Dict[str, str]
+            Written file path for 'overview' and 'summary'
+        """
+        import os
+        os.makedirs(path, exist_ok=True)
+        
+        figures = {
+            'overview': self.plot_diallel_overview(show=False),
+            'summary': self._plot_analysis_summary(self.get_results(), show=False)
+        }
+        
+        files = {}
+        for name, fig in figures.items():
+            files[name] = os.path.join(path, f"{prefix}_{name}.{format}")
+            fig.savefig(files[name], format=format, dpi=dpi, bbox_inches='tight')
+            plt.close(fig)
+        return files
 
-    def get_results(self) -> Dict:
-        """Get the analysis results dictionary"""
-        if not hasattr(self, '_results'):
-            self.analyze()
-        return self._results
+    def get_results(self, keys: Optional[list] = None) -> Dict:
+        """
+        Get analysis results without plotting.
+        
+        Only the requested quantities are computed; all of them are cached
+        until data changes.
+        
+        Parameters
+        ----------
+        keys : list, optional
+            Any of 'gca', 'sca', 'reciprocal', 'anova' and 'heterosis'.
+            Defaults to GCA, SCA, reciprocal effects (methods 1 and 3)
+            and ANOVA.
+            
+        Returns
+        -------
+        Dict
+            Dictionary containing the requested results
+        """
+        if keys is None:
+            keys = ['gca', 'sca']
+            if self.method in [1, 3]:
+                keys.append('reciprocal')
+            keys.append('anova')
+        
+        unknown = set(keys) - set(self._DERIVED)
+        if unknown:
+            raise ValueError(f"Unknown result keys: {sorted(unknown)}")
+        return {key: getattr(self, key) for key in keys}
 
     def summary(self, results: Optional[Dict] = None) -> None:
         """
@@ -200,12 +422,10 @@ class DIALLEL:
         Parameters
         ----------
         results : Dict, optional
-            Results dictionary from analyze(). If None, analyze() will be called silently.
+            Results dictionary from analyze(). If None, cached results are used.
         """
         if results is None:
-            if not hasattr(self, '_results'):
-                self.analyze(silent=True)
-            results = self._results
+            results = self.get_results()
             
         print("\n" + "="*50)
         print("DIALLEL ANALYSIS RESULTS")
@@ -216,138 +436,61 @@ class DIALLEL:
         print(f"Number of Parents: {self.parents}")
         print(f"Method: {self.method} ({self._get_method_description()})")
         
+        labels = self.parent_labels
+        ranking = self.rank_crosses(results=results, top=5)
+        
         # Top 5 Crosses by Response Value
         print("\nTop 5 Crosses by Response Value:")
         print("-"*40)
-        crosses = []
-        for i in range(self.parents):
-            for j in range(self.parents):
-                if i != j:  # Exclude self crosses
-                    crosses.append((f"P{i+1} × P{j+1}", self.data[i,j]))
-        top_crosses = sorted(crosses, key=lambda x: x[1], reverse=True)[:5]
-        for cross, value in top_crosses:
-            print(f"{cross}: {value:.3f}")
+        rows, cols = np.nonzero(~np.eye(self.parents, dtype=bool))  # Exclude self crosses
+        values = self.data[rows, cols]
+        for k in _top_k(values, 5):
+            print(f"{labels[rows[k]]} × {labels[cols[k]]}: {values[k]:.3f}")
         
         # Top 5 Parents by GCA
         print("\nTop 5 Parents by GCA Effect:")
         print("-"*40)
-        gca_list = [(f"P{i+1}", results['gca'][i]) for i in range(self.parents)]
-        top_gca = sorted(gca_list, key=lambda x: x[1], reverse=True)[:5]
-        for parent, value in top_gca:
-            print(f"{parent}: {value:.3f}")
+        gca = np.asarray(results['gca'])
+        for k in _top_k(gca, 5):
+            print(f"{labels[k]}: {gca[k]:.3f}")
         
         # Top 5 Combinations by SCA
         print("\nTop 5 Combinations by SCA Effect:")
         print("-"*40)
-        sca_combinations = []
-        sca = results['sca']
-        for i in range(self.parents):
-            for j in range(i+1, self.parents):
-                sca_combinations.append((f"P{i+1} × P{j+1}", sca[i,j]))
-        top_sca = sorted(sca_combinations, key=lambda x: x[1], reverse=True)[:5]
-        for cross, value in top_sca:
-            print(f"{cross}: {value:.3f}")
+        pi, pj = ranking['pairs']
+        for k in _top_k(ranking['sca'], 5):
+            print(f"{labels[pi[k]]} × {labels[pj[k]]}: {ranking['sca'][k]:.3f}")
         
         # Heterosis Analysis (if applicable)
-        heterosis_data = []
-        if self.method in [1, 2]:
+        if ranking['heterosis'] is not None:
             print("\nHeterosis Analysis:")
             print("-"*40)
             parent_values = np.diag(self.data)
             
-            for i in range(self.parents):
-                for j in range(i+1, self.parents):
-                    f1_value = self.data[i,j]
-                    parent1_value = parent_values[i]
-                    parent2_value = parent_values[j]
-                    better_parent = max(parent1_value, parent2_value)
-                    
-                    # Calculate heterosis
-                    mph = ((f1_value - (parent1_value + parent2_value)/2) / 
-                          ((parent1_value + parent2_value)/2)) * 100
-                    bph = ((f1_value - better_parent) / better_parent) * 100
-                    
-                    heterosis_data.append({
-                        'cross': f"P{i+1} × P{j+1}",
-                        'f1': f1_value,
-                        'p1': parent1_value,
-                        'p2': parent2_value,
-                        'mph': mph,
-                        'bph': bph,
-                        'i': i,
-                        'j': j
-                    })
-            
-            # Sort by better parent heterosis
-            top_heterosis = sorted(heterosis_data, key=lambda x: x['bph'], reverse=True)[:5]
-            
             print("\nTop 5 Crosses by Better-Parent Heterosis:")
-            for h in top_heterosis:
-                print(f"{h['cross']}: {h['bph']:.1f}% (F1: {h['f1']:.2f}, "
-                      f"P1: {h['p1']:.2f}, P2: {h['p2']:.2f})")
+            for k in _top_k(ranking['heterosis'], 5):
+                print(f"{labels[pi[k]]} × {labels[pj[k]]}: {ranking['heterosis'][k]:.1f}% "
+                      f"(F1: {ranking['response'][k]:.2f}, "
+                      f"P1: {parent_values[pi[k]]:.2f}, P2: {parent_values[pj[k]]:.2f})")
         
         # Best Overall Combinations
         print("\nBest Overall Combinations:")
         print("="*50)
         
-        # Calculate overall score for each cross
-        overall_scores = []
-        for i in range(self.parents):
-            for j in range(i+1, self.parents):
-                cross = f"P{i+1} × P{j+1}"
-                f1_value = self.data[i,j]
-                
-                # 1. Response value score (normalized)
-                response_score = f1_value / np.max(self.data)
-                
-                # 2. GCA score (sum of both parents' GCA, normalized)
-                gca_sum = results['gca'][i] + results['gca'][j]
-                gca_score = (gca_sum - np.min(results['gca'])) / (np.max(results['gca']) - np.min(results['gca']))
-                
-                # 3. SCA score (normalized)
-                sca_value = sca[i,j]
-                sca_score = (sca_value - np.min(sca)) / (np.max(sca) - np.min(sca))
-                
-                # 4. Heterosis score (if available)
-                het_score = 0
-                if heterosis_data:
-                    het = next((h for h in heterosis_data if h['cross'] == cross), None)
-                    if het:
-                        het_score = het['bph'] / max(h['bph'] for h in heterosis_data)
-                
-                # Calculate weighted overall score
-                # Weights: Response (0.3), GCA (0.3), SCA (0.2), Heterosis (0.2)
-                overall_score = (0.3 * response_score + 
-                               0.3 * gca_score + 
-                               0.2 * sca_score + 
-                               0.2 * het_score)
-                
-                overall_scores.append({
-                    'cross': cross,
-                    'response': f1_value,
-                    'gca_sum': gca_sum,
-                    'sca': sca_value,
-                    'heterosis': het['bph'] if heterosis_data else None,
-                    'score': overall_score
-                })
-        
-        # Sort by overall score and print top 5
-        top_overall = sorted(overall_scores, key=lambda x: x['score'], reverse=True)[:5]
-        
         print("\nTop 5 Overall Best Combinations:")
         print("-"*70)
         print("Cross      Response    GCA Sum    SCA     Heterosis    Score")
         print("-"*70)
-        for combo in top_overall:
+        for combo in ranking['top']:
             het_str = f"{combo['heterosis']:.1f}%" if combo['heterosis'] is not None else "N/A"
             print(f"{combo['cross']:<10} {combo['response']:8.2f} {combo['gca_sum']:10.2f} "
                   f"{combo['sca']:8.2f} {het_str:>10} {combo['score']:8.3f}")
         
         print("\nNote: Overall score weights:")
-        print("- Response value: 30%")
-        print("- GCA effects: 30%")
-        print("- SCA effects: 20%")
-        print("- Heterosis: 20%")
+        print(f"- Response value: {ranking['weights']['response']:.0%}")
+        print(f"- GCA effects: {ranking['weights']['gca']:.0%}")
+        print(f"- SCA effects: {ranking['weights']['sca']:.0%}")
+        print(f"- Heterosis: {ranking['weights']['heterosis']:.0%}")
         
         # ANOVA Summary
         if 'anova' in results:
@@ -384,6 +527,137 @@ class DIALLEL:
                   Fore.YELLOW + "p ≤ 0.01 " + Style.RESET_ALL +
                   Fore.GREEN + "p ≤ 0.05" + Style.RESET_ALL)
 
+    def rank_crosses(self,
+                     weights: Optional[Dict[str, float]] = None,
+                     top: int = 5,
+                     results: Optional[Dict] = None) -> Dict:
+        """
+        Score every F1 cross (i < j) on response, GCA, SCA and heterosis.
+        
+        Each component is normalized once over all crosses and combined
+        into a weighted overall score; the best crosses are then selected
+        with a partial sort.
+        
+        Parameters
+        ----------
+        weights : Dict[str, float], optional
+            Weights for 'response', 'gca', 'sca' and 'heterosis'. Missing
+            keys fall back to the defaults (0.3, 0.3, 0.2, 0.2).
+        top : int
+            Number of best crosses to return in 'top'
+        results : Dict, optional
+            Results containing 'gca' and 'sca'. Computed if not given.
+            
+        Returns
+        -------
+        Dict
+            'pairs' (row and column index arrays), per-cross 'response',
+            'gca_sum', 'sca', 'heterosis' (None without parent data),
+            normalized component scores, overall 'score', the 'weights'
+            used and the 'top' crosses as a list of dictionaries
+        """
+        w = dict(RANKING_WEIGHTS)
+        if weights is not None:
+            unknown = set(weights) - set(w)
+            if unknown:
+                raise ValueError(f"Unknown ranking weights: {sorted(unknown)}")
+            w.update(weights)
+        
+        if results is None:
+            gca = self.gca
+            sca = self.sca
+        else:
+            gca = np.asarray(results['gca'])
+            sca = np.asarray(results['sca'])
+        
+        pi, pj = np.triu_indices(self.parents, k=1)
+        response = self.data[pi, pj]
+        gca_sum = gca[pi] + gca[pj]
+        sca_ij = sca[pi, pj]
+        
+        # Normalized component scores
+        response_score = response / np.max(self.data)
+        gca_score = _min_max(gca_sum, np.min(gca), np.max(gca))
+        sca_score = _min_max(sca_ij, np.min(sca), np.max(sca))
+        
+        if self.method in [1, 2]:
+            parent_values = np.diag(self.data)
+            better_parent = np.maximum(parent_values[pi], parent_values[pj])
+            heterosis = (response - better_parent) / better_parent * 100
+            max_het = np.max(heterosis) if heterosis.size else 0
+            het_score = heterosis / max_het if max_het else np.zeros_like(heterosis)
+        else:
+            heterosis = None
+            het_score = np.zeros_like(response)
+        
+        score = (w['response'] * response_score +
+                 w['gca'] * gca_score +
+                 w['sca'] * sca_score +
+                 w['heterosis'] * het_score)
+        
+        labels = self.parent_labels
+        best = []
+        for k in _top_k(score, top):
+            best.append({
+                'cross': f"{labels[pi[k]]} × {labels[pj[k]]}",
+                'i': int(pi[k]),
+                'j': int(pj[k]),
+                'response': response[k],
+                'gca_sum': gca_sum[k],
+                'sca': sca_ij[k],
+                'heterosis': heterosis[k] if heterosis is not None else None,
+                'score': score[k]
+            })
+        
+        return {
+            'pairs': (pi, pj),
+            'response': response,
+            'gca_sum': gca_sum,
+            'sca': sca_ij,
+            'heterosis': heterosis,
+            'response_score': response_score,
+            'gca_score': gca_score,
+            'sca_score': sca_score,
+            'het_score': het_score,
+            'score': score,
+            'weights': w,
+            'top': best
+        }
+
+    def plan_crosses(self,
+                     n_crosses: int = 10,
+                     max_uses: Optional[Union[int, np.ndarray]] = None,
+                     relationship: Optional[np.ndarray] = None,
+                     max_relationship: Optional[float] = None,
+                     improve: bool = True) -> Dict:
+        """
+        Choose a crossing plan from predicted values GCA_i + GCA_j + SCA_ij.
+        
+        Parameters
+        ----------
+        n_crosses : int
+            Number of crosses in the plan
+        max_uses : int or np.ndarray, optional
+            Maximum number of crosses per parent
+        relationship : np.ndarray, optional
+            Relationship matrix between parents (n × n)
+        max_relationship : float, optional
+            Crosses between parents related above this value are excluded
+        improve : bool
+            Whether to improve the greedy plan by local search
+            
+        Returns
+        -------
+        Dict
+            Selected crosses and their values, see `plan_crosses`
+        """
+        return plan_crosses(cross_values(self.gca, self.sca), n_crosses,
+                            max_uses=max_uses,
+                            relationship=relationship,
+                            max_relationship=max_relationship,
+                            labels=self.parent_labels,
+                            improve=improve)
+
     def _print_colored_anova(self, anova: Dict) -> None:
         """Print ANOVA table with colored formatting"""
         # Prepare data for tabulate
@@ -439,7 +713,7 @@ class DIALLEL:
         print("\nGeneral Combining Ability (GCA) Effects:")
         print("-"*40)
         gca_df = pd.DataFrame({
-            'Parent': [f'P{i+1}' for i in range(self.parents)],
+            'Parent': list(self.parent_labels),
             'GCA': results['gca']
         }).sort_values('GCA', ascending=False)
         print(gca_df.to_string(index=False))
@@ -450,7 +724,7 @@ class DIALLEL:
         sca = results['sca']
         for i in range(self.parents):
             for j in range(i+1, self.parents):
-                print(f"P{i+1} × P{j+1}: {sca[i,j]:.3f}")
+                print(f"{self.parent_labels[i]} × {self.parent_labels[j]}: {sca[i,j]:.3f}")
         
         # 4. Best Combinations
         print("\nTop 5 Best Combinations (by SCA):")
@@ -458,7 +732,7 @@ class DIALLEL:
         combinations = []
         for i in range(self.parents):
             for j in range(i+1, self.parents):
-                combinations.append((f"P{i+1} × P{j+1}", sca[i,j]))
+                combinations.append((f"{self.parent_labels[i]} × {self.parent_labels[j]}", sca[i,j]))
         top_combinations = sorted(combinations, key=lambda x: x[1], reverse=True)[:5]
         for cross, value in top_combinations:
             print(f"{cross}: {value:.3f}")
@@ -491,12 +765,7 @@ class DIALLEL:
         
     def _calculate_gca(self) -> np.ndarray:
         """Calculate General Combining Ability effects"""
-        grand_mean = np.mean(self.data)
-        row_means = np.mean(self.data, axis=1)
-        col_means = np.mean(self.data, axis=0)
-        
-        gca = (row_means + col_means) / (2 * (self.parents - 2)) - grand_mean / (self.parents - 2)
-        return gca
+        return batch_gca(self.data)
         
     def _calculate_sca(self) -> np.ndarray:
         """
@@ -507,20 +776,159 @@ class DIALLEL:
         np.ndarray
             Matrix of SCA effects
         """
+        return batch_sca(self.data, self.gca)
+        
+    def _observed_mask(self) -> np.ndarray:
+        """Cells of the n × n matrix that are part of the chosen method"""
+        return observed_mask(self.parents, self.method)
+        
+    def _gca_model_fit(self, observed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Fitted values of the GCA-only model and its residuals on observed cells"""
+        gca = self.gca
+        fitted = np.mean(self.data) + gca[:, None] + gca[None, :]
+        residuals = (self.data - fitted)[observed]
+        return fitted, residuals - np.mean(residuals)
+        
+    def bootstrap(self,
+                  replicates: int = 1000,
+                  alpha: float = 0.05,
+                  seed: Optional[int] = None,
+                  chunk_size: Optional[int] = None,
+                  n_jobs: int = 1) -> Dict:
+        """
+        Bootstrap confidence intervals for GCA and SCA effects.
+        
+        With replicated DataFrame input the replicates of every cross are
+        resampled; otherwise the residuals of the GCA model are resampled
+        over the observed cells (SCA intervals are then not reported).
+        All replicates of a chunk are evaluated as one (B, n, n) array.
+        
+        Parameters
+        ----------
+        replicates : int
+            Number of bootstrap replicates (B)
+        alpha : float
+            Significance level of the percentile intervals
+        seed : int, optional
+            Seed of the random streams
+        chunk_size : int, optional
+            Replicates per chunk (default bounds memory to about 128 MB)
+        n_jobs : int
+            Number of worker processes for chunks (-1 for all CPUs)
+            
+        Returns
+        -------
+        Dict
+            Point estimates 'gca' and 'sca', bootstrap standard errors
+            'gca_se'/'sca_se' and percentile intervals 'gca_ci' (2 × n) and
+            'sca_ci' (2 × n × n), with 'method' 'cells' or 'residuals'
+        """
         n = self.parents
-        sca = np.zeros((n, n))
-        gca = self._calculate_gca()
-        grand_mean = np.mean(self.data)
-        
-        for i in range(n):
-            for j in range(n):
-                if i != j:  # Off-diagonal elements
-                    sca[i,j] = (self.data[i,j] - grand_mean - 
-                               gca[i] - gca[j])
-                else:  # Diagonal elements (selfs)
-                    sca[i,i] = (self.data[i,i] - grand_mean - 
-                               2 * gca[i])
-        return sca
+        if self.raw_data is not None and self.rep_col in self.raw_data.columns:
+            codes = self._cell_codes(self.raw_data)
+            order = np.argsort(codes, kind='stable')
+            sorted_codes = codes[order]
+            cells, cell_start, cell_count = np.unique(
+                sorted_codes, return_index=True, return_counts=True
+            )
+            position = np.searchsorted(cells, sorted_codes)
+            sample = {
+                'kind': 'cells',
+                'values': self.raw_data[self.response].to_numpy(dtype=float)[order],
+                'obs_start': cell_start[position],
+                'obs_count': cell_count[position],
+                'cells': cells,
+                'cell_start': cell_start,
+                'cell_count': cell_count
+            }
+        else:
+            observed = self._observed_mask()
+            fitted, residuals = self._gca_model_fit(observed)
+            sample = {
+                'kind': 'residuals',
+                'data': self.data,
+                'observed': observed,
+                'fitted': fitted,
+                'residuals': residuals
+            }
+        
+        chunks = run_chunks(_bootstrap_chunk, sample, n, replicates,
+                            seed=seed, chunk_size=chunk_size, n_jobs=n_jobs)
+        gca_boot = np.concatenate([gca for gca, _ in chunks])
+        quantiles = [alpha / 2, 1 - alpha / 2]
+        
+        results = {
+            'method': sample['kind'],
+            'replicates': replicates,
+            'alpha': alpha,
+            'gca': self.gca,
+            'gca_se': np.std(gca_boot, axis=0, ddof=1),
+            'gca_ci': np.quantile(gca_boot, quantiles, axis=0),
+            'sca': self.sca,
+            'sca_se': None,
+            'sca_ci': None
+        }
+        if sample['kind'] == 'cells':
+            sca_boot = np.concatenate([sca for _, sca in chunks])
+            results['sca_se'] = np.std(sca_boot, axis=0, ddof=1)
+            results['sca_ci'] = np.quantile(sca_boot, quantiles, axis=0)
+        return results
+        
+    def permutation_test(self,
+                         permutations: int = 1000,
+                         seed: Optional[int] = None,
+                         chunk_size: Optional[int] = None,
+                         n_jobs: int = 1) -> Dict:
+        """
+        Permutation p-values for GCA and SCA effects.
+        
+        GCA effects are tested by exchanging the values of all observed
+        cells; SCA effects by exchanging the residuals of the GCA model
+        (Freedman-Lane). Permutations are evaluated in (B, n, n) batches.
+        
+        Parameters
+        ----------
+        permutations : int
+            Number of permutations (B)
+        seed : int, optional
+            Seed of the random streams
+        chunk_size : int, optional
+            Permutations per chunk (default bounds memory to about 128 MB)
+        n_jobs : int
+            Number of worker processes for chunks (-1 for all CPUs)
+            
+        Returns
+        -------
+        Dict
+            Effects 'gca' and 'sca' with two-sided p-values 'gca_p' (n)
+            and 'sca_p' (n × n)
+        """
+        n = self.parents
+        observed = self._observed_mask()
+        fitted, residuals = self._gca_model_fit(observed)
+        gca = self.gca
+        sca = self.sca
+        sample = {
+            'data': self.data,
+            'observed': observed,
+            'fitted': fitted,
+            'residuals': residuals,
+            'abs_gca': np.abs(gca) - 1e-12,
+            'abs_sca': np.abs(sca) - 1e-12
+        }
+        
+        chunks = run_chunks(_permutation_chunk, sample, n, permutations,
+                            seed=seed, chunk_size=chunk_size, n_jobs=n_jobs)
+        gca_hits = sum(hits for hits, _ in chunks)
+        sca_hits = sum(hits for _, hits in chunks)
+        
+        return {
+            'permutations': permutations,
+            'gca': gca,
+            'gca_p': (gca_hits + 1) / (permutations + 1),
+            'sca': sca,
+            'sca_p': (sca_hits + 1) / (permutations + 1)
+        }
         
     def _calculate_reciprocal(self) -> np.ndarray:
         """
@@ -534,16 +942,7 @@ class DIALLEL:
         if self.method not in [1, 3]:
             return None
         
-        n = self.parents
-        rec = np.zeros((n, n))
-        
-        for i in range(n):
-            for j in range(i+1, n):
-                effect = (self.data[i,j] - self.data[j,i]) / 2
-                rec[i,j] = effect
-                rec[j,i] = -effect
-                
-        return rec
+        return batch_reciprocal(self.data)
         
     def _calculate_anova(self) -> Dict:
         """
@@ -565,18 +964,18 @@ class DIALLEL:
         total_df = n * n - 1
         
         # GCA sum of squares
-        gca = self._calculate_gca()
+        gca = self.gca
         gca_ss = 2 * n * np.sum(gca**2)
         gca_df = n - 1
         
         # SCA sum of squares
-        sca = self._calculate_sca()
+        sca = self.sca
         sca_ss = np.sum(sca**2)
         sca_df = n * (n-1) / 2
         
         # Reciprocal sum of squares (if applicable)
         if self.method in [1, 3]:
-            rec = self._calculate_reciprocal()
+            rec = self.reciprocal
             rec_ss = 2 * np.sum(rec**2)
             rec_df = n * (n-1) / 2
         
@@ -624,11 +1023,10 @@ class DIALLEL:
 
     def _calculate_error_ss(self) -> float:
         """Calculate error sum of squares from replicates"""
-        means = self.raw_data.groupby([self.parent1_col, self.parent2_col])[self.response].mean()
-        error_ss = np.sum((self.raw_data[self.response] - 
-                          means[zip(self.raw_data[self.parent1_col], 
-                                  self.raw_data[self.parent2_col])])**2)
-        return error_ss
+        codes = self._cell_codes(self.raw_data)
+        values = self.raw_data[self.response].to_numpy(dtype=float)
+        cell_means = self._reshape_data(self.raw_data).ravel()
+        return float(np.sum((values - cell_means[codes])**2))
 
     def _calculate_error_df(self) -> int:
         """Calculate error degrees of freedom"""
@@ -681,7 +1079,7 @@ class DIALLEL:
     def _plot_scatter(self, results: Dict = None) -> None:
         """Plot scatter of GCA vs SCA effects"""
         if results is None:
-            results = self.analyze()  # This line should be indented
+            results = self.get_results()
         
         gca = results['gca']
         sca = results['sca']
@@ -694,16 +1092,16 @@ class DIALLEL:
         
         # Add parent labels
         for i in range(len(gca)):
-            plt.annotate(f'P{i+1}', (gca[i], np.mean(sca[i])))
+            plt.annotate(self.parent_labels[i], (gca[i], np.mean(sca[i])))
             
     def _plot_effects(self, results: Dict = None) -> None:
         """Plot genetic effects"""
         if results is None:
-            results = self.analyze()  # This line should be indented
+            results = self.get_results()
         
         # Prepare data for plotting
         effects = pd.DataFrame({
-            'Parent': [f'P{i+1}' for i in range(self.parents)],
+            'Parent': list(self.parent_labels),
             'GCA': results['gca'],
             'Mean SCA': np.mean(results['sca'], axis=1)
         })
@@ -726,7 +1124,7 @@ class DIALLEL:
         3. SCA effects
         4. Heterosis (if parents data available)
         """
-        results = self.analyze()
+        results = self.get_results()
         
         # Set up the figure with 2x2 subplots
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
@@ -815,7 +1213,7 @@ class DIALLEL:
         
         # Add parent labels to scatter
         for i in range(len(gca)):
-            ax4.annotate(f'P{i+1}', 
+            ax4.annotate(self.parent_labels[i], 
                         (gca[i], np.mean(sca[i])),
                         xytext=(5, 5),
                         textcoords='offset points')
@@ -835,7 +1233,7 @@ class DIALLEL:
             return
             
         # Calculate heterosis
-        het_results = self.calculate_heterosis()
+        het_results = self.heterosis
         
         # Create figure with subplots and more space
         fig = plt.figure(figsize=(24, 16))
@@ -865,8 +1263,8 @@ class DIALLEL:
         # Add parent labels
         ax1.set_xticks(np.arange(self.parents) + 0.5)
         ax1.set_yticks(np.arange(self.parents) + 0.5)
-        ax1.set_xticklabels([f'P{i+1}' for i in range(self.parents)])
-        ax1.set_yticklabels([f'P{i+1}' for i in range(self.parents)])
+        ax1.set_xticklabels(list(self.parent_labels))
+        ax1.set_yticklabels(list(self.parent_labels))
         
         ax1.set_title('Better-Parent Heterosis (%)', pad=20, fontsize=14)
         ax1.set_xlabel('Parent (♂)', labelpad=10, fontsize=12)
@@ -1019,8 +1417,8 @@ class DIALLEL:
         plt.ylabel('Parent (♀)', labelpad=10)
         
         # Add parent labels
-        plt.xticks(np.arange(self.parents) + 0.5, [f'P{i+1}' for i in range(self.parents)])
-        plt.yticks(np.arange(self.parents) + 0.5, [f'P{i+1}' for i in range(self.parents)])
+        plt.xticks(np.arange(self.parents) + 0.5, list(self.parent_labels))
+        plt.yticks(np.arange(self.parents) + 0.5, list(self.parent_labels))
         
         # Add legend
         legend_elements = [
@@ -1092,7 +1490,7 @@ class DIALLEL:
         ax1.set_ylabel('Parent (♀)', labelpad=10)
         
         # Add parent labels
-        parent_labels = [f'P{i+1}' for i in range(self.parents)]
+        parent_labels = list(self.parent_labels)
         ax1.set_xticks(np.arange(self.parents) + 0.5)
         ax1.set_yticks(np.arange(self.parents) + 0.5)
         ax1.set_xticklabels(parent_labels, rotation=0)
@@ -1191,7 +1589,7 @@ class DIALLEL:
             for j in range(self.parents):
                 if not mask[i, j]:  # Only annotate visible cells
                     if i == j:
-                        text = f'P{i+1}\n{self.data[i,j]:.2f}'
+                        text = f'{self.parent_labels[i]}\n{self.data[i,j]:.2f}'
                     elif i < j:
                         text = f'F₁{i+1},{j+1}\n{self.data[i,j]:.2f}'
                     else:
@@ -1209,8 +1607,8 @@ class DIALLEL:
         plt.ylabel('Parent (♀)', labelpad=10)
         
         # Add parent labels
-        plt.xticks(np.arange(self.parents) + 0.5, [f'P{i+1}' for i in range(self.parents)])
-        plt.yticks(np.arange(self.parents) + 0.5, [f'P{i+1}' for i in range(self.parents)])
+        plt.xticks(np.arange(self.parents) + 0.5, list(self.parent_labels))
+        plt.yticks(np.arange(self.parents) + 0.5, list(self.parent_labels))
         
         # Add legend for cross types
         legend_elements = [
@@ -1282,7 +1680,7 @@ class DIALLEL:
         ax1.set_ylabel('Parent (♀)', labelpad=10)
         
         # Add parent labels
-        parent_labels = [f'P{i+1}' for i in range(self.parents)]
+        parent_labels = list(self.parent_labels)
         ax1.set_xticks(np.arange(self.parents) + 0.5)
         ax1.set_yticks(np.arange(self.parents) + 0.5)
         ax1.set_xticklabels(parent_labels, rotation=0)
@@ -1446,7 +1844,7 @@ class DIALLEL:
         )
         
         # Update axes labels
-        parent_labels = [f'P{i+1}' for i in range(self.parents)]
+        parent_labels = list(self.parent_labels)
         for i in range(1, 3):
             fig.update_xaxes(title_text='Parent (♂)',
                             ticktext=parent_labels,
@@ -1462,8 +1860,17 @@ class DIALLEL:
         
         return fig
 
-    def _plot_analysis_summary(self, results: Dict) -> None:
-        """Plot comprehensive analysis summary without recursive analyze() call"""
+    def _plot_analysis_summary(self, results: Dict, show: bool = True):
+        """
+        Plot comprehensive analysis summary without recursive analyze() call
+        
+        Parameters
+        ----------
+        results : Dict
+            Results containing 'gca' and 'sca'
+        show : bool
+            If False, the figure is returned without being displayed
+        """
         # Set up the figure with 2x2 subplots with more height for bar plots
         fig = plt.figure(figsize=(15, 12))
         # Create gridspec with different heights for top and bottom rows
@@ -1587,17 +1994,17 @@ class DIALLEL:
         
         # Add parent labels to scatter
         for i in range(len(gca_truncated)):
-            ax4.annotate(f'P{indices[i]+1}', 
+            ax4.annotate(self.parent_labels[indices[i]], 
                         (gca_truncated[i], np.mean(sca_truncated[i])),
                         xytext=(5, 5),
                         textcoords='offset points')
         
         # Update parent labels for all plots
-        parent_labels = [f'P{indices[i]+1}' for i in range(n_display)]
+        parent_labels = [self.parent_labels[idx] for idx in indices]
         if truncate:
             # Add ellipsis for truncated labels
-            parent_labels[6] = f'P{7}...'
-            parent_labels[7] = f'P{self.parents-6}...'
+            parent_labels[6] = f'{self.parent_labels[6]}...'
+            parent_labels[7] = f'{self.parent_labels[self.parents-7]}...'
         
         # Apply labels to relevant plots
         for ax in [ax1, ax3]:
@@ -1615,15 +2022,22 @@ class DIALLEL:
         
         # Adjust layout to prevent overlapping
         plt.tight_layout()
-        plt.show()
+        if show:
+            plt.show()
+        return fig
 
-    def plot_diallel_overview(self) -> None:
+    def plot_diallel_overview(self, show: bool = True):
         """
         Create side-by-side visualization showing:
         1. Diallel Mating Design with parental notation
         2. Diallel Cross Values with heatmap
         
         For parents > 7, shows truncated view with first 3 and last 3 parents
+        
+        Parameters
+        ----------
+        show : bool
+            If False, the figure is returned without being displayed
         """
         # Create figure with two subplots and more vertical space
         fig = plt.figure(figsize=(22, 10))
@@ -1688,7 +2102,7 @@ class DIALLEL:
                     actual_j = indices[j]
                     text = f'O({actual_i+1},{actual_j+1})'
                     
-                    ax.text(j + 0.5, i + 0.5, text,
+                    ax1.text(j + 0.5, i + 0.5, text,
                             ha='center', va='center',
                             color='black',
                             fontsize=10,
@@ -1715,11 +2129,11 @@ class DIALLEL:
         ax1.set_ylabel('Parent (♀)', labelpad=10)
         
         # Add parent labels
-        parent_labels = [f'P{i+1}' for i in range(n_display)]
+        parent_labels = [self.parent_labels[idx] for idx in indices]
         if truncate:
             # Add ellipsis for truncated labels
-            parent_labels[2] = f'P{3}...'
-            parent_labels[3] = f'P{self.parents-2}...'
+            parent_labels[2] = f'{self.parent_labels[2]}...'
+            parent_labels[3] = f'{self.parent_labels[self.parents-3]}...'
         
         ax1.set_xticks(np.arange(n_display) + 0.5)
         ax1.set_yticks(np.arange(n_display) + 0.5)
@@ -1778,7 +2192,9 @@ class DIALLEL:
         
         # Adjust layout with specific spacing
         plt.subplots_adjust(top=0.85, bottom=0.15, left=0.1, right=0.9)
-        plt.show()
+        if show:
+            plt.show()
+        return fig
 
     def calculate_heterosis(self) -> Dict:
         """
@@ -1835,7 +2251,7 @@ class DIALLEL:
             for j in range(i+1, self.parents):
                 if not mask[i,j]:
                     heterotic_combinations.append({
-                        'cross': f'P{i+1} × P{j+1}',
+                        'cross': f'{self.parent_labels[i]} × {self.parent_labels[j]}',
                         'f1_value': self.data[i,j],
                         'p1_value': perse[i],
                         'p2_value': perse[j],
@@ -1858,7 +2274,8 @@ class DIALLEL:
             'top_combinations': top_combinations
         }
         
-    def animate_spatial_diallel(self, frames=90, interval=50, save_format='gif'):
+    def animate_spatial_diallel(self, frames=90, interval=50, save_format='gif',
+                                weights: Optional[Dict[str, float]] = None):
         """
         Create an animation showing the progression of calculating best combinations:
         1. Response values
@@ -1866,80 +2283,32 @@ class DIALLEL:
         3. SCA effects
         4. Heterosis (if available)
         5. Overall best combinations
+        
+        Parameters
+        ----------
+        weights : Dict[str, float], optional
+            Overall score weights passed to rank_crosses()
         """
-        if not hasattr(self, '_results'):
-            results = self.analyze(silent=True)
-        else:
-            results = self._results
+        results = self.get_results()
 
-        if results is None:
-            raise ValueError("Analysis results not available. Run analyze() first.")
+        # Score all crosses once
+        ranking = self.rank_crosses(weights=weights, results=results)
+        pi, pj = ranking['pairs']
+        ranking['overall'] = ranking['score']
+        top_combinations = ranking['top']
 
-        # Calculate heterosis if applicable
-        heterosis_data = []
-        if self.method in [1, 2]:
-            parent_values = np.diag(self.data)
-            for i in range(self.parents):
-                for j in range(i+1, self.parents):
-                    f1_value = self.data[i,j]
-                    parent1_value = parent_values[i]
-                    parent2_value = parent_values[j]
-                    better_parent = max(parent1_value, parent2_value)
-                    bph = ((f1_value - better_parent) / better_parent) * 100
-                    heterosis_data.append({
-                        'cross': f"P{i+1} × P{j+1}",
-                        'i': i,
-                        'j': j,
-                        'bph': bph
-                    })
+        def pair_matrix(values):
+            """Spread per-cross values symmetrically over the n × n grid"""
+            matrix = np.zeros_like(self.data, dtype=float)
+            matrix[pi, pj] = values
+            matrix[pj, pi] = values
+            return matrix
 
-        # Calculate overall scores
-        overall_scores = []
-        for i in range(self.parents):
-            for j in range(i+1, self.parents):
-                cross = f"P{i+1} × P{j+1}"
-                f1_value = self.data[i,j]
-                
-                # Response value score (normalized)
-                response_score = f1_value / np.max(self.data)
-                
-                # GCA score (normalized)
-                gca_sum = results['gca'][i] + results['gca'][j]
-                gca_score = (gca_sum - np.min(results['gca'])) / (np.max(results['gca']) - np.min(results['gca']))
-                
-                # SCA score (normalized)
-                sca_value = results['sca'][i,j]
-                sca_score = (sca_value - np.min(results['sca'])) / (np.max(results['sca']) - np.min(results['sca']))
-                
-                # Heterosis score (if available)
-                het_score = 0
-                if heterosis_data:
-                    het = next((h for h in heterosis_data if h['cross'] == cross), None)
-                    if het:
-                        het_score = het['bph'] / max(h['bph'] for h in heterosis_data)
-                
-                overall_scores.append({
-                    'cross': cross,
-                    'i': i,
-                    'j': j,
-                    'response': f1_value,
-                    'response_score': response_score,
-                    'gca_sum': gca_sum,
-                    'gca_score': gca_score,
-                    'sca': sca_value,
-                    'sca_score': sca_score,
-                    'heterosis': het['bph'] if heterosis_data and het else None,
-                    'het_score': het_score if heterosis_data else 0
-                })
-
-        # Sort by overall score
-        for score in overall_scores:
-            score['overall'] = (0.3 * score['response_score'] + 
-                              0.3 * score['gca_score'] + 
-                              0.2 * score['sca_score'] + 
-                              0.2 * score['het_score'])
-
-        top_combinations = sorted(overall_scores, key=lambda x: x['overall'], reverse=True)[:5]
+        # Top 5 crosses for each phase, selected once for all frames
+        phase_top = {key: _top_k(ranking[key], 5)
+                     for key in ['response_score', 'gca_score', 'sca_score',
+                                 'het_score', 'overall']}
+        w = ranking['weights']
 
         # Setup figure
         fig = plt.figure(figsize=(15, 8))
@@ -1960,35 +2329,28 @@ class DIALLEL:
                 phase = "Response Values"
                 matrix = self.data
                 highlight_score = 'response_score'
-                weight = "30%"
+                weight = f"{w['response']:.0%}"
             elif progress < 0.4:  # Phase 2: GCA effects
                 phase = "GCA Effects"
-                matrix = np.zeros_like(self.data)
-                for score in overall_scores:
-                    i, j = score['i'], score['j']
-                    matrix[i,j] = matrix[j,i] = score['gca_sum']
+                matrix = pair_matrix(ranking['gca_sum'])
                 highlight_score = 'gca_score'
-                weight = "30%"
+                weight = f"{w['gca']:.0%}"
             elif progress < 0.6:  # Phase 3: SCA effects
                 phase = "SCA Effects"
                 matrix = results['sca']
                 highlight_score = 'sca_score'
-                weight = "20%"
+                weight = f"{w['sca']:.0%}"
             elif progress < 0.8:  # Phase 4: Heterosis
                 phase = "Heterosis Effects"
-                matrix = np.zeros_like(self.data)
-                if heterosis_data:
-                    for het in heterosis_data:
-                        i, j = het['i'], het['j']
-                        matrix[i,j] = matrix[j,i] = het['bph']
+                if ranking['heterosis'] is not None:
+                    matrix = pair_matrix(ranking['heterosis'])
+                else:
+                    matrix = np.zeros_like(self.data, dtype=float)
                 highlight_score = 'het_score'
-                weight = "20%"
+                weight = f"{w['heterosis']:.0%}"
             else:  # Phase 5: Overall best combinations
                 phase = "Overall Best Combinations"
-                matrix = np.zeros_like(self.data)
-                for score in overall_scores:
-                    i, j = score['i'], score['j']
-                    matrix[i,j] = matrix[j,i] = score['overall']
+                matrix = pair_matrix(ranking['overall'])
                 highlight_score = 'overall'
                 weight = "Combined"
 
@@ -2017,28 +2379,25 @@ class DIALLEL:
             # Configure matrix plot
             ax_matrix.set_xticks(range(self.parents))
             ax_matrix.set_yticks(range(self.parents))
-            ax_matrix.set_xticklabels([f'P{i+1}' for i in range(self.parents)])
-            ax_matrix.set_yticklabels([f'P{i+1}' for i in range(self.parents)])
+            ax_matrix.set_xticklabels(list(self.parent_labels))
+            ax_matrix.set_yticklabels(list(self.parent_labels))
             ax_matrix.set_title(f'{phase} (Weight: {weight})')
 
             # Table visualization
             headers = ['Cross', 'Response', 'GCA Sum', 'SCA', 'Heterosis', 'Score']
             table_data = []
             
-            # Sort combinations by the current phase's score
-            sorted_combos = sorted(overall_scores, 
-                                 key=lambda x: x[highlight_score], 
-                                 reverse=True)[:5]
-            
-            for combo in sorted_combos:
-                het_str = f"{combo['heterosis']:.1f}%" if combo['heterosis'] is not None else "N/A"
+            # Top combinations by the current phase's score
+            for k in phase_top[highlight_score]:
+                het = ranking['heterosis']
+                het_str = f"{het[k]:.1f}%" if het is not None else "N/A"
                 row = [
-                    combo['cross'],
-                    f"{combo['response']:.2f}",
-                    f"{combo['gca_sum']:.2f}",
-                    f"{combo['sca']:.2f}",
+                    f"{self.parent_labels[pi[k]]} × {self.parent_labels[pj[k]]}",
+                    f"{ranking['response'][k]:.2f}",
+                    f"{ranking['gca_sum'][k]:.2f}",
+                    f"{ranking['sca'][k]:.2f}",
                     het_str,
-                    f"{combo[highlight_score]:.3f}"
+                    f"{ranking[highlight_score][k]:.3f}"
                 ]
                 table_data.append(row)
 
@@ -2129,8 +2488,8 @@ class DIALLEL:
         # Add parent labels
         ax.set_xticks(np.arange(self.parents) + 0.5)
         ax.set_yticks(np.arange(self.parents) + 0.5)
-        ax.set_xticklabels([f'P{i+1}' for i in range(self.parents)])
-        ax.set_yticklabels([f'P{i+1}' for i in range(self.parents)])
+        ax.set_xticklabels(list(self.parent_labels))
+        ax.set_yticklabels(list(self.parent_labels))
         
         # Add text annotations
         for i in range(self.parents):
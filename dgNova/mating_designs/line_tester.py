@@ -0,0 +1,365 @@
+from typing import Union, Optional, Dict
+import numpy as np
+import pandas as pd
+from scipy import stats
+from .combining_ability import cell_moments, rectangular_effects
+from .._lazy import lazy_import
+
+tabulate = lazy_import('tabulate', 'tabulate')
+
+class _FactorialCrosses:
+    """
+    Shared engine for designs crossing one parent set with another
+
+    Cross means are stored as a rectangular (rows × columns) matrix, so
+    a few testers crossed with many lines need no square padding.
+    Subclasses name the two parent sets.
+    """
+
+    row_name = 'Rows'
+    col_name = 'Columns'
+
+    def __init__(self,
+                 data: Union[np.ndarray, pd.DataFrame],
+                 response: str,
+                 row_col: str,
+                 col_col: str,
+                 rep_col: str):
+        self.response = response
+        self.row_col = row_col
+        self.col_col = col_col
+        self.rep_col = rep_col
+        self._cache = {}
+
+        if isinstance(data, pd.DataFrame):
+            self.raw_data = data
+            required = [row_col, col_col, response]
+            missing = [col for col in required if col not in data.columns]
+            if missing:
+                raise ValueError(f"Missing required columns: {missing}")
+            rows, row_levels = pd.factorize(data[row_col], sort=True)
+            cols, col_levels = pd.factorize(data[col_col], sort=True)
+            reps = (pd.factorize(data[rep_col], sort=True)[0]
+                    if rep_col in data.columns else None)
+            values = data[response].to_numpy(dtype=float)
+            self.row_labels = [str(level) for level in row_levels]
+            self.col_labels = [str(level) for level in col_levels]
+        elif isinstance(data, np.ndarray):
+            self.raw_data = None
+            if data.ndim == 2:
+                data = data[None]
+            elif data.ndim != 3:
+                raise ValueError(
+                    f"Data shape {data.shape} must be (rows, cols) or (reps, rows, cols)"
+                )
+            n_rep, n_row, n_col = data.shape
+            reps, rows, cols = (idx.ravel() for idx in np.indices(data.shape))
+            reps = reps if n_rep > 1 else None
+            values = np.asarray(data, dtype=float).ravel()
+            self.row_labels = [f"{self.row_name[0]}{i+1}" for i in range(n_row)]
+            self.col_labels = [f"{self.col_name[0]}{j+1}" for j in range(n_col)]
+        else:
+            raise ValueError("Data must be DataFrame or array")
+
+        self.rows = len(self.row_labels)
+        self.cols = len(self.col_labels)
+        if self.rows < 2 or self.cols < 2:
+            raise ValueError(f"At least 2 {self.row_name.lower()} and "
+                             f"2 {self.col_name.lower()} are required")
+
+        moments = cell_moments(rows * self.cols + cols, values, self.rows * self.cols)
+        if not moments['observed'].all():
+            raise ValueError("Every cross must be observed at least once")
+        self.data = moments['means'].reshape(self.rows, self.cols)
+        self.replications = float(stats.hmean(moments['counts']))
+        self.error_ss = moments['error_ss']
+        self.error_df = moments['error_df']
+
+        # Blocks by replicate: remove replicate totals from the within-cell error
+        self.rep_ss = 0.0
+        self.rep_df = 0
+        if reps is not None:
+            rep_sums = np.bincount(reps, weights=values)
+            rep_counts = np.bincount(reps)
+            self.rep_ss = float(np.sum(rep_sums**2 / rep_counts) -
+                                values.sum()**2 / values.size)
+            self.rep_df = rep_sums.size - 1
+            self.error_ss -= self.rep_ss
+            self.error_df -= self.rep_df
+
+    def _effects(self):
+        if 'effects' not in self._cache:
+            self._cache['effects'] = rectangular_effects(self.data)
+        return self._cache['effects']
+
+    @property
+    def row_gca(self) -> np.ndarray:
+        """GCA effects of the row parents"""
+        return self._effects()[0]
+
+    @property
+    def col_gca(self) -> np.ndarray:
+        """GCA effects of the column parents"""
+        return self._effects()[1]
+
+    @property
+    def sca(self) -> np.ndarray:
+        """SCA effects (rows × columns)"""
+        return self._effects()[2]
+
+    @property
+    def anova(self) -> Dict:
+        """ANOVA table of the crosses"""
+        if 'anova' not in self._cache:
+            self._cache['anova'] = self._calculate_anova()
+        return self._cache['anova']
+
+    def _calculate_anova(self) -> Dict:
+        """
+        Partition the crosses sum of squares into row, column and
+        interaction effects. Row and column parents are tested against
+        the interaction, the interaction and crosses against the error.
+        """
+        r = self.replications
+        l, t = self.rows, self.cols
+        row_gca, col_gca, sca = self._effects()
+
+        crosses_ss = r * np.sum((self.data - np.mean(self.data))**2)
+        row_ss = r * t * np.sum(row_gca**2)
+        col_ss = r * l * np.sum(col_gca**2)
+        int_ss = r * np.sum(sca**2)
+        interaction = f"{self.row_name} × {self.col_name}"
+
+        sources = ['Crosses', self.row_name, self.col_name, interaction]
+        ss = [crosses_ss, row_ss, col_ss, int_ss]
+        df = [l * t - 1, l - 1, t - 1, (l - 1) * (t - 1)]
+        tested_by = [-1, 3, 3, -1]
+        if self.rep_df > 0:
+            sources.insert(0, 'Replications')
+            ss.insert(0, self.rep_ss)
+            df.insert(0, self.rep_df)
+            tested_by = [-1, -1, 4, 4, -1]
+
+        ss = np.array(ss, dtype=float)
+        df = np.array(df, dtype=float)
+        ms = ss / df
+        error_ms = self.error_ss / self.error_df if self.error_df > 0 else np.nan
+        denominators = np.array([ms[k] if k >= 0 else error_ms for k in tested_by])
+        denominator_df = np.array([df[k] if k >= 0 else self.error_df for k in tested_by])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            f = ms / denominators
+        p = stats.f.sf(f, df, denominator_df)
+        testable = np.isfinite(f) & (denominator_df > 0)
+
+        anova = {
+            'Source': sources,
+            'df': df.tolist(),
+            'SS': ss.tolist(),
+            'MS': ms.tolist(),
+            'F': [float(v) if ok else None for v, ok in zip(f, testable)],
+            'p': [float(v) if ok else None for v, ok in zip(p, testable)]
+        }
+        if self.error_df > 0:
+            anova['Source'].append('Error')
+            anova['df'].append(self.error_df)
+            anova['SS'].append(self.error_ss)
+            anova['MS'].append(error_ms)
+            anova['F'].append(None)
+            anova['p'].append(None)
+        return anova
+
+    def _mean_square(self, source: str) -> float:
+        anova = self.anova
+        if source not in anova['Source']:
+            return np.nan
+        return anova['MS'][anova['Source'].index(source)]
+
+    def standard_errors(self) -> Optional[Dict]:
+        """Standard errors of row GCA, column GCA and SCA effects"""
+        if self.error_df <= 0:
+            return None
+        error_ms = self.error_ss / self.error_df
+        r = self.replications
+        return {
+            'row_gca': float(np.sqrt(error_ms / (r * self.cols))),
+            'col_gca': float(np.sqrt(error_ms / (r * self.rows))),
+            'sca': float(np.sqrt(error_ms / r))
+        }
+
+    def variance_components(self, inbreeding: float = 0.0) -> Dict:
+        """
+        Variance components from expected mean squares
+
+        Parameters
+        ----------
+        inbreeding : float
+            Inbreeding coefficient F of the parents (1 for inbred lines)
+
+        Returns
+        -------
+        Dict
+            Row, column and interaction variances and the additive and
+            dominance variances they imply
+        """
+        r = self.replications
+        interaction = f"{self.row_name} × {self.col_name}"
+        ms_int = self._mean_square(interaction)
+        ms_error = self.error_ss / self.error_df if self.error_df > 0 else 0.0
+
+        var_row = (self._mean_square(self.row_name) - ms_int) / (r * self.cols)
+        var_col = (self._mean_square(self.col_name) - ms_int) / (r * self.rows)
+        var_int = (ms_int - ms_error) / r
+        var_gca = (var_row + var_col) / 2
+        return {
+            'row': var_row,
+            'col': var_col,
+            'interaction': var_int,
+            'additive': 4 / (1 + inbreeding) * var_gca,
+            'dominance': (2 / (1 + inbreeding))**2 * var_int,
+            'gca_sca_ratio': var_gca / var_int if var_int else np.nan
+        }
+
+    def analyze(self, silent: bool = True) -> Dict:
+        """
+        Compute combining ability effects and the ANOVA
+
+        Parameters
+        ----------
+        silent : bool
+            If False, print the ANOVA table
+
+        Returns
+        -------
+        Dict
+            Row and column GCA, SCA, ANOVA, standard errors and the
+            percentage contribution of each source to the crosses
+        """
+        anova = self.anova
+        crosses_ss = anova['SS'][anova['Source'].index('Crosses')]
+        interaction = f"{self.row_name} × {self.col_name}"
+        contribution = {
+            source: 100 * anova['SS'][anova['Source'].index(source)] / crosses_ss
+            for source in [self.row_name, self.col_name, interaction]
+        } if crosses_ss > 0 else None
+
+        results = self._label_results({
+            'row_gca': self.row_gca,
+            'col_gca': self.col_gca,
+            'sca': self.sca,
+            'anova': anova,
+            'se': self.standard_errors(),
+            'contribution': contribution
+        })
+        if not silent:
+            rows = [[src, d, s, m, f if f is not None else '', p if p is not None else '']
+                    for src, d, s, m, f, p in zip(anova['Source'], anova['df'], anova['SS'],
+                                                  anova['MS'], anova['F'], anova['p'])]
+            print(tabulate(rows, headers=['Source', 'df', 'SS', 'MS', 'F', 'p'],
+                           floatfmt='.4f', tablefmt='simple'))
+        return results
+
+    def _label_results(self, results: Dict) -> Dict:
+        return results
+
+
+class LineTester(_FactorialCrosses):
+    """
+    Line × Tester Analysis
+
+    Lines (usually many) are crossed with a small set of testers. Line and
+    tester GCA and line × tester SCA follow Kempthorne (1957); lines and
+    testers are tested against the line × tester interaction.
+    """
+
+    row_name = 'Lines'
+    col_name = 'Testers'
+
+    def __init__(self,
+                 data: Union[np.ndarray, pd.DataFrame],
+                 response: str = 'Value',
+                 line_col: str = 'Line',
+                 tester_col: str = 'Tester',
+                 rep_col: str = 'Rep'):
+        """
+        Initialize Line × Tester Analysis
+
+        Parameters
+        ----------
+        data : array-like or DataFrame
+            Long DataFrame or array of shape (lines, testers) or
+            (reps, lines, testers)
+        response : str
+            Response variable column name
+        line_col : str
+            Column name for lines
+        tester_col : str
+            Column name for testers
+        rep_col : str
+            Column name for replications (blocks)
+        """
+        super().__init__(data, response, line_col, tester_col, rep_col)
+
+    @property
+    def lines(self) -> list:
+        return self.row_labels
+
+    @property
+    def testers(self) -> list:
+        return self.col_labels
+
+    def _label_results(self, results: Dict) -> Dict:
+        results['line_gca'] = results.pop('row_gca')
+        results['tester_gca'] = results.pop('col_gca')
+        return results
+
+
+class NCII(_FactorialCrosses):
+    """
+    North Carolina Design II Analysis
+
+    Every male of one set is crossed with every female of another set.
+    Males and females are tested against the male × female interaction,
+    which estimates dominance variance (Comstock and Robinson, 1948).
+    """
+
+    row_name = 'Males'
+    col_name = 'Females'
+
+    def __init__(self,
+                 data: Union[np.ndarray, pd.DataFrame],
+                 response: str = 'Value',
+                 male_col: str = 'Male',
+                 female_col: str = 'Female',
+                 rep_col: str = 'Rep'):
+        """
+        Initialize North Carolina Design II Analysis
+
+        Parameters
+        ----------
+        data : array-like or DataFrame
+            Long DataFrame or array of shape (males, females) or
+            (reps, males, females)
+        response : str
+            Response variable column name
+        male_col : str
+            Column name for males
+        female_col : str
+            Column name for females
+        rep_col : str
+            Column name for replications (blocks)
+        """
+        super().__init__(data, response, male_col, female_col, rep_col)
+
+    @property
+    def males(self) -> list:
+        return self.row_labels
+
+    @property
+    def females(self) -> list:
+        return self.col_labels
+
+    def _label_results(self, results: Dict) -> Dict:
+        results['male_gca'] = results.pop('row_gca')
+        results['female_gca'] = results.pop('col_gca')
+        return results
@@ -0,0 +1,219 @@
+from typing import Union, Optional, Dict
+import numpy as np
+import pandas as pd
+from scipy import stats
+from .diallel import DIALLEL, parent_ids, parent_labels
+from .combining_ability import cell_moments
+from .resampling import batch_gca, batch_sca, batch_reciprocal
+
+class MultiEnvDiallel:
+    """
+    Multi-Environment Diallel Analysis
+
+    Analyzes the same diallel grown in several environments. Effects of all
+    environments are computed in one pass over an (env × n × n) array, and
+    the combined ANOVA partitions GCA, SCA and reciprocal effects into
+    pooled effects and their interactions with environments.
+    """
+
+    def __init__(self,
+                 data: Union[np.ndarray, pd.DataFrame],
+                 parents: Optional[int] = None,
+                 method: int = 1,
+                 response: str = 'Value',
+                 parent1_col: str = 'Parent1',
+                 parent2_col: str = 'Parent2',
+                 env_col: str = 'Env',
+                 rep_col: str = 'Rep'):
+        """
+        Initialize Multi-Environment Diallel Analysis
+
+        Parameters
+        ----------
+        data : array-like or DataFrame
+            Array of shape (env, n, n) or long DataFrame with an
+            environment column
+        parents : int, optional
+            Number of parents (taken from the data if not given)
+        method : int
+            Griffing's method (1-4), see DIALLEL
+        response : str
+            Response variable column name
+        parent1_col : str
+            Column name for first parent
+        parent2_col : str
+            Column name for second parent
+        env_col : str
+            Column name for environments
+        rep_col : str
+            Column name for replications
+        """
+        if method not in [1, 2, 3, 4]:
+            raise ValueError("Method must be 1, 2, 3, or 4")
+        self.method = method
+
+        self.response = response
+        self.parent1_col = parent1_col
+        self.parent2_col = parent2_col
+        self.env_col = env_col
+        self.rep_col = rep_col
+
+        # Error sums from replicates (DataFrame input only)
+        self.error_ss = 0.0
+        self.error_df = 0
+        self.replications = 1.0
+
+        if isinstance(data, pd.DataFrame):
+            self.raw_data = data
+            self.data = self._reshape_data(data, parents)
+        elif isinstance(data, np.ndarray):
+            if data.ndim != 3 or data.shape[1] != data.shape[2]:
+                raise ValueError(
+                    f"Data shape {data.shape} must be (environments, parents, parents)"
+                )
+            self.raw_data = None
+            self.data = np.asarray(data, dtype=float)
+            self.parent_ids = list(range(1, data.shape[1] + 1))
+            self.env_labels = [f"E{e+1}" for e in range(data.shape[0])]
+        else:
+            raise ValueError("Data must be DataFrame or array")
+
+        self.environments, self.parents = self.data.shape[:2]
+        self.parent_labels = parent_labels(self.parent_ids)
+        if self.environments < 2:
+            raise ValueError("At least 2 environments are required")
+
+    def _reshape_data(self, df: pd.DataFrame, parents: Optional[int]) -> np.ndarray:
+        """Scatter long data into an (env, n, n) array of cell means"""
+        required = [self.env_col, self.parent1_col, self.parent2_col, self.response]
+        missing = [col for col in required if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+
+        self.parent_ids = parent_ids(df, self.parent1_col, self.parent2_col, parents)
+        n = len(self.parent_ids)
+        ids = pd.Index(self.parent_ids)
+        p1 = ids.get_indexer(df[self.parent1_col])
+        p2 = ids.get_indexer(df[self.parent2_col])
+        env_codes, env_levels = pd.factorize(df[self.env_col], sort=True)
+        self.env_labels = [str(env) for env in env_levels]
+        n_env = len(env_levels)
+
+        codes = (env_codes * n + p1) * n + p2
+        values = df[self.response].to_numpy(dtype=float)
+        moments = cell_moments(codes, values, n_env * n * n)
+
+        # Pooled within-cell error from replicates
+        if self.rep_col in df.columns:
+            self.error_ss = moments['error_ss']
+            self.error_df = moments['error_df']
+            self.replications = float(stats.hmean(moments['counts'][moments['observed']]))
+
+        return moments['means'].reshape(n_env, n, n)
+
+    def environment(self, env: int) -> DIALLEL:
+        """Single-environment DIALLEL object for environment index env"""
+        return DIALLEL(self.data[env].copy(), method=self.method)
+
+    def analyze(self) -> Dict:
+        """
+        Compute effects for every environment and the combined ANOVA.
+
+        Returns
+        -------
+        Dict
+            'gca' (env × n), 'sca' and 'reciprocal' (env × n × n), pooled
+            effects 'gca_pooled', 'sca_pooled' and 'reciprocal_pooled',
+            environment means and the combined 'anova' table
+        """
+        gca = batch_gca(self.data)
+        sca = batch_sca(self.data, gca)
+
+        pooled = np.mean(self.data, axis=0)
+        gca_pooled = batch_gca(pooled)
+        sca_pooled = batch_sca(pooled, gca_pooled)
+
+        results = {
+            'gca': gca,
+            'sca': sca,
+            'gca_pooled': gca_pooled,
+            'sca_pooled': sca_pooled,
+            'env_means': np.mean(self.data, axis=(1, 2))
+        }
+        if self.method in [1, 3]:
+            results['reciprocal'] = batch_reciprocal(self.data)
+            results['reciprocal_pooled'] = batch_reciprocal(pooled)
+
+        results['anova'] = self._calculate_anova(results)
+        return results
+
+    def _calculate_anova(self, results: Dict) -> Dict:
+        """
+        Combined ANOVA across environments.
+
+        Main effects are tested against their interaction with
+        environments; interactions and environments are tested against
+        the pooled replicate error on the cell-mean scale when available.
+        """
+        n = self.parents
+        n_env = self.environments
+        grand_mean = np.mean(self.data)
+
+        env_ss = n * n * np.sum((results['env_means'] - grand_mean)**2)
+        gca_ss = n_env * 2 * n * np.sum(results['gca_pooled']**2)
+        gca_env_ss = 2 * n * np.sum((results['gca'] - results['gca_pooled'])**2)
+        sca_ss = n_env * np.sum(results['sca_pooled']**2)
+        sca_env_ss = np.sum((results['sca'] - results['sca_pooled'])**2)
+
+        sources = ['Environment', 'GCA', 'SCA', 'GCA×E', 'SCA×E']
+        ss = [env_ss, gca_ss, sca_ss, gca_env_ss, sca_env_ss]
+        pairs = n * (n - 1) / 2
+        df = [n_env - 1, n - 1, pairs, (n_env - 1) * (n - 1), (n_env - 1) * pairs]
+        # Row index of the error term for each source (-1 = pooled error)
+        tested_by = [-1, 3, 4, -1, -1]
+
+        if self.method in [1, 3]:
+            rec_ss = n_env * 2 * np.sum(results['reciprocal_pooled']**2)
+            rec_env_ss = 2 * np.sum((results['reciprocal'] -
+                                     results['reciprocal_pooled'])**2)
+            sources[3:3] = ['Reciprocal']
+            ss[3:3] = [rec_ss]
+            df[3:3] = [pairs]
+            sources.append('Reciprocal×E')
+            ss.append(rec_env_ss)
+            df.append((n_env - 1) * pairs)
+            tested_by = [-1, 4, 5, 6, -1, -1, -1]
+
+        ss = np.array(ss, dtype=float)
+        df = np.array(df, dtype=float)
+        ms = ss / df
+
+        # Pooled error on the scale of cell means
+        if self.error_df > 0:
+            error_ms = self.error_ss / self.error_df / self.replications
+        else:
+            error_ms = np.nan
+        denominators = np.array([ms[k] if k >= 0 else error_ms for k in tested_by])
+        denominator_df = np.array([df[k] if k >= 0 else self.error_df for k in tested_by])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            f = ms / denominators
+        p = stats.f.sf(f, df, denominator_df)
+        testable = np.isfinite(f) & (denominator_df > 0)
+
+        anova = {
+            'Source': sources,
+            'df': df.tolist(),
+            'SS': ss.tolist(),
+            'MS': ms.tolist(),
+            'F': [float(v) if ok else None for v, ok in zip(f, testable)],
+            'p': [float(v) if ok else None for v, ok in zip(p, testable)]
+        }
+        if self.error_df > 0:
+            anova['Source'].append('Error')
+            anova['df'].append(self.error_df)
+            anova['SS'].append(self.error_ss / self.replications)
+            anova['MS'].append(error_ms)
+            anova['F'].append(None)
+            anova['p'].append(None)
+        return anova
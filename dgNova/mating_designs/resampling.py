@@ -0,0 +1,123 @@
+from typing import Optional, Dict, Tuple
+import numpy as np
+from ..core import parallel
+from ..core.parallel import CHUNK_CELLS
+
+def batch_gca(data: np.ndarray) -> np.ndarray:
+    """
+    General Combining Ability effects for a stack of diallel matrices
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Array of shape (..., n, n)
+
+    Returns
+    -------
+    np.ndarray
+        GCA effects of shape (..., n)
+    """
+    n = data.shape[-1]
+    grand_mean = np.mean(data, axis=(-2, -1))[..., None]
+    row_means = np.mean(data, axis=-1)
+    col_means = np.mean(data, axis=-2)
+    return (row_means + col_means) / (2 * (n - 2)) - grand_mean / (n - 2)
+
+def batch_sca(data: np.ndarray, gca: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Specific Combining Ability effects for a stack of diallel matrices
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Array of shape (..., n, n)
+    gca : np.ndarray, optional
+        GCA effects of shape (..., n); computed if not given
+
+    Returns
+    -------
+    np.ndarray
+        SCA effects of shape (..., n, n)
+    """
+    if gca is None:
+        gca = batch_gca(data)
+    grand_mean = np.mean(data, axis=(-2, -1))[..., None, None]
+    return data - grand_mean - gca[..., :, None] - gca[..., None, :]
+
+def batch_reciprocal(data: np.ndarray) -> np.ndarray:
+    """
+    Reciprocal effects (d_ij - d_ji) / 2 for a stack of diallel matrices
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Array of shape (..., n, n)
+
+    Returns
+    -------
+    np.ndarray
+        Reciprocal effects of shape (..., n, n) with a zero diagonal
+    """
+    rec = (data - np.swapaxes(data, -1, -2)) / 2
+    n = data.shape[-1]
+    rec[..., np.arange(n), np.arange(n)] = 0
+    return rec
+
+def chunk_sizes(replicates: int, n: int, chunk_size: Optional[int] = None) -> list:
+    """Split B replicates into chunks that keep (chunk, n, n) arrays bounded"""
+    return parallel.chunk_sizes(replicates, n * n, chunk_size)
+
+def _bootstrap_chunk(task: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """Draw one chunk of bootstrap replicates and return their GCA and SCA"""
+    size, seed, n, sample = task
+    rng = np.random.default_rng(seed)
+
+    if sample['kind'] == 'cells':
+        # Resample replicates within each cell (observations sorted by cell)
+        values, obs_start, obs_count = sample['values'], sample['obs_start'], sample['obs_count']
+        draws = obs_start + (rng.random((size, values.size)) * obs_count).astype(np.intp)
+        sums = np.add.reduceat(values[draws], sample['cell_start'], axis=1)
+        flat = np.zeros((size, n * n))
+        flat[:, sample['cells']] = sums / sample['cell_count']
+        matrices = flat.reshape(size, n, n)
+    else:
+        # Residual bootstrap of the GCA model over the observed cells
+        observed = sample['observed']
+        residuals = sample['residuals']
+        draws = rng.integers(0, residuals.size, size=(size, residuals.size))
+        matrices = np.broadcast_to(sample['data'], (size, n, n)).copy()
+        matrices[:, observed] = sample['fitted'][observed] + residuals[draws]
+
+    gca = batch_gca(matrices)
+    return gca, batch_sca(matrices, gca)
+
+def _permutation_chunk(task: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """Count permuted |GCA| and |SCA| effects at least as large as observed"""
+    size, seed, n, sample = task
+    rng = np.random.default_rng(seed)
+    observed = sample['observed']
+    m = int(observed.sum())
+    order = np.argsort(rng.random((size, m)), axis=1)
+
+    # GCA: exchange all observed cell values
+    matrices = np.broadcast_to(sample['data'], (size, n, n)).copy()
+    matrices[:, observed] = sample['data'][observed][order]
+    gca_hits = np.sum(np.abs(batch_gca(matrices)) >= sample['abs_gca'], axis=0)
+
+    # SCA: exchange residuals of the GCA model (Freedman-Lane)
+    matrices[:, observed] = sample['fitted'][observed] + sample['residuals'][order]
+    sca_hits = np.sum(np.abs(batch_sca(matrices)) >= sample['abs_sca'], axis=0)
+    return gca_hits, sca_hits
+
+def run_chunks(worker, sample: Dict, n: int, replicates: int,
+               seed: Optional[int] = None,
+               chunk_size: Optional[int] = None,
+               n_jobs: int = 1) -> list:
+    """
+    Evaluate replicates chunk by chunk, optionally in a process pool
+
+    Every chunk receives its own child of one SeedSequence, so results
+    are reproducible for a given seed regardless of n_jobs.
+    """
+    return parallel.run_chunks(worker, sample, replicates, n * n, seed=seed,
+                               chunk_size=chunk_size, n_jobs=n_jobs, args=(n,))
@@ -0,0 +1,16 @@
+import pytest
+from dgNova.core import critical_values
+
+@pytest.fixture(scope='session')
+def _cache_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp('dgNova-cache')
+
+@pytest.fixture(scope='session')
+def _studentized_range(_cache_dir):
+    return critical_values.StudentizedRange(cache_dir=str(_cache_dir))
+
+@pytest.fixture(autouse=True)
+def isolated_caches(monkeypatch, _cache_dir, _studentized_range):
+    """Keep the critical-value grid and result cache of the tests out of the user's home"""
+    monkeypatch.setenv('DGNOVA_CACHE_DIR', str(_cache_dir))
+    monkeypatch.setattr(critical_values, 'studentized_range', _studentized_range)
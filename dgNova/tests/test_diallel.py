@@ -0,0 +1,213 @@
+import pytest
+import numpy as np
+import pandas as pd
+from dgNova.mating_designs import DIALLEL
+from numpy.testing import assert_array_almost_equal
+
+class TestDiallel:
+    @pytest.fixture
+    def named_data(self):
+        """Full diallel with string parent IDs and 2 replications"""
+        rng = np.random.default_rng(1)
+        names = ['Lx', 'Ky', 'Az', 'Bw']
+        records = [(p1, p2, rep, rng.normal(10, 1))
+                   for p1 in names for p2 in names for rep in (1, 2)]
+        return pd.DataFrame(records, columns=['Parent1', 'Parent2', 'Rep', 'Value'])
+
+    def test_string_parent_ids(self, named_data):
+        diallel = DIALLEL(named_data)
+        assert diallel.parents == 4
+        assert diallel.parent_labels == ['Az', 'Bw', 'Ky', 'Lx']
+
+        # Cell (Lx, Az) holds the replicate mean
+        expected = named_data[(named_data['Parent1'] == 'Lx') &
+                              (named_data['Parent2'] == 'Az')]['Value'].mean()
+        assert diallel.data[3, 0] == pytest.approx(expected)
+
+    def test_integer_ids_match_string_ids(self, named_data):
+        mapping = {'Az': 1, 'Bw': 2, 'Ky': 3, 'Lx': 4}
+        int_data = named_data.assign(
+            Parent1=named_data['Parent1'].map(mapping),
+            Parent2=named_data['Parent2'].map(mapping)
+        )
+        by_name = DIALLEL(named_data)
+        by_int = DIALLEL(int_data)
+        assert by_int.parent_labels == ['P1', 'P2', 'P3', 'P4']
+        assert_array_almost_equal(by_int.data, by_name.data)
+
+    def test_parent_union(self):
+        """Parents that only appear in one column are still counted"""
+        df = pd.DataFrame({
+            'Parent1': ['A', 'A', 'B'],
+            'Parent2': ['B', 'C', 'C'],
+            'Value': [1.0, 2.0, 3.0]
+        })
+        diallel = DIALLEL(df, method=4)
+        assert diallel.parents == 3
+        assert diallel.data[1, 2] == 3.0
+
+    def test_rank_crosses(self):
+        np.random.seed(7)
+        diallel = DIALLEL(data=None, parents=6, method=2)
+        ranking = diallel.rank_crosses(top=4)
+
+        # One score per F1 cross, top crosses in descending score order
+        assert ranking['score'].shape == (15,)
+        top_scores = [combo['score'] for combo in ranking['top']]
+        assert top_scores == sorted(ranking['score'], reverse=True)[:4]
+
+        # Weights select the component that drives the ranking
+        by_gca = diallel.rank_crosses(
+            weights={'response': 0, 'gca': 1, 'sca': 0, 'heterosis': 0}, top=1
+        )
+        best = by_gca['top'][0]
+        assert best['gca_sum'] == pytest.approx(np.max(by_gca['gca_sum']))
+
+    def test_rank_crosses_invalid_weight(self):
+        diallel = DIALLEL(data=None, parents=4)
+        with pytest.raises(ValueError):
+            diallel.rank_crosses(weights={'yield': 1.0})
+
+    def test_bootstrap_intervals(self, named_data):
+        diallel = DIALLEL(named_data)
+        boot = diallel.bootstrap(replicates=200, seed=3)
+        assert boot['method'] == 'cells'
+        assert boot['gca_ci'].shape == (2, 4)
+        assert boot['sca_ci'].shape == (2, 4, 4)
+        assert np.all(boot['gca_ci'][0] <= boot['gca_ci'][1])
+
+        # The same seed and chunking reproduce the same intervals
+        first = diallel.bootstrap(replicates=200, seed=3, chunk_size=50)
+        second = diallel.bootstrap(replicates=200, seed=3, chunk_size=50)
+        assert_array_almost_equal(first['gca_ci'], second['gca_ci'])
+
+    def test_permutation_test(self, named_data):
+        diallel = DIALLEL(named_data)
+        perm = diallel.permutation_test(permutations=99, seed=5)
+        assert perm['gca_p'].shape == (4,)
+        assert perm['sca_p'].shape == (4, 4)
+        assert np.all((perm['gca_p'] > 0) & (perm['gca_p'] <= 1))
+
+    def test_cached_results_invalidate_on_new_data(self):
+        np.random.seed(11)
+        diallel = DIALLEL(data=None, parents=5, method=1)
+        gca = diallel.gca
+        assert diallel.gca is gca  # Cached
+
+        results = diallel.get_results(keys=['gca', 'anova'])
+        assert set(results) == {'gca', 'anova'}
+
+        # Data is read-only; assigning new data clears the cache
+        with pytest.raises(ValueError):
+            diallel.data[0, 1] = 0.0
+        new_data = diallel.data * 2
+        diallel.data = new_data
+        assert diallel.gca is not gca
+        assert_array_almost_equal(diallel.gca, 2 * gca)
+
+    def test_headless_analyze_and_render(self, tmp_path, capsys):
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        np.random.seed(2)
+        diallel = DIALLEL(data=None, parents=5, method=2)
+        results = diallel.analyze(plot=False)
+        assert {'gca', 'sca', 'anova'} <= set(results)
+        assert plt.get_fignums() == []
+        assert capsys.readouterr().out == ''
+
+        files = diallel.render(str(tmp_path), format='png')
+        assert set(files) == {'overview', 'summary'}
+        assert all((tmp_path / name).exists() for name in
+                   ['diallel_overview.png', 'diallel_summary.png'])
+        assert plt.get_fignums() == []
+
+    def test_multi_environment(self):
+        from dgNova.mating_designs import MultiEnvDiallel
+
+        rng = np.random.default_rng(4)
+        stack = rng.normal(10, 1, size=(3, 5, 5))
+        multi = MultiEnvDiallel(stack, method=1)
+        results = multi.analyze()
+
+        # Per-environment effects match single-environment analyses
+        for env in range(3):
+            single = DIALLEL(stack[env], method=1)
+            assert_array_almost_equal(results['gca'][env], single.gca)
+            assert_array_almost_equal(results['sca'][env], single.sca)
+
+        # GCA sums of squares split into pooled and GCA×E parts
+        anova = results['anova']
+        per_env = sum(2 * 5 * np.sum(gca**2) for gca in results['gca'])
+        gca_ss = anova['SS'][anova['Source'].index('GCA')]
+        gca_env_ss = anova['SS'][anova['Source'].index('GCA×E')]
+        assert per_env == pytest.approx(gca_ss + gca_env_ss)
+
+    def test_simulator(self):
+        from dgNova.mating_designs import DiallelSimulator
+
+        sim = DiallelSimulator(6, method=2, heritability=0.9, replications=2)
+        data, truth = sim.simulate(seed=8)
+        again, _ = sim.simulate(seed=8)
+        pd.testing.assert_frame_equal(data, again)
+
+        # Method 2: parents and one F1 per pair, in each replicate
+        assert len(data) == 2 * 21
+        assert truth['gca'].shape == (6,)
+        diallel = DIALLEL(data, method=2)
+        assert np.corrcoef(diallel.gca, truth['gca'])[0, 1] > 0.5
+
+        recovery = sim.recovery(simulations=200, seed=1, chunk_size=64)
+        assert recovery['gca_correlation'].shape == (200,)
+        assert recovery['mean_gca_correlation'] > 0.8
+
+    def test_plan_crosses(self):
+        from dgNova.mating_designs import plan_crosses
+
+        # Greedy takes A×B first; the local search rewires to A×C + B×D
+        values = np.full((4, 4), -np.inf)
+        for (i, j), v in {(0, 1): 10, (0, 2): 9, (1, 3): 9, (2, 3): 1}.items():
+            values[i, j] = v
+        greedy = plan_crosses(values, 2, max_uses=1, improve=False)
+        assert greedy['total'] == 11
+        plan = plan_crosses(values, 2, max_uses=1)
+        assert plan['total'] == 18
+        assert plan['crosses'] == ['P1 × P3', 'P2 × P4']
+
+        np.random.seed(3)
+        diallel = DIALLEL(data=None, parents=8, method=2)
+        plan = diallel.plan_crosses(n_crosses=6, max_uses=2)
+        assert plan['complete']
+        assert len(plan['crosses']) == 6
+        assert plan['uses'].max() <= 2
+
+    def test_line_tester(self):
+        from dgNova.mating_designs import LineTester, NCII
+
+        rng = np.random.default_rng(6)
+        values = rng.normal(10, 1, size=(3, 5, 2))  # reps × lines × testers
+        reps, lines, testers = np.indices(values.shape).reshape(3, -1)
+        df = pd.DataFrame({
+            'Rep': reps + 1,
+            'Line': [f"L{i}" for i in lines],
+            'Tester': [f"T{j}" for j in testers],
+            'Value': values.ravel()
+        })
+        analysis = LineTester(df)
+        assert analysis.data.shape == (5, 2)
+        results = analysis.analyze()
+        assert results['line_gca'].shape == (5,)
+        assert results['tester_gca'].shape == (2,)
+
+        # Replications, crosses and error add up to the total sum of squares
+        anova = results['anova']
+        ss = dict(zip(anova['Source'], anova['SS']))
+        total = np.sum((values - values.mean())**2)
+        assert ss['Replications'] + ss['Crosses'] + ss['Error'] == pytest.approx(total)
+        assert ss['Lines'] + ss['Testers'] + ss['Lines × Testers'] == pytest.approx(ss['Crosses'])
+
+        # NC-II uses the same engine on the same array layout
+        nc = NCII(values).analyze()
+        assert_array_almost_equal(nc['male_gca'], results['line_gca'])
+        assert 'Males × Females' in nc['anova']['Source']
@@ -0,0 +1,435 @@
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from dgNova.core.statistics import Statistics
+from dgNova.field_designs import RCBD
+from dgNova.field_designs.split_plot import SplitPlot
+from dgNova.field_designs.latin_square import LatinSquare
+
+class TestAnovaEngine:
+    @pytest.fixture
+    def rcbd_data(self):
+        return np.random.default_rng(0).normal(10, 1, size=(4, 6))
+
+    def test_rcbd_matches_formulas(self, rcbd_data):
+        anova = Statistics.calculate_anova_rcbd(rcbd_data, 6, 4)
+        grand_mean = rcbd_data.mean()
+        block_ss = 6 * np.sum((rcbd_data.mean(axis=1) - grand_mean)**2)
+        treatment_ss = 4 * np.sum((rcbd_data.mean(axis=0) - grand_mean)**2)
+        assert anova['source'] == ['Block', 'Treatment', 'Error', 'Total']
+        assert anova['df'] == [3, 5, 15, 23]
+        assert anova['ss'][0] == pytest.approx(block_ss)
+        assert anova['ss'][1] == pytest.approx(treatment_ss)
+
+    def test_nested_term(self):
+        """A combination listed without its inner factor is nested"""
+        rng = np.random.default_rng(1)
+        rep, block, plot = np.indices((2, 3, 4))
+        y = rng.normal(size=rep.shape)
+        anova = Statistics.anova(y, {'Rep': rep, 'Block': block}, ['Rep', 'Rep:Block'])
+        block_means = y.mean(axis=2)
+        expected = 4 * np.sum((block_means - block_means.mean(axis=1, keepdims=True))**2)
+        assert anova['df'][:2] == [1, 4]
+        assert anova['ss'][1] == pytest.approx(expected)
+
+    def test_design_classes_dispatch(self, rcbd_data):
+        results = RCBD(rcbd_data, treatments=6, blocks=4).analyze()
+        assert {'anova', 'cv', 'tukey', 'dmrt'} <= set(results)
+
+        split = SplitPlot(rcbd_data.reshape(4, 6), 2, 3, 4).analyze()
+        assert split['anova']['source'][2] == 'Error(a)'
+        assert sum(split['anova']['ss'][:-1]) == pytest.approx(split['anova']['ss'][-1])
+
+        square = LatinSquare(rcbd_data[:4, :4], 4).analyze()
+        assert square['anova']['df'] == [3, 3, 3, 6, 15]
+
+    def test_split_plot_frame_rejects_missing_and_duplicate_plots(self):
+        block, main, sub = np.indices((3, 2, 2))
+        frame = pd.DataFrame({'Block': block.ravel() + 1, 'MainPlot': main.ravel() + 1,
+                              'SubPlot': sub.ravel() + 1,
+                              'Yield': np.random.default_rng(3).normal(10, 1, 12)})
+        assert SplitPlot(frame, 2, 2, 3).data.shape == (3, 2, 2)
+        with pytest.raises(ValueError, match="Missing"):
+            SplitPlot(frame.drop(index=4), 2, 2, 3)
+        with pytest.raises(ValueError, match="Multiple"):
+            SplitPlot(pd.concat([frame.drop(index=4), frame.iloc[[5]]]), 2, 2, 3)
+
+    def test_intrablock_error(self):
+        """Intrablock error equals the residual of the full block + treatment model"""
+        rng = np.random.default_rng(2)
+        records = []
+        for rep in (1, 2, 3):
+            order = rng.permutation(12)
+            for b in range(4):
+                records += [(rep, b, t, rng.normal(10)) for t in order[3 * b:3 * b + 3]]
+        df = pd.DataFrame(records, columns=['Rep', 'Block', 'Treatment', 'Yield'])
+        anova = Statistics.anova_intrablock(df['Yield'], df['Rep'], df['Block'], df['Treatment'])
+
+        blocks = pd.get_dummies(df['Rep'].astype(str) + '_' + df['Block'].astype(str))
+        X = np.hstack([blocks.to_numpy(float),
+                       pd.get_dummies(df['Treatment']).to_numpy(float)])
+        coef = np.linalg.lstsq(X, df['Yield'].to_numpy(), rcond=None)[0]
+        residual = np.sum((df['Yield'].to_numpy() - X @ coef)**2)
+        assert anova['ss'][3] == pytest.approx(residual)
+        assert anova['df'][3] == len(df) - np.linalg.matrix_rank(X)
+
+    def test_alpha_lattice_adjusted_means(self):
+        """Every plot is adjusted by its block's deviation from the grand mean"""
+        from dgNova.field_designs.alpha_lattice import AlphaLattice
+        rng = np.random.default_rng(2)
+        records = []
+        for rep in (1, 2, 3):
+            order = rng.permutation(12)
+            for b in range(4):
+                records += [(rep, b + 1, t + 1, rng.normal(10)) for t in order[3 * b:3 * b + 3]]
+        df = pd.DataFrame(records, columns=['Rep', 'Block', 'Treatment', 'Yield'])
+        results = AlphaLattice(df, 12, 3, 3).analyze()
+        effect = df.groupby(['Rep', 'Block'])['Yield'].transform('mean') - df['Yield'].mean()
+        expected = (df['Yield'] - effect).groupby(df['Treatment']).mean().to_numpy()
+        np.testing.assert_allclose(results['adjusted_means'], expected)
+
+    def test_stacked_traits(self):
+        rng = np.random.default_rng(3)
+        traits = rng.normal(10, 1, size=(5, 4, 6))
+        batch = Statistics.calculate_anova_rcbd(traits, 6, 4)
+        assert batch['ss'].shape == (4, 5)
+        assert batch['traits'] == (5,)
+
+        # Each trait's table equals its own single-trait analysis
+        for k in range(5):
+            single = Statistics.calculate_anova_rcbd(traits[k], 6, 4)
+            table = Statistics.trait_anova(batch, k)
+            assert table['ss'] == pytest.approx(single['ss'])
+            assert table['p_value'][1] == pytest.approx(single['p_value'][1])
+            assert table['f_value'][2] is None
+
+class TestCriticalValues:
+    def test_sweep_against_scipy(self):
+        """Fractional, small and large df agree with SciPy to a relative 1e-6"""
+        from scipy import stats
+        from dgNova.core.critical_values import StudentizedRange
+        provider = StudentizedRange(persist=False)
+        ps = np.array([2, 7, 15])
+        for df in [0.5, 1.5, 7.3, 130, 400, 5000]:
+            expected = stats.studentized_range.ppf(0.95, ps, df)
+            np.testing.assert_allclose(provider.q(ps, df), expected,
+                                       rtol=1e-6, err_msg=f"df={df}")
+        with pytest.raises(ValueError):
+            provider.q(3, 0)
+
+    def test_matches_scipy_and_persists(self, tmp_path):
+        from scipy import stats
+        from dgNova.core.critical_values import StudentizedRange
+        provider = StudentizedRange(cache_dir=str(tmp_path))
+        for p, df in [(3, 10), (8, 24.5), (27, 60), (45, 150)]:
+            expected = stats.studentized_range.ppf(0.95, p, df)
+            assert provider.q(p, df) == pytest.approx(expected, rel=1e-6)
+        assert provider._quantile.cache_info().misses == 4
+        provider.q(3, 10)
+        assert provider._quantile.cache_info().hits == 1
+
+        # A fresh provider answers from the file without recomputing
+        reloaded = StudentizedRange(cache_dir=str(tmp_path))
+        assert reloaded._load() == provider._nodes
+        assert reloaded.q(27, 60) == provider.q(27, 60)
+        # Only integer and node df are written to disk
+        assert sorted(reloaded._load()['0.05']) == ['10.0', '150.0', '60.0']
+
+    def test_dmrt_ranges_increase(self):
+        means = np.array([10.0, 12.0, 11.0, 15.0, 9.0])
+        result = Statistics.dmrt_test(means, mse=1.0, df_error=12, n_reps=3)
+        assert len(result['ranges']) == 4
+        assert np.all(np.diff(result['ranges']) > 0)
+
+class TestLetterDisplay:
+    def test_overlapping_groups(self):
+        from dgNova.core.letters import compact_letter_display
+        means = np.array([10.0, 9.5, 9.0, 8.0, 7.9, 5.0])
+        significant = np.abs(means[:, None] - means[None, :]) > 1.05
+        assert compact_letter_display(significant, means) == ['a', 'a', 'ab', 'bc', 'c', 'd']
+
+    def test_letters_encode_significance(self):
+        from dgNova.core.letters import compact_letter_display
+        rng = np.random.default_rng(3)
+        significant = np.triu(rng.random((8, 8)) < 0.4, k=1)
+        significant |= significant.T
+        groups = compact_letter_display(significant)
+        for i in range(8):
+            for j in range(i + 1, 8):
+                assert bool(set(groups[i]) & set(groups[j])) != significant[i, j]
+
+    def test_more_than_26_groups(self):
+        means = np.arange(60, dtype=float) * 10
+        result = Statistics.lsd_test(means, mse=1.0, df_error=100, n_reps=4)
+        assert len(set(result['groups'])) == 60
+        assert 'a1' in result['groups']
+
+    def test_lattice_tukey_groups(self):
+        from dgNova.field_designs.lattice import Lattice
+        treatment = Lattice(9, 2)._plot_factors()['Treatment']
+        rng = np.random.default_rng(4)
+        effects = np.repeat([0.0, 5.0, 10.0], 3)
+        # Strong block effects give a positive adjustment weight
+        data = (10 + effects[treatment] + rng.normal(0, 3, 6)[:, None] +
+                rng.normal(0, 0.3, (6, 3)))
+        lattice = Lattice(9, 2, data=data)
+        assert lattice._calculate_adjusted_means()['weight'] > 0
+        result = lattice.tukey_test()
+        assert list(result['groups']) == ['c'] * 3 + ['b'] * 3 + ['a'] * 3
+
+        # Without a finite standard error no groups can be formed
+        with pytest.raises(ValueError, match="not finite"):
+            Statistics.tukey_test(np.arange(4.0), mse=np.nan, df_error=10, n_reps=2)
+
+class TestPairwiseComparisons:
+    def test_condensed_order_and_table(self):
+        from dgNova.core.pairwise import PairwiseComparisons, pair_index, condensed_position
+        first, second = pair_index(6)
+        expected = np.triu_indices(6, k=1)
+        assert np.array_equal(first, expected[0]) and np.array_equal(second, expected[1])
+        assert np.array_equal(condensed_position(first, second, 6), np.arange(15))
+
+        means = np.array([5.0, 7.0, 6.0, 1.0])
+        comparisons = PairwiseComparisons(means, 0.5, 3.0)
+        assert len(comparisons) == 6
+        assert comparisons.pair(2, 0)['difference'] == pytest.approx(1.0)
+        frame = comparisons.to_frame()
+        assert list(frame["significant"]) == [True, False, True, False, True, True]
+        assert comparisons.square()[3].sum() == 3
+
+    def test_tests_share_storage(self):
+        means = np.array([12.0, 11.6, 11.0, 10.2, 9.9, 8.0])
+        for test in (Statistics.tukey_test, Statistics.dmrt_test, Statistics.lsd_test):
+            comparisons = test(means, 0.5, 20, 3)['comparisons']
+            assert comparisons.significant.shape == (15,)
+
+class TestAssumptionChecks:
+    def test_homogeneity_matches_scipy_for_stacked_traits(self):
+        from scipy import stats
+        rng = np.random.default_rng(5)
+        values = rng.normal(size=(120, 2))
+        groups = np.repeat(np.arange(4), 30)
+        values[groups == 2] *= 3
+        for center in ('median', 'mean'):
+            result = Statistics.check_homogeneity(values, groups, center=center)
+            for j in range(2):
+                expected = stats.levene(*[values[groups == g, j] for g in range(4)], center=center)
+                assert result['statistic'][j] == pytest.approx(expected.statistic)
+                assert result['p_value'][j] == pytest.approx(expected.pvalue)
+
+    def test_normality_test_follows_sample_size(self):
+        rng = np.random.default_rng(6)
+        assert Statistics.check_normality(rng.normal(size=100))['test'] == 'Shapiro-Wilk'
+        large = Statistics.check_normality(rng.normal(size=(6000, 3)))
+        assert large['test'] == "D'Agostino-Pearson"
+        assert large['p_value'].shape == (3,)
+        skewed = Statistics.check_normality(rng.exponential(size=500), method='anderson')
+        assert skewed['p_value'] < 0.001
+
+class TestDiagnosticFigures:
+    def test_qq_points_are_thinned_with_tails(self):
+        from dgNova.core.diagnostics import qq_points
+        residuals = np.random.default_rng(7).normal(size=50_000)
+        theoretical, sample = qq_points(residuals, max_points=1000)
+        assert sample.size <= 1000
+        assert sample[0] == residuals.min() and sample[-1] == residuals.max()
+        assert np.all(np.diff(theoretical) > 0)
+
+    def test_figures_written_headless(self, tmp_path):
+        from dgNova.core.diagnostics import render_diagnostics
+        rng = np.random.default_rng(8)
+        paths = render_diagnostics(rng.normal(size=(8000, 2)), rng.normal(size=(8000, 2)),
+                                   str(tmp_path), names=['yield', 'height'])
+        assert all((tmp_path / name).stat().st_size > 0 for name in ['yield.png', 'height.png'])
+        assert len(paths) == 2
+
+class TestPermutationAnova:
+    def test_rcbd_permutes_within_blocks(self):
+        rng = np.random.default_rng(9)
+        data = rng.normal(10, 1, size=(4, 6)) + np.arange(4)[:, None] * 5
+        data[:, 0] += 2
+        parametric = Statistics.calculate_anova_rcbd(data, 6, 4)
+        result = Statistics.permutation_test_rcbd(data, permutations=20000, seed=1)
+        assert result['f_value'] == pytest.approx(parametric['f_value'][1])
+        assert result['df'] == (5, 15)
+        assert abs(result['p_value'] - result['p_parametric']) < 0.05
+
+    def test_crd_reproducible_across_workers(self):
+        data = np.random.default_rng(10).exponential(size=(5, 4))
+        serial = Statistics.permutation_test_crd(data, permutations=5000, seed=2, chunk_size=1000)
+        parallel = Statistics.permutation_test_crd(data, permutations=5000, seed=2,
+                                                   chunk_size=1000, n_jobs=2)
+        assert serial['p_value'] == parallel['p_value']
+        assert 1 / 5001 <= serial['p_value'] <= 1
+
+class TestMixedModel:
+    def test_balanced_rcbd_matches_anova_estimates(self):
+        rng = np.random.default_rng(11)
+        data = (rng.normal(0, 1.5, size=(1, 40)) + rng.normal(0, 1, size=(3, 1)) +
+                rng.normal(10, 1, size=(3, 40)))
+        result = RCBD(data, 40, 3).analyze(model='mixed')
+        anova = Statistics.calculate_anova_rcbd(data, 40, 3)
+        components = result['variance_components']
+        assert result['converged']
+        assert components['Residual'] == pytest.approx(anova['ms'][2], rel=1e-5)
+        assert components['Treatment'] == pytest.approx((anova['ms'][1] - anova['ms'][2]) / 3,
+                                                        rel=1e-5)
+        assert result['heritability']['cullis'] == pytest.approx(
+            result['heritability']['standard'], rel=1e-6)
+
+    def test_ai_and_em_agree_with_random_blocks(self):
+        from dgNova.core.mixed_model import MixedModel
+        rng = np.random.default_rng(12)
+        rep = np.repeat(np.arange(2), 60)
+        treatment = np.concatenate([rng.permutation(60) for _ in range(2)])
+        block = rep * 10 + np.tile(np.arange(60) // 6, 2)
+        y = (rng.normal(0, 1, 60)[treatment] + rng.normal(0, 0.7, 20)[block] +
+             rng.normal(0, 1, 120))
+        model = MixedModel(y, fixed={'Rep': rep}, random={'Block': block, 'Treatment': treatment})
+        ai = model.fit()
+        em = model.fit(method='em', max_iter=2000, tol=1e-8)
+        assert ai['converged'] and ai['iterations'] < em['iterations']
+        for name in ('Block', 'Treatment', 'Residual'):
+            assert ai['variance_components'][name] == pytest.approx(
+                em['variance_components'][name], rel=1e-3)
+        assert ai['blups']['Treatment'].shape == (60,)
+
+class TestMissingPlots:
+    def test_single_missing_plot_matches_yates_formula(self):
+        rng = np.random.default_rng(13)
+        data = rng.normal(10, 2, size=(4, 6))
+        data[1, 2] = np.nan
+        analysis = RCBD(data, 6, 4)
+        block_total, trt_total, grand = (np.nansum(data[1]), np.nansum(data[:, 2]),
+                                         np.nansum(data))
+        expected = (4 * block_total + 6 * trt_total - grand) / (3 * 5)
+        assert analysis.data[1, 2] == pytest.approx(expected, rel=1e-8)
+        results = analysis.analyze()
+        assert results['anova']['df'] == [3, 5, 14, 22]
+        assert results['missing_plots']['count'] == 1
+
+    def test_missing_plot_anova_matches_least_squares(self):
+        rng = np.random.default_rng(14)
+        data = rng.normal(10, 2, size=(30, 40))
+        data[rng.random(data.shape) < 0.1] = np.nan
+        anova = Statistics.calculate_anova_rcbd(data, 40, 30)
+        block, treatment = np.indices(data.shape)
+        keep = ~np.isnan(data)
+        y = data[keep]
+
+        def residual_ss(*factors):
+            columns = [np.ones(y.size)] + [(f[keep] == level).astype(float)
+                                           for f in factors for level in range(1, f.max() + 1)]
+            design = np.column_stack(columns)
+            return np.sum((y - design @ np.linalg.lstsq(design, y, rcond=None)[0]) ** 2)
+
+        full = residual_ss(block, treatment)
+        assert anova['df'][2] == y.size - 30 - 40 + 1
+        assert anova['ss'][2] == pytest.approx(full, rel=1e-6)
+        assert anova['ss'][1] == pytest.approx(residual_ss(block) - full, rel=1e-6)
+
+    def test_latin_square_from_dataframe_keeps_missing_plot(self):
+        n = 5
+        row, column = np.indices((n, n))
+        rng = np.random.default_rng(15)
+        frame = pd.DataFrame({'Row': row.ravel(), 'Column': column.ravel(),
+                              'Treatment': ((row + column) % n).ravel(),
+                              'Yield': rng.normal(10, 1, n * n)})
+        frame.loc[7, 'Yield'] = np.nan
+        results = LatinSquare(frame, n).analyze()
+        assert results['anova']['df'][-2:] == [11, 23]
+        assert np.isfinite(results['missing_plots']['estimates']).all()
+
+    def test_latin_square_dropped_and_duplicated_records(self):
+        n = 5
+        row, column = np.indices((n, n))
+        rng = np.random.default_rng(15)
+        layout = (row + 2 * column) % n
+        frame = pd.DataFrame({'Row': row.ravel(), 'Column': column.ravel(),
+                              'Treatment': layout.ravel(),
+                              'Yield': rng.normal(10, 1, n * n)})
+        with_nan = frame.copy()
+        with_nan.loc[7, 'Yield'] = np.nan
+        expected = LatinSquare(with_nan, n).analyze()
+        # A lost record: its treatment follows from its row and column
+        square = LatinSquare(frame.drop(index=7), n)
+        np.testing.assert_array_equal(square.layout, layout)
+        results = square.analyze()
+        assert results['anova']['ss'] == pytest.approx(expected['anova']['ss'])
+        np.testing.assert_allclose(results['missing_plots']['estimates'],
+                                   expected['missing_plots']['estimates'])
+        # A lost 3 × 3 corner is ambiguous without a layout
+        lost = frame[(frame['Row'] >= 3) | (frame['Column'] >= 3)]
+        with pytest.raises(ValueError, match="layout"):
+            LatinSquare(lost, n)
+        assert LatinSquare(lost, n, layout=layout).missing.sum() == 9
+        with pytest.raises(ValueError, match="Multiple"):
+            LatinSquare(pd.concat([frame.drop(index=7), frame.iloc[[3]]]), n)
+
+    def test_crd_uses_observed_plots(self):
+        from scipy import stats
+        from dgNova.field_designs.crd import CRD
+        rng = np.random.default_rng(17)
+        rep, trt = np.indices((3, 5))
+        frame = pd.DataFrame({'Rep': rep.ravel() + 1, 'Treatment': trt.ravel() + 1,
+                              'Yield': rng.normal(10, 1, size=15) + trt.ravel()})
+        analysis = CRD(frame.drop(index=3), 5, 3)
+        results = analysis.analyze()
+        groups = [g['Yield'].to_numpy() for _, g in frame.drop(index=3).groupby('Treatment')]
+        f_value, p_value = stats.f_oneway(*groups)
+        assert results['anova']['df'] == [4, 9, 13]
+        assert results['anova']['f_value'][0] == pytest.approx(f_value)
+        assert results['anova']['p_value'][0] == pytest.approx(p_value)
+        np.testing.assert_allclose(results['means'], [g.mean() for g in groups])
+        assert results['missing_plots']['replications'].tolist() == [3, 3, 3, 2, 3]
+        assert np.isfinite(results['standard_errors']).all() and np.isfinite(results['cv'])
+        assert len(results['tukey']['groups']) == 5
+        assert analysis.permutation_test(permutations=200, seed=1)['df'] == (4, 9)
+        with pytest.raises(ValueError, match="Multiple"):
+            CRD(pd.concat([frame, frame.iloc[[0]]]), 5, 3)
+
+class TestResultCache:
+    def test_hit_returns_stored_arrays(self, tmp_path):
+        from dgNova.core.result_cache import ResultCache, cached_analysis
+        cache = ResultCache(str(tmp_path), mmap_bytes=64)
+        data = np.random.default_rng(16).normal(10, 1, size=(3, 20))
+        first = cached_analysis(RCBD, data, 20, 3, cache=cache)
+        second = cached_analysis(RCBD, data, 20, 3, cache=cache)
+        assert isinstance(second['means'], np.memmap)
+        np.testing.assert_array_equal(second['means'], first['means'])
+        assert second['anova'] == first['anova']
+        assert cache.info()['entries'] == 1
+        # Different parameters or data are different entries
+        cached_analysis(RCBD, data[:2], 20, 2, cache=cache)
+        assert len(cache.entries()) == 2
+
+    def test_lru_eviction_and_clear(self, tmp_path):
+        from dgNova.core.result_cache import ResultCache
+        cache = ResultCache(str(tmp_path))
+        keys = [f"{k:064x}" for k in range(3)]
+        for k, key in enumerate(keys):
+            cache.put(key, {'values': np.full(1000, k, dtype=float)})
+            os.utime(tmp_path / key, (1e9 + k, 1e9 + k))
+        cache.get(keys[0])
+        cache.evict(max_bytes=2 * 8500)
+        assert keys[0] in cache and keys[2] in cache and keys[1] not in cache
+        cache.clear()
+        assert cache.info()['entries'] == 0
+
+    def test_unrelated_files_survive(self, tmp_path):
+        from dgNova.core.result_cache import ResultCache
+        (tmp_path / 'my_project_data').mkdir()
+        (tmp_path / 'my_project_data' / 'trial.csv').write_text('a,b\n1,2\n')
+        (tmp_path / 'notes.txt').write_text('keep')
+        (tmp_path / f"{1:064x}").mkdir()
+        cache = ResultCache(str(tmp_path), max_bytes=0)
+        cache.put(f"{2:064x}", {'values': np.zeros(100)})
+        assert cache.evict(max_bytes=0) == 0
+        cache.put(f"{3:064x}", {'values': np.zeros(100)})
+        cache.clear()
+        assert (tmp_path / 'my_project_data' / 'trial.csv').read_text() == 'a,b\n1,2\n'
+        assert (tmp_path / 'notes.txt').exists() and (tmp_path / f"{1:064x}").is_dir()
+        assert tmp_path.is_dir() and cache.info()['entries'] == 0
+        with pytest.raises(ValueError):
+            cache.put('../my_project_data', {})
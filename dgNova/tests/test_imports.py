@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'tabulate', 'colorama']
+
+def _loaded_after(statement: str) -> list:
+    """Heavy modules present in sys.modules after running statement in a fresh interpreter"""
+    code = (f"import sys; {statement}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                         text=True, check=True).stdout.strip()
+    return [m for m in out.split(',') if m]
+
+class TestImports:
+    def test_import_does_not_load_plotting(self):
+        assert _loaded_after("import dgNova") == []
+
+    def test_class_access_does_not_load_plotting(self):
+        statement = ("from dgNova import DIALLEL, UNREP; "
+                     "import dgNova.field_designs, dgNova.core, dgNova.io")
+        assert _loaded_after(statement) == []
+
+    def test_lazy_attributes(self):
+        import dgNova
+        from dgNova.mating_designs import DIALLEL
+        assert dgNova.DIALLEL is DIALLEL
+        assert 'RCBD' in dir(dgNova)
@@ -53,6 +53,30 @@ class TestIO:
         finally:
             os.unlink(tmp.name)
             
+    def test_read_data_chunked_pivot(self, sample_data):
+        """Chunked reading gives the same matrix as a pandas pivot"""
+        shuffled = sample_data.sample(frac=1, random_state=0)
+        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp:
+            shuffled.to_csv(tmp.name, index=False)
+            
+        try:
+            data, metadata = input.read_data(tmp.name, chunksize=2)
+            expected = sample_data.pivot(index='block', columns='treatment',
+                                         values='response').to_numpy()
+            np.testing.assert_array_equal(data, expected)
+            assert metadata['treatment_levels'] == [1, 2, 3]
+        finally:
+            os.unlink(tmp.name)
+            
+    def test_read_data_duplicate_and_missing_cells(self, sample_data):
+        """Duplicated cells raise, absent cells raise unless allowed"""
+        with pytest.raises(ValueError, match="Multiple"):
+            input.read_data(pd.concat([sample_data, sample_data.iloc[:1]]))
+        with pytest.raises(ValueError, match="Missing"):
+            input.read_data(sample_data.iloc[1:])
+        data, _ = input.read_data(sample_data.iloc[1:], allow_missing=True)
+        assert np.isnan(data[0, 0]) and np.isfinite(data).sum() == 8
+            
     def test_format_anova(self):
         """Test ANOVA table formatting"""
         anova_results = {
@@ -98,8 +122,123 @@ class TestIO:
         with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp:
             output.save_results(tmp.name, anova_table, means_table, format='csv')
             
-            # Verify file exists and can be read
-            assert os.path.exists(tmp.name)
-            pd.read_csv(tmp.name)
+            # One file per table, each with its own columns and types
+            root = os.path.splitext(tmp.name)[0]
+            for name, table in (('anova', anova_table), ('means', means_table)):
+                pd.testing.assert_frame_equal(pd.read_csv(f"{root}_{name}.csv"), table)
+                os.unlink(f"{root}_{name}.csv")
             
-        os.unlink(tmp.name) 
\ No newline at end of file
+        os.unlink(tmp.name) 
+
+
+class TestColumnarIO:
+    @pytest.fixture
+    def archive(self):
+        """Two trials × two traits in long format"""
+        rng = np.random.default_rng(0)
+        block, treatment = np.indices((3, 5))
+        return pd.concat([
+            pd.DataFrame({'trial': trial, 'trait': trait, 'block': block.ravel() + 1,
+                          'treatment': treatment.ravel() + 1,
+                          'response': rng.normal(size=15)})
+            for trial in ['T1', 'T2'] for trait in ['yield', 'height']
+        ], ignore_index=True)
+
+    @pytest.mark.parametrize('fmt', ['parquet', 'feather', 'arrow'])
+    def test_round_trip_with_filters(self, archive, fmt, tmp_path):
+        """Filtered columnar reads give the matrix of the selected trial and trait"""
+        pytest.importorskip('pyarrow')
+        from dgNova.io import columnar
+        path = str(tmp_path / f"archive.{fmt}")
+        columnar.write_columnar(archive, path)
+        data, metadata = input.read_data(path, format=fmt,
+                                         filters={'trial': 'T2', 'trait': 'yield'})
+        selected = archive[(archive.trial == 'T2') & (archive.trait == 'yield')]
+        expected = selected.pivot(index='block', columns='treatment',
+                                  values='response').to_numpy()
+        np.testing.assert_allclose(data, expected)
+        assert metadata['block_levels'] == [1, 2, 3]
+        frame = columnar.read_columnar(path, columns=['trial', 'response'],
+                                       filters=[('trait', '==', 'height')])
+        assert list(frame.columns) == ['trial', 'response'] and len(frame) == 30
+
+    def test_filters_need_columnar_format(self):
+        """Row filters are rejected for text formats"""
+        with pytest.raises(ValueError, match="columnar"):
+            input.read_data("dummy.csv", filters={'trial': 'T1'})
+
+    def test_missing_pyarrow_is_reported(self, archive, tmp_path, monkeypatch):
+        """Without pyarrow columnar I/O fails with an install hint; text I/O still works"""
+        import sys
+        from dgNova.io import columnar
+        monkeypatch.setitem(sys.modules, 'pyarrow', None)
+        with pytest.raises(ImportError, match=r"dgNova\[arrow\]"):
+            columnar.write_columnar(archive, str(tmp_path / "archive.parquet"))
+        trial = archive[(archive.trial == 'T1') & (archive.trait == 'yield')]
+        path = tmp_path / "trial.csv"
+        trial.to_csv(path, index=False)
+        data, _ = input.read_data(str(path), format='csv')
+        np.testing.assert_allclose(data, trial['response'].to_numpy().reshape(3, 5))
+
+class TestLoadDataset:
+    def test_workbooks_and_csv_into_one_frame(self, tmp_path):
+        """All sheets and files are stacked with normalized columns and a report"""
+        from dgNova.io import load_dataset
+        rng = np.random.default_rng(1)
+        block, treatment = np.indices((3, 4))
+        with pd.ExcelWriter(tmp_path / "site_a.xlsx") as writer:
+            for trait in ['yield', 'height']:
+                pd.DataFrame({'Genotype': treatment.ravel() + 1, 'Rep': block.ravel() + 1,
+                              'Value': rng.normal(size=12)}).to_excel(
+                    writer, sheet_name=trait, index=False)
+        pd.DataFrame({'Treatment ': treatment.ravel() + 1, 'BLOCK': block.ravel() + 1,
+                      'Grain Yield': rng.normal(size=12)}).to_csv(tmp_path / "tablet.csv",
+                                                                  index=False)
+        (tmp_path / "broken.csv").write_text("a,b\n1,2\n")
+        
+        data, report = load_dataset(str(tmp_path / "*"), aliases={'response': ['grain_yield']})
+        assert len(data) == 36
+        assert list(data.columns) == ['treatment', 'block', 'response', 'source', 'sheet']
+        assert isinstance(data['treatment'].dtype, pd.CategoricalDtype)
+        assert set(data['sheet'].cat.categories) == {'yield', 'height', ''}
+        assert report['error'].notna().sum() == 1 and report['rows'].sum() == 36
+        
+        one_trait = data[(data['source'] == 'site_a.xlsx') & (data['sheet'] == 'height')]
+        matrix, _ = input.read_data(one_trait)
+        assert matrix.shape == (3, 4)
+        with pytest.raises(ValueError, match="broken"):
+            load_dataset(str(tmp_path / "*.csv"), errors='raise')
+
+class TestResultWriter:
+    @pytest.fixture
+    def trials(self):
+        from dgNova.field_designs import RCBD
+        rng = np.random.default_rng(2)
+        return {f"T{k}": RCBD(rng.normal(10, 1, size=(3, 6)), 6, 3).analyze() for k in range(3)}
+
+    def test_format_anova_keeps_numbers(self, trials):
+        """ANOVA columns stay numeric with NaN for blank cells"""
+        table = output.format_anova(trials['T0']['anova'])
+        assert table['SS'].dtype == float and np.isnan(table['F value'].iloc[-1])
+        assert table['SS'].iloc[0] == trials['T0']['anova']['ss'][0]
+
+    @pytest.mark.parametrize('fmt', ['excel', 'csv', 'json'])
+    def test_streams_trials_into_one_output(self, trials, fmt, tmp_path):
+        """Tables of all trials are appended with a Trial column"""
+        path = str(tmp_path / ('season.xlsx' if fmt == 'excel' else 'season'))
+        with output.ResultWriter(path, format=fmt) as writer:
+            for name, results in trials.items():
+                writer.write_results(results, trial=name)
+        
+        if fmt == 'excel':
+            means = pd.read_excel(path, sheet_name='Means')
+        elif fmt == 'csv':
+            means = pd.read_csv(os.path.join(path, 'Means.csv'))
+        else:
+            means = pd.read_json(os.path.join(path, 'Means.jsonl'), lines=True)
+            # Strict JSON Lines: one object per line, no blank lines
+            import json
+            with open(os.path.join(path, 'Means.jsonl')) as handle:
+                assert [json.loads(line)['Trial'] for line in handle][::6] == ['T0', 'T1', 'T2']
+        assert len(means) == 18 and list(means['Trial'].unique()) == ['T0', 'T1', 'T2']
+        np.testing.assert_allclose(means['Mean'].to_numpy()[:6], trials['T0']['means'])
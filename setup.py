@@ -24,6 +24,12 @@ setup(
         'animation': [
             'ffmpeg-python',
             'imagemagick'
+        ],
+        'arrow': [
+            'pyarrow>=10.0'
+        ],
+        'excel': [
+            'xlsxwriter>=3.0'
         ]
     },
     author="Nadim Khan",